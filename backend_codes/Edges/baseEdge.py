@@ -1,3 +1,5 @@
+import heapq
+import itertools
 import os
 import sys
 from collections import defaultdict
@@ -8,7 +10,23 @@ from typing import Callable, DefaultDict, Iterable, List
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from Nodes.base_node import BaseNode
-from Messages.simpleMessage import SimpleMessage
+from Messages.baseMessage import BaseMessage
+from Messages.simpleMessage import SimpleMessage, SimpleMessageCreator
+from telemetry import message_summary
+
+# 流式边: 上游生成中的分段实时转发给 streamingInput 的目标节点
+STREAM_EDGE_TYPE = "STREAM"
+
+# 有容量上限的边在队列满时的处理方式
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest', 'coalesce')
+
+
+def normalize_overflow(policy) -> str:
+    value = str(policy or 'block').strip().lower().replace('-', '_')
+    if value not in OVERFLOW_POLICIES:
+        raise ValueError(f"Unknown overflow policy: {policy} (expected one of {', '.join(OVERFLOW_POLICIES)})")
+    return value
+
 
 class BaseEdge(ABC):
     """Base class for all Edges with scheduler-aware communication."""
@@ -24,44 +42,131 @@ class BaseEdge(ABC):
         emit=None,
         run_id: str | None = None,
         team_id: str | None = None,
+        capacity: int | None = None,
+        overflow: str = "block",
+        absolute_delay: bool = False,
     ):
         self.edge_id = id if id else f"{source.id}_to_{target.id}"
         self.edge_description = f"Edge from {source.id} to {target.id}"
 
         self.source_node = source
         self.target_node = target
+        # 每条出边在源节点的outbox上持有自己的游标，消息在每条边上只传一次
+        self.source_node.subscribe(self.edge_id)
 
         self.edge_type = edge_type
         self.delay = max(0, int(delay or 0))
+        # 旧版配置: delay 表示绝对的送达tick(delay+1)，而不是相对加载tick的延迟
+        self.absolute_delay = absolute_delay
         self.emit = emit or (lambda _e: None)
         self.run_id = run_id
         self.team_id = team_id
 
+        # 最小堆: (due_tick, seq, message)，每条消息在加载后恰好 delay+1 个tick送达
+        self.msg_queue = []
+        self._seq = itertools.count()
+
+        # 背压: capacity 限制队列长度(None为不限)，overflow 决定队列满时的行为
+        self.capacity = max(1, int(capacity)) if capacity else None
+        self.overflow = normalize_overflow(overflow)
+        self.evicted = 0     # 最近一次load中被移出队列的消息数(供调度器修正计数)
+        self.dropped = 0
+        self.coalesced = 0
+
+        if self.pipelined_partials:
+            self.source_node.add_delta_listener(self._forward_partial)
+
+    @property
+    def pipelined_partials(self) -> bool:
+        """STREAM edge into a node that accepts streaming input."""
+        return self.edge_type == STREAM_EDGE_TYPE and getattr(self.target_node, 'streaming_input', False)
+
+    @property
+    def pipelined(self) -> bool:
+        """Complete messages may also skip the tick boundary (no delay)."""
+        return self.pipelined_partials and self.delay == 0 and not self.absolute_delay
+
+    def _forward_partial(self, node, delta: str, seq: int, message_index: int) -> None:
+        self.target_node.receive_partial(
+            self.source_node.id,
+            delta,
+            {'seq': seq, 'messageIndex': message_index, 'edgeId': self.edge_id},
+        )
+
+
+    def bind_run(self, emit=None, run_id: str | None = None) -> None:
+        """Attach the edge to a new run (telemetry sink and run id)."""
+        self.emit = emit or (lambda _e: None)
+        self.run_id = run_id
+
+    def reset(self) -> None:
+        """Drop every queued message."""
         self.msg_queue = []
+        self.evicted = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    @property
+    def backlog(self) -> int:
+        """Messages held back in the source's outbox because the queue is full (``block``)."""
+        return self.source_node.pending_for(self.edge_id)
+
+    @property
+    def saturated(self) -> bool:
+        return self.capacity is not None and len(self.msg_queue) >= self.capacity
+
+    def due_tick(self, load_tick: int) -> int:
+        """Tick on which messages loaded at ``load_tick`` are delivered.
+
+        A message loaded at the end of tick ``t`` reaches the target at the
+        start of tick ``t + delay + 1`` (delay 0 means "next tick"). Edges of
+        legacy configs (``absolute_delay``) deliver no earlier than tick
+        ``delay + 1``, which is when the old scheduler fired them.
+        """
+        if self.absolute_delay:
+            return max(load_tick + 1, self.delay + 1)
+        return load_tick + self.delay + 1
+
+    def next_due_tick(self) -> int | None:
+        return self.msg_queue[0][0] if self.msg_queue else None
+
+    def deliver(self, current_tick: int) -> int:
+        """Deliver the messages that are due by ``current_tick``; returns the delivered count.
 
+        Only due entries are popped from the heap, so the cost is
+        O(due messages · log queue) rather than a scan of the whole queue.
+        """
+        flattened_messages = []
+        while self.msg_queue and self.msg_queue[0][0] <= current_tick:
+            flattened_messages.append(heapq.heappop(self.msg_queue)[2])
+        if not flattened_messages:
+            return 0
 
-    def _flatten_messages(self, data):
-        """递归展平嵌套列表，确保所有消息都在同一层级"""
-        result = []
-        if isinstance(data, list):
-            for item in data:
-                result.extend(self._flatten_messages(item))
-        else:
-            result.append(data)
-        return result
-
-    def deliver(self, current_tick: int) -> None:
-        """Queue a message transfer via the provided scheduler."""
-        messages_to_deliver = self.msg_queue if current_tick == self.delay+1 else []
-        if not messages_to_deliver:
-            return
-        
-        # 展平消息列表，避免嵌套列表问题
-        flattened_messages = self._flatten_messages(messages_to_deliver)
-        
+        self._hand_over(flattened_messages)
+        self._emit_delivered(flattened_messages, current_tick)
+        return len(flattened_messages)
+
+    def forward(self, current_tick: int) -> int:
+        """Hand the source's new output to the target right now, within ``current_tick``.
+
+        Used for pipelined STREAM edges so a streaming-input target can start in
+        the same tick its upstream finished instead of on the next one.
+        """
+        messages = self.source_node.send_new(self.edge_id)
+        if not messages:
+            return 0
+        self._hand_over(list(messages))
+        self._emit_delivered(messages, current_tick)
+        return len(messages)
+
+    def _hand_over(self, messages) -> None:
+        self.target_node.receive_from(self.source_node.id, messages)
+        if self.pipelined_partials:
+            # 完整消息已送达，之前转发的分段不再需要
+            self.target_node.drop_partials(self.source_node.id)
+
+    def _emit_delivered(self, flattened_messages, current_tick: int) -> None:
         deliver_at = current_tick
-        self.target_node.receive(flattened_messages)
-        
         try:
             self.emit({
                 'type': 'edge.message.sent',
@@ -73,17 +178,12 @@ class BaseEdge(ABC):
                     'target': self.target_node.id,
                     'edgeType': self.edge_type,
                 },
-                'messages': [{
-                    'maker': getattr(m, 'maker', None),
-                    'target': getattr(m, 'target_agent', None),
-                    'timetag': getattr(m, 'timetag', None),
-                    'content': getattr(m, 'content', ''),
-                    'preview': (getattr(m, 'content', '') or '')[:120],
-                    'attachments': getattr(m, 'attachments', []),
-                } for m in flattened_messages],
+                'messages': [message_summary(m, with_content=True) for m in flattened_messages],
                 'meta': {
                     'count': len(flattened_messages),
                     'deliveredAt': current_tick,
+                    'queueDepth': len(self.msg_queue),
+                    'capacity': self.capacity,
                 },
             })
         except Exception:
@@ -105,9 +205,87 @@ class BaseEdge(ABC):
             pass
 
 
+    def load(self, current_tick: int = 0) -> int:
+        """Queue the source node's output for delivery; returns the number queued.
+
+        On a bounded edge the ``overflow`` policy applies once the queue holds
+        ``capacity`` messages:
+
+            block        leave the rest in the source's outbox until there is room
+            drop_oldest  evict the oldest queued message for each new one
+            drop_newest  discard the new messages
+            coalesce     merge each new message into the newest queued one
 
+        ``self.evicted`` is set to the number of previously queued messages that
+        were removed (dropped or merged), so the scheduler can correct its count.
+        """
+        self.evicted = 0
+        limit = None
+        if self.capacity is not None and self.overflow == 'block':
+            limit = max(0, self.capacity - len(self.msg_queue))
+        # outbox写入时已展平，这里拿到的是各出边共享的同一个元组
+        messages = self.source_node.send_new(self.edge_id, limit)
+        due = self.due_tick(current_tick)
+        queued = 0
+        dropped = coalesced = 0
+        for message in messages:
+            if self.saturated:
+                if self.overflow == 'drop_newest':
+                    dropped += 1
+                    continue
+                if self.overflow == 'drop_oldest':
+                    heapq.heappop(self.msg_queue)
+                    dropped += 1
+                else:
+                    message = self._coalesce_newest(message)
+                    coalesced += 1
+                self.evicted += 1
+            heapq.heappush(self.msg_queue, (due, next(self._seq), message))
+            queued += 1
+        self.dropped += dropped
+        self.coalesced += coalesced
+        backlog = self.backlog if limit is not None else 0
+        if dropped or coalesced or backlog:
+            self._emit_overflow(current_tick, dropped, coalesced, backlog)
+        return queued
 
-    def load(self) -> None:
-        """Load messages from the source node to the target node."""
-        message = self.source_node.send()
-        self.msg_queue.append(message)
+    def _coalesce_newest(self, message):
+        """Remove the newest queued message and return it merged with ``message``."""
+        newest = max(range(len(self.msg_queue)), key=lambda i: self.msg_queue[i][:2])
+        queued = self.msg_queue[newest][2]
+        self.msg_queue[newest] = self.msg_queue[-1]
+        self.msg_queue.pop()
+        heapq.heapify(self.msg_queue)
+        if not (isinstance(queued, BaseMessage) and isinstance(message, BaseMessage)):
+            return message
+        return SimpleMessageCreator().create_message(
+            content=f"{queued.content}\n\n{message.content}",
+            maker=message.maker,
+            target_agent=message.target_agent,
+            attachments=list(queued.attachments) + list(message.attachments) or None,
+        )
+
+    def _emit_overflow(self, current_tick: int, dropped: int, coalesced: int, backlog: int) -> None:
+        try:
+            self.emit({
+                'type': 'edge.queue.overflow',
+                'runId': self.run_id,
+                'teamId': self.team_id,
+                'edge': {
+                    'id': self.edge_id,
+                    'source': self.source_node.id,
+                    'target': self.target_node.id,
+                    'edgeType': self.edge_type,
+                },
+                'meta': {
+                    'tick': current_tick,
+                    'policy': self.overflow,
+                    'capacity': self.capacity,
+                    'queueDepth': len(self.msg_queue),
+                    'dropped': dropped,
+                    'coalesced': coalesced,
+                    'backlog': backlog,
+                },
+            })
+        except Exception:
+            pass
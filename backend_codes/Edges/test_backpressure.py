@@ -0,0 +1,93 @@
+import sys
+import os
+
+import pytest
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from Edges.baseEdge import normalize_overflow
+from Edges.test_baseEdge import connect, message
+from Teams.scheduler import ReadyQueueScheduler
+from Teams.simpleTeam import SimpleTeam
+from Teams.test_simpleTeam import node, team_config
+
+
+def load_four(policy):
+    """Queue four messages on a capacity-2 edge; return the edge and the scheduler's pending count."""
+    source, target, edge = connect(capacity=2, overflow=policy)
+    scheduler = ReadyQueueScheduler(['source', 'target'])
+    source.processed.extend([message(f'm{i}') for i in range(4)])
+    scheduler.schedule_edge(edge, 0, edge.load(0))
+    scheduler.mark_evicted(edge.evicted)
+    return edge, target, scheduler
+
+
+def queued(edge):
+    return [entry[2].content for entry in sorted(edge.msg_queue)]
+
+
+def test_block_leaves_the_rest_in_the_outbox():
+    edge, target, scheduler = load_four('block')
+    assert queued(edge) == ['m0', 'm1']
+    assert edge.backlog == 2
+    assert scheduler.pending == 2
+
+    scheduler.mark_delivered(edge, edge.deliver(1))
+    scheduler.schedule_edge(edge, 1, edge.load(1))
+    assert queued(edge) == ['m2', 'm3'] and edge.backlog == 0
+    assert scheduler.pending == 2 + 2  # 目标节点尚未处理的2条 + 队列中的2条
+
+
+def test_drop_oldest_keeps_the_latest():
+    edge, _, scheduler = load_four('drop_oldest')
+    assert queued(edge) == ['m2', 'm3']
+    assert (edge.evicted, edge.dropped) == (2, 2)
+    assert scheduler.pending == len(edge.msg_queue)
+
+
+def test_drop_newest_keeps_the_first():
+    edge, _, scheduler = load_four('drop_newest')
+    assert queued(edge) == ['m0', 'm1']
+    assert (edge.evicted, edge.dropped) == (0, 2)
+    assert scheduler.pending == len(edge.msg_queue)
+
+
+def test_coalesce_merges_into_the_newest():
+    edge, _, scheduler = load_four('coalesce')
+    assert queued(edge) == ['m0', 'm1\n\nm2\n\nm3']
+    assert (edge.evicted, edge.coalesced) == (2, 2)
+    assert scheduler.pending == len(edge.msg_queue)
+
+
+def test_overflow_events_report_the_policy():
+    events = []
+    source, _, edge = connect(capacity=1, overflow='drop_newest', emit=events.append)
+    source.processed.extend([message('a'), message('b')])
+    edge.load(0)
+    overflow = [e['meta'] for e in events if e['type'] == 'edge.queue.overflow']
+    assert overflow == [{'tick': 0, 'policy': 'drop_newest', 'capacity': 1, 'queueDepth': 1,
+                         'dropped': 1, 'coalesced': 0, 'backlog': 0}]
+
+
+def test_unknown_policy_is_rejected():
+    assert normalize_overflow('Drop-Oldest') == 'drop_oldest'
+    with pytest.raises(ValueError):
+        normalize_overflow('spill')
+
+
+def fan_in(**edge_settings):
+    nodes = [node(f'a{i}', systemPrompt=f'A{i}') for i in range(4)] + [node('g', 'logic', logicType='go-through')]
+    edges = [{'source': 'input-node', 'target': f'a{i}'} for i in range(4)]
+    edges += [{'source': f'a{i}', 'target': 'g'} for i in range(4)]
+    edges += [{'source': 'g', 'target': 'output-node', **edge_settings}]
+    return team_config(nodes, edges)
+
+
+@pytest.mark.parametrize('policy, delivered', [('block', 4), ('drop_newest', 1), ('drop_oldest', 1), ('coalesce', 1)])
+def test_team_run_settles_under_every_policy(fake_agent, policy, delivered):
+    team = SimpleTeam(goal='hello', config=fan_in(capacity=1, overflow=policy))
+    team.run()
+
+    assert len(team.nodes['output-node'].received) == delivered
+    assert team.scheduler.is_idle() and not team.blocked_edges
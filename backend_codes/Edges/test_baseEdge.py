@@ -0,0 +1,101 @@
+import sys
+import os
+
+import pytest
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from Edges.baseEdge import BaseEdge
+from Messages.simpleMessage import SimpleMessageCreator
+from Nodes.logicNodes.goThroughNode import GoThroughNode
+from Teams.simpleTeam import SimpleTeam
+
+
+def message(content):
+    return SimpleMessageCreator().create_message(content=content, maker='tester')
+
+
+def connect(delay=0, **kwargs):
+    source = GoThroughNode('source', id='source')
+    target = GoThroughNode('target', id='target')
+    return source, target, BaseEdge(source, target, delay=delay, **kwargs)
+
+
+def test_message_arrives_delay_plus_one_ticks_after_loading():
+    source, target, edge = connect(delay=2)
+    source.processed.append(message('m'))
+    assert edge.load(0) == 1
+
+    assert edge.next_due_tick() == 3
+    assert edge.deliver(2) == 0
+    assert target.received == []
+    assert edge.deliver(3) == 1
+    assert [m.content for m in target.received] == ['m']
+
+
+def test_each_message_keeps_its_own_due_tick():
+    source, target, edge = connect(delay=1)
+    source.processed.append(message('early'))
+    edge.load(0)
+    source.processed.append(message('late'))
+    edge.load(3)
+
+    assert edge.deliver(2) == 1
+    assert edge.deliver(4) == 0
+    assert edge.deliver(5) == 1
+    assert [m.content for m in target.received] == ['early', 'late']
+
+
+def delivery_ticks(delays, metadata=None):
+    """Run input -> g -> output with the given edge delays; return ``{target: deliveredAt}``."""
+    nodes = [{'id': 'input-node', 'name': 'in', 'type': 'input', 'config': {}},
+             {'id': 'g', 'name': 'G', 'type': 'logic', 'config': {}},
+             {'id': 'output-node', 'name': 'out', 'type': 'output', 'config': {}}]
+    edges = [{'source': 'input-node', 'target': 'g', 'delay': delays[0]},
+             {'source': 'g', 'target': 'output-node', 'delay': delays[1]}]
+    config = {'name': 't', 'nodes': nodes, 'edges': edges, 'settings': {'maxTicks': 10}}
+    if metadata:
+        config['metadata'] = metadata
+    events = []
+    team = SimpleTeam(goal='hello', config=config, emit=events.append)
+
+    assert team.run() == 'hello'
+    return {e['edge']['target']: e['meta']['deliveredAt'] for e in events if e['type'] == 'edge.message.sent'}
+
+
+def test_team_delivery_ticks_follow_edge_delays():
+    assert delivery_ticks((2, 0), {'edgeDelay': 'relative'}) == {'g': 3, 'output-node': 4}
+    assert delivery_ticks((2, 2), {'edgeDelay': 'relative'}) == {'g': 3, 'output-node': 6}
+
+
+def test_legacy_configs_keep_absolute_delays(capsys):
+    # 旧配置的 delay 2 表示在 tick 3 送达，而不是加载后再等2个tick
+    assert delivery_ticks((2, 2)) == {'g': 3, 'output-node': 4}
+    assert '旧版配置' in capsys.readouterr().out
+
+
+# ---- fan-out ---------------------------------------------------------------------
+def test_messages_are_immutable():
+    msg = SimpleMessageCreator().create_message(content='m', meta={'shard': 0})
+    with pytest.raises(AttributeError):
+        msg.content = 'changed'
+    with pytest.raises(TypeError):
+        msg.meta['shard'] = 1
+
+
+def test_fan_out_shares_one_message_and_summary():
+    source = GoThroughNode('source', id='source')
+    targets = [GoThroughNode(f't{i}', id=f't{i}') for i in range(3)]
+    events = []
+    edges = [BaseEdge(source, target, emit=events.append) for target in targets]
+    msg = message('broadcast')
+    source.processed.append(msg)
+
+    for edge in edges:
+        edge.load(0)
+        edge.deliver(1)
+
+    assert all(target.received[0] is msg for target in targets)
+    summaries = [e['messages'][0] for e in events if e['type'] == 'edge.message.sent']
+    assert len(summaries) == 3 and all(summary is summaries[0] for summary in summaries)
@@ -1,27 +1,126 @@
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
 from enum import Enum
+from types import MappingProxyType
+import itertools
+import operator
+import sys
 import time
 
 
+# 全局递增序号: 同一纳秒内创建的消息也有确定的先后顺序
+_message_seq = itertools.count()
+# monotonic时钟与墙上时钟的差值，用于把 ts 换算成可读时间
+_WALL_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+
+# 消息排序键: list.sort(key=message_order)
+message_order = operator.attrgetter('ts', 'seq')
+
+
+def _attachment_key(attachment):
+    if isinstance(attachment, dict):
+        for field in ('fileId', 'storagePath', 'downloadUrl'):
+            if attachment.get(field):
+                return field, attachment[field]
+    return 'repr', repr(attachment)
+
+
+def merge_attachments(messages) -> list:
+    """Attachments of ``messages`` in order, each file only once.
+
+    Uploaded files are identified by ``fileId``, ``storagePath`` or
+    ``downloadUrl`` (see artifact_manager); anything else by its ``repr``, so
+    two different uploads that share a display name are both kept.
+    """
+    attachments = []
+    seen = set()
+    for message in messages:
+        for attachment in getattr(message, 'attachments', ()) or ():
+            key = _attachment_key(attachment)
+            if key in seen:
+                continue
+            seen.add(key)
+            attachments.append(attachment)
+    return attachments
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
 class BaseMessage(ABC):
-    """Base class for all Messages."""
+    """Base class for all Messages.
+
+    Messages are ordered by ``(ts, seq)``: a monotonic nanosecond timestamp and
+    a process-wide sequence number. ``timetag`` is the human-readable form,
+    formatted on first access unless one is given explicitly.
+
+    Messages are immutable once created, so one instance can be fanned out to
+    every outgoing edge and target by reference; derived views (``to_dict``,
+    telemetry summaries) are computed once and cached.
+    """
+
+    __slots__ = ('content', 'maker', 'target_agent', 'attachments', 'meta', 'ts', 'seq',
+                 '_timetag', '_dict', '_summary', '_summary_full')
 
     def __init__(
         self,
         content: str,
-        timetag: Optional[float] = None,
+        timetag: Optional[str] = None,
         maker: Optional[str] = None,
         **kwargs,
     ):
-        self.content = content
-        self.timetag = timetag 
-        self.maker = maker
-        self.target_agent = kwargs.get("target_agent", None)
-        attachments = kwargs.get("attachments") or []
-        self.attachments: List[Dict[str, Any]] = list(attachments)
+        _set = object.__setattr__
+        _set(self, 'content', content)
+        _set(self, 'ts', time.monotonic_ns())
+        _set(self, 'seq', next(_message_seq))
+        _set(self, '_timetag', timetag)
+        _set(self, 'maker', _intern(maker))
+        _set(self, 'target_agent', _intern(kwargs.get("target_agent", None)))
+        _set(self, 'attachments', tuple(kwargs.get("attachments") or ()))
+        # 路由/编排信息(如 map 分片序号)，只读
+        meta = kwargs.get("meta")
+        _set(self, 'meta', MappingProxyType(dict(meta)) if meta else None)
+        _set(self, '_dict', None)
+        _set(self, '_summary', None)
+        _set(self, '_summary_full', None)
 
-    def to_dict(self) -> Dict[str, Any]:
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable; create a new message instead")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getstate__(self):
+        state = {name: getattr(self, name) for name in BaseMessage.__slots__}
+        state['meta'] = dict(self.meta) if self.meta is not None else None
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        if self.meta is not None:
+            object.__setattr__(self, 'meta', MappingProxyType(dict(self.meta)))
+
+    def _cache(self, name: str, value):
+        object.__setattr__(self, name, value)
+        return value
+
+    @property
+    def timetag(self) -> str:
+        if self._timetag is None:
+            return self._cache('_timetag', self.format_time())
+        return self._timetag
+
+    def format_time(self, fmt: str = "%y-%m-%d: %H:%M:%S") -> str:
+        return time.strftime(fmt, time.localtime((self.ts + _WALL_OFFSET_NS) / 1e9))
+
+    @property
+    def preview(self) -> str:
+        return (self.content or '')[:120]
+
+    def _build_dict(self) -> Dict[str, Any]:
         return {
             "content": self.content,
             "timetag": self.timetag,
@@ -30,6 +129,28 @@ class BaseMessage(ABC):
             "attachments": self.attachments,
         }
 
+    def to_dict(self) -> Dict[str, Any]:
+        # 首次调用时构建并缓存，返回浅拷贝防止调用方改动缓存
+        if self._dict is None:
+            self._cache('_dict', self._build_dict())
+        return dict(self._dict)
+
+    def summary(self, with_content: bool = False) -> Dict[str, Any]:
+        """Telemetry view of the message, shared by every event that reports it (read-only)."""
+        if with_content:
+            if self._summary_full is None:
+                self._cache('_summary_full', {**self.summary(), 'content': self.content})
+            return self._summary_full
+        if self._summary is None:
+            self._cache('_summary', {
+                'maker': self.maker,
+                'target': self.target_agent,
+                'timetag': self.timetag,
+                'preview': self.preview,
+                'attachments': self.attachments,
+            })
+        return self._summary
+
     def render(self) -> str:
         return f"[Message]: {self.content}"
     
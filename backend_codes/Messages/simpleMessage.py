@@ -5,19 +5,14 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from Messages.baseMessage import BaseMessage, BaseMsgCreator
-from time import time
-from datetime import datetime
-
-
-def _now_tag() -> str:
-    # 生成 “YY：MM：DD：HH：MM：SS”，注意这里用的是全角冒号
-    return datetime.now().strftime("%y-%m-%d: %H:%M:%S")
 
 
 class SimpleMessage(BaseMessage):
-    def __init__(self, content: str, timetag: float, maker: str = None, **kwargs):
+    __slots__ = ()
+    type = "simple"
+
+    def __init__(self, content: str, timetag: str | None = None, maker: str = None, **kwargs):
         super().__init__(content, timetag=timetag, maker=maker, **kwargs)
-        self.type = "simple", 
 
     def display(self):
         print(f"[{self.type} Message]: {self.content}")
@@ -28,7 +23,7 @@ class SimpleMessage(BaseMessage):
         return f"USER: {self.content}"
     
 
-    def to_dict(self):
+    def _build_dict(self):
         return {
             "type": self.type,
             "content": self.content,
@@ -48,13 +43,14 @@ class SimpleMessageCreator(BaseMsgCreator):
         maker: str | None = None,
         target_agent = None,
         attachments: list | None = None,
+        meta: dict | None = None,
     ) -> SimpleMessage:
         return SimpleMessage(
             content=content,
-            timetag=_now_tag(),
             maker=maker,
             target_agent=target_agent,
             attachments=attachments,
+            meta=meta,
         )
     
 
@@ -0,0 +1,56 @@
+import pickle
+import sys
+import os
+
+import pytest
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from Messages.baseMessage import message_order
+from Messages.simpleMessage import SimpleMessage, SimpleMessageCreator
+
+
+def create(content='m', **kwargs):
+    return SimpleMessageCreator().create_message(content=content, maker='tester', **kwargs)
+
+
+def test_messages_are_compact():
+    message = create()
+    assert not hasattr(message, '__dict__')
+    assert message.type == 'simple'
+
+
+def test_messages_created_together_keep_their_order():
+    messages = [create(str(i)) for i in range(200)]
+    shuffled = messages[::-1]
+    shuffled.sort(key=message_order)
+    assert shuffled == messages
+    assert len({m.seq for m in messages}) == 200
+
+
+def test_makers_are_interned():
+    maker = ''.join(['ag', 'ent'])
+    assert SimpleMessage('a', maker=maker).maker is SimpleMessage('b', maker='agent').maker
+
+
+def test_timetag_is_formatted_lazily_or_given():
+    message = create()
+    assert message._timetag is None
+    assert message.timetag == message.timetag and message._timetag is not None
+    assert SimpleMessage('a', timetag='yesterday').timetag == 'yesterday'
+
+
+def test_to_dict_is_cached_but_returns_copies():
+    message = create(attachments=[{'fileId': 'f1'}])
+    first = message.to_dict()
+    first['content'] = 'changed'
+    assert message.to_dict()['content'] == 'm'
+    assert message.to_dict()['attachments'] == ({'fileId': 'f1'},)
+
+
+def test_pickle_round_trip():
+    message = create(meta={'shard': 1})
+    copy = pickle.loads(pickle.dumps(message))
+    assert (copy.content, copy.maker, copy.ts, copy.seq) == (message.content, message.maker, message.ts, message.seq)
+    assert copy.meta['shard'] == 1
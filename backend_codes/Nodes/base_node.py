@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+import asyncio
+import itertools
 import sys
 import os
 import time
@@ -6,6 +8,8 @@ import time
 # 把项目根目录加入搜索路径
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from Messages.simpleMessage import SimpleMessageCreator
+from Nodes.outbox import Outbox
+from telemetry import make_event
 
 class BaseNode(ABC):
     """Base class for all Nodes."""
@@ -15,12 +19,21 @@ class BaseNode(ABC):
         self.name = name
         self.type = None # as a marker of LLM node, agent node or logic node
     
-        self.processed = []
+        self.processed = Outbox()
         self.received = []
         self.resume_info = None
         self.emit = emit or (lambda _e: None)
         self.run_id = run_id
         self.team_id = team_id
+        # 整个run的截止时间(time.monotonic())，由团队在开始运行时设置
+        self.run_deadline = None
+        # 当前tick，由团队在节点处理前设置(按tick计时的节点使用，如join超时)
+        self.tick = 0
+
+        # 流式输入: STREAM边会把上游仍在生成的输出分段送到 streaming_input 的节点
+        self.streaming_input = False
+        self.partial_received = {}
+        self.delta_listeners = []
 
     
 
@@ -34,19 +47,178 @@ class BaseNode(ABC):
         """Process the received data or messages."""
         pass
 
+    async def aprocess(self):
+        """Async variant of :meth:`process`.
+
+        Nodes with a native async backend override this; the default runs the
+        blocking ``process()`` in a worker thread so it never stalls the loop.
+        """
+        await asyncio.to_thread(self.process)
+
     def send(self):
         """Send output data or messages."""
         return self.processed
 
+    def receive_from(self, source_id, input_data):
+        """Messages delivered by the edge from ``source_id``.
+
+        Nodes that care which upstream a message came from (join) override
+        this; everyone else just receives it.
+        """
+        self.receive(input_data)
+
+    def wake_tick(self) -> int | None:
+        """Tick at which the node wants to run again without new input (e.g. a timeout), or None."""
+        return None
+
+    def subscribe(self, key):
+        """Register an outgoing edge as a reader of this node's outbox."""
+        self.processed.subscribe(key)
+
+    def send_new(self, key, limit=None):
+        """Messages produced since ``key`` last read them (each one is returned once)."""
+        return self.processed.read(key, limit)
+
+    def pending_for(self, key) -> int:
+        """Produced messages ``key`` has not read yet."""
+        return self.processed.pending(key)
+
 
     def show(self):
         """Display or visualize the node's state."""
         pass
 
+    def emit_output_delta(self, delta: str, seq: int, message_index: int = 0):
+        """Stream a chunk of the output being generated for the ``message_index``-th input."""
+        if not delta:
+            return
+        try:
+            self.emit({
+                'type': 'node.output.delta',
+                'runId': self.run_id,
+                'teamId': self.team_id,
+                'node': {'id': self.id, 'name': self.name},
+                'delta': delta,
+                'meta': {'seq': seq, 'messageIndex': message_index},
+            })
+        except Exception:
+            pass
+
+    def delta_sink(self, message_index: int = 0):
+        """Callback that emits successive ``node.output.delta`` events for one output."""
+        seq = itertools.count()
+
+        def on_delta(delta: str):
+            index = next(seq)
+            self.emit_output_delta(delta, index, message_index)
+            for listener in self.delta_listeners:
+                try:
+                    listener(self, delta, index, message_index)
+                except Exception as e:
+                    print(f"⚠️ Node {self.name} delta listener failed: {e}")
+        return on_delta
+
+    def add_delta_listener(self, listener):
+        """``listener(node, delta, seq, message_index)`` is called for every output delta."""
+        self.delta_listeners.append(listener)
+
+    def receive_partial(self, source_id, delta: str, meta=None):
+        """A chunk of a message that ``source_id`` is still generating (STREAM edges).
+
+        Chunks are buffered per (source, message) so ``partial_text`` can return
+        the text so far; ``on_partial_input`` lets a node start early work on it.
+        ``messageIndex`` restarts with every process call of the source, so the
+        first chunk (``seq`` 0) of a message starts a fresh buffer, and the edge
+        drops the source's buffers once the complete messages are delivered.
+        """
+        meta = meta or {}
+        key = (source_id, meta.get('messageIndex', 0))
+        if meta.get('seq', 0) == 0:
+            self.partial_received[key] = [delta]
+        else:
+            self.partial_received.setdefault(key, []).append(delta)
+        self.on_partial_input(source_id, delta, meta)
+
+    def on_partial_input(self, source_id, delta: str, meta):
+        """Hook for streaming-input nodes (prefetching, a first pass, ...)."""
+        pass
+
+    def partial_text(self, source_id, message_index: int = 0) -> str:
+        return ''.join(self.partial_received.get((source_id, message_index), []))
+
+    def drop_partials(self, source_id) -> None:
+        """Forget the buffered chunks of ``source_id`` (its complete messages have arrived)."""
+        for key in [key for key in self.partial_received if key[0] == source_id]:
+            del self.partial_received[key]
+
+    def report_shared_call(self, stats):
+        """Telemetry for a model call answered by an identical in-flight call (single-flight)."""
+        try:
+            self.emit(make_event(
+                'llm.singleflight.shared',
+                self.run_id,
+                self.team_id,
+                node={'id': self.id, 'name': self.name},
+                meta=stats,
+            ))
+        except Exception:
+            pass
+
+    def model_deadline(self, timeout: float | None = None):
+        """Absolute deadline of one model call: ``timeout`` from now, capped by the run deadline."""
+        deadlines = [d for d in (self.run_deadline, time.monotonic() + timeout if timeout else None) if d is not None]
+        return min(deadlines) if deadlines else None
+
+    def report_hedge(self, stats):
+        """Telemetry for a hedged model call (whether the second attempt won)."""
+        try:
+            self.emit(make_event(
+                'llm.hedge',
+                self.run_id,
+                self.team_id,
+                node={'id': self.id, 'name': self.name},
+                meta=stats,
+            ))
+        except Exception:
+            pass
+
+    def report_cache_lookup(self, hit: bool, stats):
+        """Telemetry for a response-cache lookup (hit or miss) of a model call."""
+        try:
+            self.emit(make_event(
+                'llm.cache.hit' if hit else 'llm.cache.miss',
+                self.run_id,
+                self.team_id,
+                node={'id': self.id, 'name': self.name},
+                meta={'model': getattr(self, 'model_name', None), 'cacheMode': getattr(self, 'cache_mode', 'off'), **stats},
+            ))
+        except Exception:
+            pass
+
+    def report_model_slot(self, stats):
+        """Telemetry for a model call granted by the per-model governor (wait time, queue depth)."""
+        try:
+            self.emit(make_event(
+                'llm.governor.slot',
+                self.run_id,
+                self.team_id,
+                node={'id': self.id, 'name': self.name},
+                meta=stats,
+            ))
+        except Exception:
+            pass
+
+    def bind_run(self, emit=None, run_id: str | None = None):
+        """Attach the node to a new run (telemetry sink and run id)."""
+        self.emit = emit or (lambda _e: None)
+        self.run_id = run_id
+
     def reset(self):
         """Reset the node's state."""
-        self.processed = []
+        self.processed.clear()
         self.received = []
+        self.partial_received = {}
+        self.tick = 0
 
     def parse_processed(self, output):
         """Parse processed data if needed."""
@@ -1,4 +1,6 @@
 """Logic node implementations."""
 
 from .goThroughNode import GoThroughNode  # noqa: F401
-
+from .joinNode import JoinNode  # noqa: F401
+from .mapNode import MapNode  # noqa: F401
+from .reduceNode import ReduceNode  # noqa: F401
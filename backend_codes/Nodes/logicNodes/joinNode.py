@@ -0,0 +1,121 @@
+import os
+import sys
+from collections import deque
+from typing import Iterable
+
+# Ensure the parent directory is on the path for relative imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from Messages.baseMessage import merge_attachments
+from Messages.simpleMessage import SimpleMessageCreator
+from Nodes.procedureNodes.baseprocedureNodes import BaseProcedureNode
+
+
+class JoinNode(BaseProcedureNode):
+    """Barrier for fan-in: waits for one message from every upstream, then emits one merged message.
+
+    Arrivals are buffered per source node. As soon as every source in
+    ``sources`` has delivered, one message from each is merged (in ``sources``
+    order, labelled with its maker) and emitted. With ``timeout_ticks`` set,
+    a round that is still incomplete that many ticks after its first arrival
+    is emitted with whatever has arrived. Messages from nodes that are not in
+    ``sources`` are forwarded unchanged.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        sources: Iterable[str] = (),
+        timeout_ticks: int | None = None,
+        separator: str = "\n\n",
+        logic_type: str = "join",
+        id=None,
+        emit=None,
+        run_id: str | None = None,
+        team_id: str | None = None,
+    ):
+        super().__init__(name=name, id=id, emit=emit, run_id=run_id, team_id=team_id)
+        self.type = "logic"
+        self.logic_type = logic_type
+        self.sources = tuple(dict.fromkeys(sources))
+        self.timeout_ticks = max(1, int(timeout_ticks)) if timeout_ticks else None
+        self.separator = separator
+        self.buffers = {source_id: deque() for source_id in self.sources}
+        self.passthrough = []
+        # 当前这一轮第一条消息到达的tick
+        self.round_started = None
+
+    def receive(self, input_data):
+        """Receive input data or messages (source unknown: forwarded as they are)."""
+        self.receive_from(None, input_data)
+
+    def receive_from(self, source_id, input_data):
+        messages = [input_data] if not isinstance(input_data, list) else input_data
+        self.received.extend(messages)
+        if source_id in self.buffers:
+            self.buffers[source_id].extend(messages)
+            if self.round_started is None:
+                self.round_started = self.tick
+        else:
+            self.passthrough.extend(messages)
+
+    def _timed_out(self) -> bool:
+        return (self.timeout_ticks is not None and self.round_started is not None
+                and self.tick - self.round_started >= self.timeout_ticks)
+
+    def has_work(self) -> bool:
+        return bool(self.received) or self._timed_out()
+
+    def wake_tick(self) -> int | None:
+        if self.timeout_ticks is None or self.round_started is None:
+            return None
+        return self.round_started + self.timeout_ticks
+
+    def transform(self, messages):
+        output, self.passthrough = self.passthrough, []
+        while self.buffers and all(self.buffers.values()):
+            output.append(self._merge([buffer.popleft() for buffer in self.buffers.values()]))
+            self._next_round()
+        if self._timed_out():
+            missing = [source_id for source_id, buffer in self.buffers.items() if not buffer]
+            self._report_timeout(missing)
+            output.append(self._merge([buffer.popleft() for buffer in self.buffers.values() if buffer]))
+            self._next_round()
+        return output
+
+    def _next_round(self) -> None:
+        # 已经有下一轮的消息在等待时，从现在开始计时
+        self.round_started = self.tick if any(self.buffers.values()) else None
+
+    def _merge(self, messages):
+        content = self.separator.join(
+            f"[{message.maker}]\n{message.content}" if getattr(message, 'maker', None) else str(message.content or '')
+            for message in messages
+        )
+        return SimpleMessageCreator().create_message(
+            content=content,
+            maker=self.name,
+            target_agent=messages[0].target_agent,
+            attachments=merge_attachments(messages) or None,
+        )
+
+    def _report_timeout(self, missing) -> None:
+        print(f"⏱️ Join node {self.name} timed out waiting for: {', '.join(missing)}")
+        try:
+            self.emit({
+                'type': 'node.join.timeout',
+                'runId': self.run_id,
+                'teamId': self.team_id,
+                'node': {'id': self.id, 'name': self.name},
+                'meta': {'missing': missing, 'timeoutTicks': self.timeout_ticks, 'tick': self.tick},
+            })
+        except Exception:
+            pass
+
+    def reset(self):
+        super().reset()
+        for buffer in self.buffers.values():
+            buffer.clear()
+        self.passthrough = []
+        self.round_started = None
@@ -0,0 +1,232 @@
+import asyncio
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List
+
+# Ensure the parent directory is on the path for relative imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from Messages.simpleMessage import SimpleMessageCreator
+from Nodes.base_node import BaseNode
+from telemetry import message_summary
+from utils import extract_json
+
+SPLIT_STRATEGIES = ('lines', 'chunks', 'attachments', 'json')
+
+# 每种切分方式下一个分片的默认大小: 行数 / 字符数 / 附件数 / 数组元素数
+DEFAULT_PART_SIZES = {'lines': 1, 'chunks': 2000, 'attachments': 1, 'json': 1}
+
+
+def normalize_split(split: Any) -> str:
+    value = str(split or 'lines').strip().lower()
+    if value not in SPLIT_STRATEGIES:
+        raise ValueError(f"Unknown split strategy: {split} (expected one of {', '.join(SPLIT_STRATEGIES)})")
+    return value
+
+
+def _text_chunks(text: str, size: int) -> List[str]:
+    """Pieces of at most ``size`` characters, cut at the last whitespace where possible."""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            cut = max(text.rfind(' ', start, end), text.rfind('\n', start, end))
+            if cut > start:
+                end = cut + 1
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+def split_message(message, strategy: str, part_size: int | None = None) -> List[dict]:
+    """Split one message into parts (``content``/``attachments`` dicts).
+
+    A message that cannot be split by ``strategy`` (no attachments, no JSON
+    array, empty content) yields a single part holding the whole message.
+    """
+    content = str(getattr(message, 'content', message) or '')
+    attachments = list(getattr(message, 'attachments', ()) or ())
+    size = max(1, int(part_size or DEFAULT_PART_SIZES[strategy]))
+    parts = []
+    if strategy == 'lines':
+        lines = [line for line in content.splitlines() if line.strip()]
+        parts = [{'content': '\n'.join(lines[i:i + size]), 'attachments': attachments}
+                 for i in range(0, len(lines), size)]
+    elif strategy == 'chunks':
+        parts = [{'content': chunk, 'attachments': attachments} for chunk in _text_chunks(content, size)]
+    elif strategy == 'attachments':
+        parts = [{'content': content, 'attachments': attachments[i:i + size]}
+                 for i in range(0, len(attachments), size)]
+    elif strategy == 'json':
+        try:
+            items = extract_json(content)
+        except ValueError:
+            items = None
+        if isinstance(items, list):
+            parts = [{'content': json.dumps(items[i:i + size], ensure_ascii=False), 'attachments': attachments}
+                     for i in range(0, len(items), size)]
+    return parts or [{'content': content, 'attachments': attachments}]
+
+
+class MapNode(BaseNode):
+    """Logic node that splits each message and runs the parts on agent replicas concurrently.
+
+    Every received message is cut into parts by ``split``. The parts are
+    spread round-robin over ``replicas`` independent agents (built lazily by
+    ``replica_factory``) which work in parallel; each part is answered from a
+    fresh conversation. The answers are emitted in part order and tagged with
+    ``meta`` (``mapId``/``part``/``parts``) so a downstream ReduceNode can put
+    them back together.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        replica_factory: Callable[[], Any],
+        *,
+        split: str = 'lines',
+        part_size: int | None = None,
+        replicas: int = 4,
+        logic_type: str = "map",
+        id=None,
+        emit=None,
+        run_id: str | None = None,
+        team_id: str | None = None,
+    ):
+        super().__init__(name=name, id=id, emit=emit, run_id=run_id, team_id=team_id)
+        self.type = "logic"
+        self.logic_type = logic_type
+        self.replica_factory = replica_factory
+        self.split = normalize_split(split)
+        self.part_size = int(part_size) if part_size else None
+        self.replica_count = max(1, int(replicas or 1))
+        self.replicas = []
+        self._map_ids = itertools.count(1)
+
+    def receive(self, input_data):
+        """Receive input data or messages."""
+        self.received.extend([input_data] if not isinstance(input_data, list) else input_data)
+
+    def bind_run(self, emit=None, run_id: str | None = None):
+        super().bind_run(emit, run_id)
+        for replica in self.replicas:
+            replica.bind_run(emit, run_id)
+
+    def _pool(self, needed: int) -> list:
+        """The first ``needed`` replicas, creating missing ones on demand."""
+        count = min(needed, self.replica_count)
+        while len(self.replicas) < count:
+            replica = self.replica_factory()
+            replica.bind_run(self.emit, self.run_id)
+            self.replicas.append(replica)
+        for replica in self.replicas[:count]:
+            replica.run_deadline = self.run_deadline
+        return self.replicas[:count]
+
+    def _split(self, message) -> List[dict]:
+        map_id = f"{self.id}:{next(self._map_ids)}"
+        parts = split_message(message, self.split, self.part_size)
+        for index, part in enumerate(parts):
+            part['message'] = SimpleMessageCreator().create_message(
+                content=part['content'],
+                maker=getattr(message, 'maker', None),
+                target_agent=getattr(message, 'target_agent', None),
+                attachments=part['attachments'],
+            )
+            part['meta'] = {'mapId': map_id, 'mapNode': self.id, 'part': index, 'parts': len(parts)}
+        return parts
+
+    @staticmethod
+    def _run_part(replica, part):
+        # 每个分片独立作答，不带上一个分片的对话记忆
+        replica.reset()
+        payload = replica._build_payload(part['message'])
+        try:
+            return replica._call_model(payload)
+        except Exception as e:
+            print(f"Map node replica {replica.name} failed on part {part['meta']['part']}: {e}")
+            return None
+
+    @staticmethod
+    async def _arun_part(replica, part):
+        replica.reset()
+        payload = replica._build_payload(part['message'])
+        try:
+            return await replica._acall_model(payload)
+        except Exception as e:
+            print(f"Map node replica {replica.name} failed on part {part['meta']['part']}: {e}")
+            return None
+
+    def _start_processing(self) -> List[dict]:
+        if not self.received:
+            return []
+        try:
+            self.emit({
+                'type': 'node.processing.started',
+                'runId': self.run_id,
+                'teamId': self.team_id,
+                'node': {'id': self.id, 'name': self.name},
+                'meta': {'receivedCount': len(self.received)},
+            })
+        except Exception:
+            pass
+        parts = []
+        for message in self.received:
+            parts.extend(self._split(message))
+        return parts
+
+    def _finish_processing(self, parts: List[dict], results: list, replicas: int) -> None:
+        produced_from = len(self.processed)
+        for part, result in zip(parts, results):
+            self.processed.append(self.replicas[0]._output_message(result, meta=part['meta']))
+        try:
+            self.emit({
+                'type': 'node.processing.finished',
+                'runId': self.run_id,
+                'teamId': self.team_id,
+                'node': {'id': self.id, 'name': self.name},
+                'messages': [message_summary(m) for m in self.processed[produced_from:]],
+                'meta': {'producedCount': len(self.processed) - produced_from, 'parts': len(parts), 'replicas': replicas},
+            })
+        except Exception:
+            pass
+
+    def process(self):
+        """Run all parts of the received messages on the replica pool."""
+        parts = self._start_processing()
+        if not parts:
+            return
+        replicas = self._pool(len(parts))
+        results = [None] * len(parts)
+
+        def work(r: int):
+            # 副本r依次处理第 r, r+R, r+2R... 个分片
+            for i in range(r, len(parts), len(replicas)):
+                results[i] = self._run_part(replicas[r], parts[i])
+
+        with ThreadPoolExecutor(max_workers=len(replicas), thread_name_prefix=f"map-{self.id}") as pool:
+            list(pool.map(work, range(len(replicas))))
+        self._finish_processing(parts, results, len(replicas))
+
+    async def aprocess(self):
+        parts = self._start_processing()
+        if not parts:
+            return
+        replicas = self._pool(len(parts))
+        results = [None] * len(parts)
+
+        async def work(r: int):
+            for i in range(r, len(parts), len(replicas)):
+                results[i] = await self._arun_part(replicas[r], parts[i])
+
+        await asyncio.gather(*(work(r) for r in range(len(replicas))))
+        self._finish_processing(parts, results, len(replicas))
+
+    def reset(self):
+        super().reset()
+        for replica in self.replicas:
+            replica.reset()
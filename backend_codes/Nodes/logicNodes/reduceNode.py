@@ -0,0 +1,68 @@
+import os
+import sys
+
+# Ensure the parent directory is on the path for relative imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from Messages.baseMessage import merge_attachments
+from Messages.simpleMessage import SimpleMessageCreator
+from Nodes.procedureNodes.baseprocedureNodes import BaseProcedureNode
+
+
+class ReduceNode(BaseProcedureNode):
+    """Logic node that joins the parts produced by a MapNode back into one message.
+
+    Parts are buffered per ``mapId`` until all of them have arrived (possibly
+    over several ticks), then emitted as a single message whose content is the
+    part contents in part order joined by ``separator``. Messages without map
+    metadata are forwarded unchanged.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        separator: str = "\n\n",
+        logic_type: str = "reduce",
+        id=None,
+        emit=None,
+        run_id: str | None = None,
+        team_id: str | None = None,
+    ):
+        super().__init__(name=name, id=id, emit=emit, run_id=run_id, team_id=team_id)
+        self.type = "logic"
+        self.logic_type = logic_type
+        self.separator = separator
+        # mapId -> {part序号: message}
+        self.pending = {}
+
+    def receive(self, input_data):
+        """Receive input data or messages."""
+        self.received.extend([input_data] if not isinstance(input_data, list) else input_data)
+
+    def transform(self, messages):
+        output = []
+        for message in messages:
+            meta = getattr(message, 'meta', None)
+            if not meta or 'mapId' not in meta:
+                output.append(message)
+                continue
+            parts = self.pending.setdefault(meta['mapId'], {})
+            parts[meta['part']] = message
+            if len(parts) >= meta['parts']:
+                output.append(self._merge([parts[i] for i in sorted(parts)]))
+                del self.pending[meta['mapId']]
+        return output
+
+    def _merge(self, parts):
+        attachments = merge_attachments(parts)
+        return SimpleMessageCreator().create_message(
+            content=self.separator.join(str(part.content or '') for part in parts),
+            maker=parts[0].maker,
+            target_agent=parts[0].target_agent,
+            attachments=attachments or None,
+        )
+
+    def reset(self):
+        super().reset()
+        self.pending = {}
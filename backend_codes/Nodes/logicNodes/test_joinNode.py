@@ -0,0 +1,104 @@
+import sys
+import os
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from Messages.baseMessage import merge_attachments
+from Messages.simpleMessage import SimpleMessageCreator
+from Nodes.logicNodes.joinNode import JoinNode
+from Teams.simpleTeam import SimpleTeam
+from Teams.test_simpleTeam import node, team_config
+
+
+def create(content, maker='tester', attachments=None):
+    return SimpleMessageCreator().create_message(content=content, maker=maker, attachments=attachments)
+
+
+def upload(file_id, name='report.pdf'):
+    # artifact_manager 保存上传文件后返回的描述
+    return {'fileId': file_id, 'name': name, 'storagePath': f'/uploads/{file_id}/{name}',
+            'downloadUrl': f'/api/uploads/{file_id}'}
+
+
+# ---- attachments ---------------------------------------------------------------
+def test_distinct_uploads_with_the_same_name_are_both_kept():
+    first, second = upload('f1'), upload('f2')
+    merged = merge_attachments([create('a', attachments=[first]), create('b', attachments=[second, first])])
+    assert merged == [first, second]
+
+
+def test_attachments_without_an_upload_id_fall_back_to_repr():
+    merged = merge_attachments([create('a', attachments=[{'name': 'x'}, 'raw']),
+                                create('b', attachments=[{'name': 'x'}, {'name': 'x', 'page': 2}])])
+    assert merged == [{'name': 'x'}, 'raw', {'name': 'x', 'page': 2}]
+
+
+# ---- join rounds ---------------------------------------------------------------
+def test_join_waits_for_every_source_and_merges_in_source_order():
+    join = JoinNode('j', sources=['a', 'b'])
+    join.receive_from('b', create('from b', maker='B', attachments=[upload('f2')]))
+    assert join.transform([]) == []
+
+    join.receive_from('a', create('from a', maker='A', attachments=[upload('f1')]))
+    [merged] = join.transform([])
+    assert merged.content == '[A]\nfrom a\n\n[B]\nfrom b'
+    assert [a['fileId'] for a in merged.attachments] == ['f1', 'f2']
+    assert join.round_started is None
+
+
+def test_unknown_sources_pass_through():
+    join = JoinNode('j', sources=['a'])
+    join.receive_from('z', create('stray'))
+    assert [m.content for m in join.transform([])] == ['stray']
+
+
+def test_timed_out_round_emits_what_has_arrived():
+    events = []
+    join = JoinNode('j', sources=['a', 'b'], timeout_ticks=2, emit=events.append)
+    join.tick = 3
+    join.receive_from('a', create('a1', maker='A'))
+    join.receive_from('a', create('a2', maker='A'))
+    assert join.wake_tick() == 5
+
+    join.tick = 4
+    assert not join._timed_out() and join.transform([]) == []
+    join.tick = 5
+    assert join.has_work()
+    assert [m.content for m in join.transform([])] == ['[A]\na1']
+    # a2 还在等待，新的一轮从当前tick开始计时
+    assert join.round_started == 5 and join.wake_tick() == 7
+    timeouts = [e['meta'] for e in events if e['type'] == 'node.join.timeout']
+    assert timeouts == [{'missing': ['b'], 'timeoutTicks': 2, 'tick': 5}]
+
+
+# ---- join in a team ------------------------------------------------------------
+def fan_in(timeout_ticks=None, slow_delay=0):
+    nodes = [node('a0', systemPrompt='A0'), node('a1', systemPrompt='A1'),
+             node('j', 'logic', logicType='join', timeoutTicks=timeout_ticks)]
+    edges = [{'source': 'input-node', 'target': 'a0'}, {'source': 'input-node', 'target': 'a1'},
+             {'source': 'a0', 'target': 'j'}, {'source': 'a1', 'target': 'j', 'delay': slow_delay},
+             {'source': 'j', 'target': 'output-node'}]
+    return team_config(nodes, edges)
+
+
+def test_team_join_emits_one_merged_message(fake_agent):
+    team = SimpleTeam(goal='hello', config=fan_in())
+    team.run()
+
+    [merged] = team.nodes['output-node'].received
+    assert merged.content == '[A0]\nA0 <- USER: hello\n\n[A1]\nA1 <- USER: hello'
+
+
+def test_team_join_times_out_on_a_slow_source(fake_agent):
+    events = []
+    team = SimpleTeam(goal='hello', config=fan_in(timeout_ticks=2, slow_delay=4), emit=events.append)
+    team.run()
+
+    received = [m.content for m in team.nodes['output-node'].received]
+    assert received == ['[A0]\nA0 <- USER: hello', '[A1]\nA1 <- USER: hello']
+    # 超时由调度器唤醒触发，无需新的输入
+    timeouts = [e['meta'] for e in events if e['type'] == 'node.join.timeout']
+    assert [t['missing'] for t in timeouts] == [['a1'], ['a0']]
+    assert [t['tick'] for t in timeouts] == [2, 6]
+    assert team.scheduler.is_idle()
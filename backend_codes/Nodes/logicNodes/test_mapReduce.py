@@ -0,0 +1,99 @@
+import asyncio
+import sys
+import os
+import time
+
+import pytest
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from Messages.simpleMessage import SimpleMessageCreator
+from Nodes.logicNodes.mapNode import normalize_split, split_message
+from Nodes.logicNodes.reduceNode import ReduceNode
+from Teams.simpleTeam import SimpleTeam
+from Teams.test_simpleTeam import node, team_config
+
+
+def create(content, attachments=None, meta=None):
+    return SimpleMessageCreator().create_message(content=content, maker='tester', attachments=attachments, meta=meta)
+
+
+# ---- splitting -------------------------------------------------------------------
+def test_split_strategies():
+    files = [{'fileId': f'f{i}'} for i in range(3)]
+    assert [p['content'] for p in split_message(create('a\n\nb\nc'), 'lines')] == ['a', 'b', 'c']
+    assert [p['content'] for p in split_message(create('a\nb\nc'), 'lines', 2)] == ['a\nb', 'c']
+    assert [p['content'] for p in split_message(create('aaa bbb ccc'), 'chunks', 5)] == ['aaa ', 'bbb ', 'ccc']
+    assert [p['attachments'] for p in split_message(create('x', files), 'attachments', 2)] == [files[:2], files[2:]]
+    assert [p['content'] for p in split_message(create('items: [1, 2, 3]'), 'json', 2)] == ['[1, 2]', '[3]']
+
+
+def test_unsplittable_message_is_one_part():
+    assert [p['content'] for p in split_message(create('no array'), 'json')] == ['no array']
+    assert len(split_message(create('x'), 'attachments')) == 1
+    with pytest.raises(ValueError):
+        normalize_split('words')
+
+
+# ---- reduce --------------------------------------------------------------------
+def test_reduce_waits_for_every_part_and_restores_order():
+    reduce = ReduceNode('r')
+    parts = [create(f'p{i}', meta={'mapId': 'm:1', 'part': i, 'parts': 3}) for i in range(3)]
+
+    assert reduce.transform([parts[2], parts[0]]) == []
+    merged = reduce.transform([parts[1]])
+    assert [m.content for m in merged] == ['p0\n\np1\n\np2']
+    assert reduce.pending == {}
+
+
+def test_reduce_forwards_plain_messages():
+    plain = create('plain')
+    assert ReduceNode('r').transform([plain]) == [plain]
+
+
+# ---- map -> reduce in a team ---------------------------------------------------
+def map_reduce(replicas=2, split='lines'):
+    return team_config(
+        [node('m', 'logic', logicType='map', split=split, replicas=replicas, systemPrompt='M'),
+         node('r', 'logic', logicType='reduce', separator=' | ')],
+        [{'source': 'input-node', 'target': 'm'}, {'source': 'm', 'target': 'r'}, {'source': 'r', 'target': 'output-node'}],
+    )
+
+
+@pytest.mark.parametrize('use_async', [False, True])
+def test_map_reduce_keeps_part_order(fake_agent, monkeypatch, use_async):
+    # 越靠前的分片越慢，完成顺序与分片顺序相反
+    delays = {'one': 0.15, 'two': 0.1, 'three': 0.05, 'four': 0.0}
+    step, astep = fake_agent.step, fake_agent.astep
+
+    def slow_step(self, payload):
+        time.sleep(delays[payload.split()[-1]])
+        return step(self, payload)
+
+    async def slow_astep(self, payload):
+        await asyncio.sleep(delays[payload.split()[-1]])
+        return await astep(self, payload)
+    monkeypatch.setattr(fake_agent, 'step', slow_step)
+    monkeypatch.setattr(fake_agent, 'astep', slow_astep)
+
+    team = SimpleTeam(goal='one\ntwo\nthree\nfour', config=map_reduce())
+    output = asyncio.run(team.arun()) if use_async else team.run()
+
+    assert output == ' | '.join(f'M <- USER: {word}' for word in ('one', 'two', 'three', 'four'))
+    assert len(team.nodes['m'].replicas) == 2
+
+
+def test_map_parts_run_concurrently(fake_agent):
+    fake_agent.latency = 0.2
+    team = SimpleTeam(goal='a\nb\nc\nd', config=map_reduce(replicas=4))
+    started = time.perf_counter()
+    team.run()
+    assert time.perf_counter() - started < 0.6  # 串行需要0.8s
+    assert fake_agent.calls == 4
+
+
+def test_replicas_answer_each_part_from_a_fresh_conversation(fake_agent):
+    team = SimpleTeam(goal='a\nb\nc', config=map_reduce(replicas=1))
+    team.run()
+    assert len(team.nodes['m'].replicas[0].agent.memory) == 2
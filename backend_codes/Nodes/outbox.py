@@ -0,0 +1,101 @@
+from typing import Any, Dict, Hashable, Iterator, List, Tuple
+
+
+class Outbox:
+    """Append-only log of a node's produced messages with per-subscriber cursors.
+
+    Each outgoing edge subscribes once and then ``read``s only the entries it has
+    not seen yet, so every message crosses every edge exactly once. Entries that
+    all subscribers have consumed are dropped. Without subscribers the whole log
+    is kept, which preserves the legacy ``send()`` behaviour (e.g. PCTeam).
+
+    The list-like methods keep existing ``self.processed.append(...)`` code
+    working unchanged. Nested lists are flattened when they are written, so the
+    log only ever holds messages and readers never need to flatten.
+
+    ``read`` returns an immutable tuple; subscribers that read the same range
+    (every outgoing edge of a node after one tick) share one tuple, so a
+    broadcast fans the same message objects out by reference.
+    """
+
+    def __init__(self):
+        self._log: List[Any] = []
+        self._base = 0  # absolute position of self._log[0]
+        self._cursors: Dict[Hashable, int] = {}
+        self._snapshot: Tuple[int, int, Tuple[Any, ...]] | None = None
+
+    # ---- list-like interface -------------------------------------------------
+    def append(self, message: Any) -> None:
+        if isinstance(message, (list, tuple)):
+            self.extend(message)
+        else:
+            self._log.append(message)
+
+    def extend(self, messages) -> None:
+        for message in messages:
+            self.append(message)
+
+    def clear(self) -> None:
+        """Drop every entry; subscribers stay registered at the new end."""
+        self._base += len(self._log)
+        self._log = []
+        self._snapshot = None
+        for key in self._cursors:
+            self._cursors[key] = self._base
+
+    def __len__(self) -> int:
+        return len(self._log)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._log)
+
+    def __getitem__(self, item):
+        return self._log[item]
+
+    def __repr__(self) -> str:
+        return f"Outbox(retained={len(self._log)}, subscribers={len(self._cursors)})"
+
+    # ---- cursors -------------------------------------------------------------
+    @property
+    def end(self) -> int:
+        """Absolute position just past the newest entry."""
+        return self._base + len(self._log)
+
+    def subscribe(self, key: Hashable) -> None:
+        """Register a reader starting at the oldest retained entry."""
+        self._cursors.setdefault(key, self._base)
+
+    def unsubscribe(self, key: Hashable) -> None:
+        self._cursors.pop(key, None)
+        self.compact()
+
+    def pending(self, key: Hashable) -> int:
+        return self.end - self._cursors.get(key, self.end)
+
+    def read(self, key: Hashable, limit: int | None = None) -> Tuple[Any, ...]:
+        """Return the entries ``key`` has not read yet and advance its cursor.
+
+        ``limit`` caps how many entries are taken; the rest stay unread.
+        """
+        start = self._cursors.get(key)
+        if start is None:
+            raise KeyError(f"{key!r} is not subscribed to this outbox")
+        end = self.end if limit is None else min(self.end, start + max(0, limit))
+        if start == end:
+            return ()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot[0] != start or snapshot[1] != end:
+            snapshot = (start, end, tuple(self._log[start - self._base:end - self._base]))
+            self._snapshot = snapshot
+        self._cursors[key] = end
+        self.compact()
+        return snapshot[2]
+
+    def compact(self) -> None:
+        """Drop entries every subscriber has already read."""
+        if not self._cursors:
+            return
+        consumed = min(self._cursors.values()) - self._base
+        if consumed > 0:
+            del self._log[:consumed]
+            self._base += consumed
@@ -6,6 +6,7 @@ import time
 # 把项目根目录加入搜索路径
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from Nodes.base_node import BaseNode
+from telemetry import message_summary
 
 class BaseProcedureNode(BaseNode):
     """Base class for all Procedure Nodes."""
@@ -13,8 +14,6 @@ class BaseProcedureNode(BaseNode):
     def __init__(self, name: str, id = None, emit=None, run_id: str | None = None, team_id: str | None = None):
         super().__init__(name, id, emit=emit, run_id=run_id, team_id=team_id)
         self.type = None # as a marker of LLM node, agent node or logic node
-        self.processed = []
-        self.received = []
         self.resume_info = None
 
 
@@ -24,7 +23,7 @@ class BaseProcedureNode(BaseNode):
        
     def process(self):
         # Only emit processing events when there is actual input
-        if not self.received:
+        if not self.has_work():
             return
         try:
             self.emit({
@@ -36,7 +35,8 @@ class BaseProcedureNode(BaseNode):
             })
         except Exception:
             pass
-        for message in self.received:
+        produced_from = len(self.processed)
+        for message in self.transform(self.received):
             self.processed.append(message)
         try:
             self.emit({
@@ -44,18 +44,23 @@ class BaseProcedureNode(BaseNode):
                 'runId': self.run_id,
                 'teamId': self.team_id,
                 'node': {'id': self.id, 'name': self.name},
-                'messages': [{
-                    'maker': getattr(m, 'maker', None),
-                    'target': getattr(m, 'target_agent', None),
-                    'timetag': getattr(m, 'timetag', None),
-                    'preview': (getattr(m, 'content', '') or '')[:120],
-                    'attachments': getattr(m, 'attachments', []),
-                } for m in self.processed],
-                'meta': {'producedCount': len(self.processed)},
+                'messages': [message_summary(m) for m in self.processed[produced_from:]],
+                'meta': {'producedCount': len(self.processed) - produced_from},
             })
         except Exception:
             pass
 
+    def has_work(self) -> bool:
+        return bool(self.received)
+
+    def transform(self, messages):
+        """Messages to emit for this tick's input (forwarded unchanged by default)."""
+        return messages
+
+    async def aprocess(self):
+        # 纯内存转发，无需切换线程
+        self.process()
+
     def send(self):
         """Send output data or messages."""
         message = self.processed
@@ -1,14 +1,43 @@
+import asyncio
+import hashlib
 import sys
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Tuple
 
 # 把项目根目录加入搜索路径
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from Messages.baseMessage import merge_attachments
 from Messages.simpleMessage import SimpleMessage, SimpleMessageCreator
 from Nodes.base_node import BaseNode
+from telemetry import message_summary
 from camel.agents import ChatAgent
+try:
+    from camel.agents.chat_agent import AsyncStreamingChatAgentResponse, StreamingChatAgentResponse
+except ImportError:  # 旧版本camel没有流式响应
+    StreamingChatAgentResponse = AsyncStreamingChatAgentResponse = ()
+from camel.messages import BaseMessage
+from camel.types import OpenAIBackendRole
 from artifact_manager import register_artifact
+from llm_cache import normalize_cache_mode
+from model_calls import HedgePolicy, ModelRequest, acomplete, complete
+from model_governor import estimate_tokens
+
+BATCH_MODES = ('per_message', 'merged', 'parallel')
+
+# merged 模式下一次合并请求的默认token预算(系统提示词+合并后的输入)
+DEFAULT_BATCH_TOKEN_BUDGET = 8000
+# parallel 模式下同时进行的模型调用上限(模型自身的限流仍由governor负责)
+PARALLEL_WORKERS = 8
+
+
+def normalize_batch_mode(mode: Any) -> str:
+    """Map a config value to one of :data:`BATCH_MODES` (``None`` -> ``per_message``)."""
+    value = str(mode or 'per_message').strip().lower().replace('-', '_')
+    if value not in BATCH_MODES:
+        raise ValueError(f"Unknown batch mode: {mode} (expected one of {', '.join(BATCH_MODES)})")
+    return value
 
 
 
@@ -24,6 +53,12 @@ class AgentNode(BaseNode):
                  emit=None,
                  run_id: str | None = None,
                  team_id: str | None = None,
+                 cache_mode: str = "off",
+                 stream: bool = False,
+                 timeout: float | None = None,
+                 hedge: Any = None,
+                 batch_mode: str = "per_message",
+                 batch_token_budget: int | None = None,
                  ):
         super().__init__(name, id, emit=emit, run_id=run_id, team_id=team_id)
         self.type = "Chat_Agent-Node"
@@ -37,6 +72,22 @@ class AgentNode(BaseNode):
             tools=tools, 
         )
         self.resume_info = agent_resume
+        # 模型调用的身份信息: 工具签名 + 本节点已完成对话的摘要(agent有记忆，同样的payload在不同轮次答案不同)
+        self.tools_signature = ",".join(sorted(self._tool_name(tool) for tool in tools))
+        self.history_digest = ""
+        # 响应缓存: off | read | readwrite (团队配置中的 cache 字段)
+        self.cache_mode = normalize_cache_mode(cache_mode)
+        # 流式输出: 生成过程中逐段发送 node.output.delta 事件
+        self.stream = bool(stream)
+        if self.stream:
+            self._enable_streaming()
+        # 单次模型调用的时间预算(秒)，与团队的 runTimeout 取较早者
+        self.timeout = float(timeout) if timeout else None
+        # 对冲请求: 主请求超过p95延迟仍未返回时再发一次，先返回者胜出
+        self.hedge = HedgePolicy.from_config(hedge)
+        # 同一tick收到多条消息时的处理方式: per_message(逐条) | merged(合并为一次调用) | parallel(在agent副本上并发)
+        self.batch_mode = normalize_batch_mode(batch_mode)
+        self.batch_token_budget = int(batch_token_budget) if batch_token_budget else DEFAULT_BATCH_TOKEN_BUDGET
 
     ARTIFACT_PATTERN = re.compile(r"\[\[artifact:(?P<path>[^|\]]+)(?:\|(?P<name>[^|\]]*))?(?:\|(?P<mime>[^|\]]*))?\]\]")
 
@@ -123,11 +174,249 @@ class AgentNode(BaseNode):
         self.received.extend([input_data] if not isinstance(input_data, list) else input_data)
        
 
-    def process(self):
-        """Process the received data using the LLM."""
+    @staticmethod
+    def _tool_name(tool: Any) -> str:
+        getter = getattr(tool, 'get_function_name', None)
+        if callable(getter):
+            try:
+                return getter()
+            except Exception:
+                pass
+        return getattr(tool, '__name__', type(tool).__name__)
+
+    def _model_request(self, payload: str) -> ModelRequest:
+        return ModelRequest.build(
+            'agent',
+            self.model_name,
+            self.system_prompt,
+            payload,
+            tools=self.tools_signature or None,
+            history=self.history_digest or None,
+        )
+
+    def _advance_history(self, payload: str, response: Any) -> None:
+        digest = hashlib.sha256(f"{self.history_digest}\x00{payload}\x00{response}".encode('utf-8'))
+        self.history_digest = digest.hexdigest()[:16]
+
+    def _remember(self, payload: str, response: Any) -> None:
+        """Write an exchange the agent did not run itself (replay, cache hit) into its memory."""
+        try:
+            self.agent.update_memory(
+                BaseMessage.make_user_message(role_name="user", content=payload),
+                OpenAIBackendRole.USER,
+            )
+            self.agent.update_memory(
+                BaseMessage.make_assistant_message(role_name=self.name, content=str(response)),
+                OpenAIBackendRole.ASSISTANT,
+            )
+        except Exception as e:
+            print(f"⚠️ Node {self.name} failed to update agent memory: {e}")
+
+    def _enable_streaming(self) -> None:
+        """Switch the camel model backend to streaming with incremental chunks."""
+        try:
+            backend = self.agent.model_backend
+            backend.model_config_dict = {**backend.model_config_dict, 'stream': True}
+            self.agent.stream_accumulate = False
+        except Exception as e:
+            # 不支持流式的后端仍可运行，只是整段输出作为一个delta发送
+            print(f"⚠️ Node {self.name} cannot stream from model {self.model_name}: {e}")
+
+    def _stream_chunks(self, chunks, on_delta) -> str:
+        """Forward streamed chunks as deltas and return the full text."""
+        accumulate = getattr(self.agent, 'stream_accumulate', False)
+        text = ""
+        for chunk in chunks:
+            piece = chunk.msgs[0].content if chunk.msgs else ""
+            if not piece:
+                continue
+            delta = piece[len(text):] if accumulate else piece
+            text = piece if accumulate else text + piece
+            on_delta(delta)
+        return text
+
+    async def _astream_chunks(self, chunks, on_delta) -> str:
+        accumulate = getattr(self.agent, 'stream_accumulate', False)
+        text = ""
+        async for chunk in chunks:
+            piece = chunk.msgs[0].content if chunk.msgs else ""
+            if not piece:
+                continue
+            delta = piece[len(text):] if accumulate else piece
+            text = piece if accumulate else text + piece
+            on_delta(delta)
+        return text
+
+    def _step(self, payload: str, on_delta=None, agent=None) -> Any:
+        response = (agent or self.agent).step(payload)
+        if on_delta is None:
+            return response.msgs[0].content
+        if isinstance(response, StreamingChatAgentResponse):
+            return self._stream_chunks(response, on_delta)
+        content = response.msgs[0].content
+        on_delta(content)
+        return content
+
+    async def _astep(self, payload: str, on_delta=None, agent=None) -> Any:
+        response = await (agent or self.agent).astep(payload)
+        if on_delta is None:
+            return response.msgs[0].content
+        if isinstance(response, AsyncStreamingChatAgentResponse):
+            return await self._astream_chunks(response, on_delta)
+        content = response.msgs[0].content
+        on_delta(content)
+        return content
+
+    def _isolated_attempts(self) -> bool:
+        """Attempts that may be abandoned (node timeout) or raced (hedge) run on a copy of the agent.
+
+        The winning exchange is written into the agent's memory afterwards,
+        and streamed output is sent as one delta once a winner is known. The
+        run deadline alone only stops calls from starting, so the agent keeps
+        answering (and streaming) in place.
+        """
+        return self.timeout is not None or self.hedge is not None
+
+    def _call_options(self, deadline) -> Dict[str, Any]:
+        return dict(
+            cache=self.cache_mode,
+            on_cache=self.report_cache_lookup,
+            run_id=self.run_id,
+            on_wait=self.report_model_slot,
+            on_shared=self.report_shared_call,
+            deadline=deadline,
+            hedge=self.hedge,
+            on_hedge=self.report_hedge,
+            hard_deadline=self.timeout is not None,
+        )
+
+    def _call_model(self, payload: str, message_index: int = 0) -> Any:
+        """One completion through the shared model-call layer."""
+        stepped = []
+        on_delta = self.delta_sink(message_index) if self.stream else None
+        deadline = self.model_deadline(self.timeout)
+        isolated = self._isolated_attempts()
+
+        def call():
+            if isolated:
+                return self._step(payload, (lambda _d: None) if self.stream else None, self.agent.clone(with_memory=True))
+            stepped.append(True)
+            return self._step(payload, on_delta)
+
+        response = complete(self._model_request(payload), call, **self._call_options(deadline))
+        if not stepped:
+            self._remember(payload, response)
+            if on_delta is not None:
+                on_delta(str(response))
+        self._advance_history(payload, response)
+        return response
+
+    async def _acall_model(self, payload: str, message_index: int = 0) -> Any:
+        stepped = []
+        on_delta = self.delta_sink(message_index) if self.stream else None
+        deadline = self.model_deadline(self.timeout)
+        isolated = self._isolated_attempts()
+
+        async def call():
+            if isolated:
+                return await self._astep(payload, (lambda _d: None) if self.stream else None, self.agent.clone(with_memory=True))
+            stepped.append(True)
+            return await self._astep(payload, on_delta)
+
+        response = await acomplete(self._model_request(payload), call, **self._call_options(deadline))
+        if not stepped:
+            self._remember(payload, response)
+            if on_delta is not None:
+                on_delta(str(response))
+        self._advance_history(payload, response)
+        return response
+
+    def _call_parallel(self, payloads: List[str]) -> List[Any]:
+        """Answer independent payloads concurrently, each on a copy of the agent.
+
+        Every call sees the conversation as it was before the batch; the
+        exchanges are written into the agent's memory afterwards, in order.
+        A failed call yields ``None``.
+        """
+        deadline = self.model_deadline(self.timeout)
+        requests = [self._model_request(payload) for payload in payloads]
+
+        def call_one(index: int):
+            payload = payloads[index]
+            try:
+                return complete(
+                    requests[index],
+                    lambda: self._step(payload, (lambda _d: None) if self.stream else None, self.agent.clone(with_memory=True)),
+                    **self._call_options(deadline),
+                )
+            except Exception as e:
+                print(f"Node {self.type}-{self.name} with model {self.model_name} processing error: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(len(payloads), PARALLEL_WORKERS), thread_name_prefix=f"agent-{self.id}") as pool:
+            responses = list(pool.map(call_one, range(len(payloads))))
+        self._commit_parallel(payloads, responses)
+        return responses
+
+    async def _acall_parallel(self, payloads: List[str]) -> List[Any]:
+        deadline = self.model_deadline(self.timeout)
+        requests = [self._model_request(payload) for payload in payloads]
+        semaphore = asyncio.Semaphore(PARALLEL_WORKERS)
+
+        async def call_one(index: int):
+            payload = payloads[index]
+            try:
+                async with semaphore:
+                    return await acomplete(
+                        requests[index],
+                        lambda: self._astep(payload, (lambda _d: None) if self.stream else None, self.agent.clone(with_memory=True)),
+                        **self._call_options(deadline),
+                    )
+            except Exception as e:
+                print(f"Node {self.type}-{self.name} with model {self.model_name} processing error: {e}")
+                return None
+
+        responses = await asyncio.gather(*(call_one(index) for index in range(len(payloads))))
+        self._commit_parallel(payloads, responses)
+        return list(responses)
+
+    def _commit_parallel(self, payloads: List[str], responses: List[Any]) -> None:
+        for index, (payload, response) in enumerate(zip(payloads, responses)):
+            if response is None:
+                continue
+            self._remember(payload, response)
+            self._advance_history(payload, response)
+            if self.stream:
+                self.delta_sink(index)(str(response))
+
+    def _batches(self, messages) -> List[list]:
+        """Group messages for merged mode so that no merged prompt exceeds ``batch_token_budget``.
+
+        A single message larger than the budget still forms its own batch.
+        """
+        base = estimate_tokens(self.system_prompt)
+        batches, current, tokens = [], [], base
+        for message in messages:
+            cost = estimate_tokens(self._build_payload(message))
+            if current and tokens + cost > self.batch_token_budget:
+                batches.append(current)
+                current, tokens = [], base
+            current.append(message)
+            tokens += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _merged_payload(self, batch) -> str:
+        if len(batch) == 1:
+            return self._build_payload(batch[0])
+        text = "\n\n".join(f"[Message {index}]\n{self.parse_received(message)}" for index, message in enumerate(batch, 1))
+        return self._compose_prompt(text, merge_attachments(batch))
+
+    def _start_processing(self) -> bool:
         if not self.received:
             print(f"{self.name} has no data to process.")
-            return
+            return False
 
         # Emit start once per processing call when there is input
         try:
@@ -136,33 +425,36 @@ class AgentNode(BaseNode):
                 'runId': self.run_id,
                 'teamId': self.team_id,
                 'node': {'id': self.id, 'name': self.name},
-                'meta': {'receivedCount': len(self.received)},
+                'meta': {'receivedCount': len(self.received), 'batchMode': self.batch_mode},
             })
         except Exception:
             pass
+        self._produced_from = len(self.processed)
+        return True
 
-        for message in self.received:
-            attachments = getattr(message, 'attachments', []) if hasattr(message, 'attachments') else []
-            data = self.parse_received(message)
-            payload = self._compose_prompt(data, attachments)
-            try:
-                print(f"[ATTENTION!]Node {self.type}-{self.name} with model {self.model_name} processing data: \n{payload}")
-                processed_data = self.agent.step(payload).msgs[0].content
-            except Exception as e:
-                print(f"Node {self.type}-{self.name} with model {self.model_name} processing error: {e}")
-                processed_data = None
-            processed_text = self.parse_processed(processed_data)
-            processed_text, generated_attachments = self._extract_artifacts_from_output(processed_text)
-            processed_data = SimpleMessageCreator().create_message(
-                content=processed_text,
-                maker=self.name,
-                target_agent='stage_manager',
-                attachments=generated_attachments if generated_attachments else None,
-            )
-            self.processed.append(processed_data)
-            print(f"[SUCCESS!]Node {self.type}-{self.name} with model {self.model_name} finished processing data.")
-            print(f"Processed data: \n{processed_data.content}")
+    def _build_payload(self, message) -> str:
+        attachments = getattr(message, 'attachments', []) if hasattr(message, 'attachments') else []
+        data = self.parse_received(message)
+        return self._compose_prompt(data, attachments)
+
+    def _output_message(self, processed_data, meta=None) -> SimpleMessage:
+        processed_text = self.parse_processed(processed_data)
+        processed_text, generated_attachments = self._extract_artifacts_from_output(processed_text)
+        return SimpleMessageCreator().create_message(
+            content=processed_text,
+            maker=self.name,
+            target_agent='stage_manager',
+            attachments=generated_attachments if generated_attachments else None,
+            meta=meta,
+        )
+
+    def _record_output(self, processed_data) -> None:
+        processed_data = self._output_message(processed_data)
+        self.processed.append(processed_data)
+        print(f"[SUCCESS!]Node {self.type}-{self.name} with model {self.model_name} finished processing data.")
+        print(f"Processed data: \n{processed_data.content}")
 
+    def _finish_processing(self) -> None:
         # Emit finished once after completing processing of all inputs
         try:
             self.emit({
@@ -170,18 +462,62 @@ class AgentNode(BaseNode):
                 'runId': self.run_id,
                 'teamId': self.team_id,
                 'node': {'id': self.id, 'name': self.name},
-                'messages': [{
-                    'maker': getattr(m, 'maker', None),
-                    'target': getattr(m, 'target_agent', None),
-                    'timetag': getattr(m, 'timetag', None),
-                    'preview': (getattr(m, 'content', '') or '')[:120],
-                    'attachments': getattr(m, 'attachments', []),
-                } for m in self.processed[-len(self.received):] if self.received],
-                'meta': {'producedCount': len(self.processed)},
+                'messages': [message_summary(m) for m in self.processed[self._produced_from:]],
+                'meta': {'producedCount': len(self.processed) - self._produced_from},
             })
         except Exception:
             pass
 
+    def process(self):
+        """Process the received data using the LLM."""
+        if not self._start_processing():
+            return
+
+        if self.batch_mode == 'parallel' and len(self.received) > 1:
+            payloads = [self._build_payload(message) for message in self.received]
+            for processed_data in self._call_parallel(payloads):
+                self._record_output(processed_data)
+            self._finish_processing()
+            return
+
+        batches = self._batches(self.received) if self.batch_mode == 'merged' else [[m] for m in self.received]
+        for index, batch in enumerate(batches):
+            payload = self._merged_payload(batch)
+            try:
+                print(f"[ATTENTION!]Node {self.type}-{self.name} with model {self.model_name} processing data: \n{payload}")
+                processed_data = self._call_model(payload, index)
+            except Exception as e:
+                print(f"Node {self.type}-{self.name} with model {self.model_name} processing error: {e}")
+                processed_data = None
+            self._record_output(processed_data)
+
+        self._finish_processing()
+
+    async def aprocess(self):
+        """Async variant of :meth:`process` built on ``ChatAgent.astep``."""
+        if not self._start_processing():
+            return
+
+        if self.batch_mode == 'parallel' and len(self.received) > 1:
+            payloads = [self._build_payload(message) for message in self.received]
+            for processed_data in await self._acall_parallel(payloads):
+                self._record_output(processed_data)
+            self._finish_processing()
+            return
+
+        batches = self._batches(self.received) if self.batch_mode == 'merged' else [[m] for m in self.received]
+        for index, batch in enumerate(batches):
+            payload = self._merged_payload(batch)
+            try:
+                print(f"[ATTENTION!]Node {self.type}-{self.name} with model {self.model_name} processing data: \n{payload}")
+                processed_data = await self._acall_model(payload, index)
+            except Exception as e:
+                print(f"Node {self.type}-{self.name} with model {self.model_name} processing error: {e}")
+                processed_data = None
+            self._record_output(processed_data)
+
+        self._finish_processing()
+
 
     def show(self):
         """Display or visualize the node's state."""
@@ -192,8 +528,10 @@ class AgentNode(BaseNode):
         print(f"Processed Data: {self.processed}")
 
     def reset(self,):
-        """Reset the node's state."""
+        """Reset the node's state, including the agent's conversation memory."""
         super().reset()
+        self.reset_agent()
+        self.history_digest = ""
        
     def reset_agent(self,):
         """Reset the agent state, but keep the history."""
@@ -7,21 +7,41 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from Messages.simpleMessage import SimpleMessage, SimpleMessageCreator
 from Nodes.base_node import BaseNode
 import openai
+from llm_cache import normalize_cache_mode
+from model_calls import ModelRequest, acomplete, complete
 
 
+_async_client = None
+
+
+def get_async_client() -> "openai.AsyncOpenAI":
+    """Shared ``AsyncOpenAI`` client, created lazily on first use."""
+    global _async_client
+    if _async_client is None:
+        _async_client = openai.AsyncOpenAI()
+    return _async_client
+
 
 class LLMNode(BaseNode):
     """A Node that utilizes a Large Language Model (LLM) for processing."""
 
-    def __init__(self, name: str, model_name: str = "gpt-4o-mini", system_prompt: str = "You are a helpful assistant."):
+    def __init__(self, name: str, model_name: str = "gpt-4o-mini", system_prompt: str = "You are a helpful assistant.", stream: bool = False, cache_mode: str = "off"):
         super().__init__(name)
         self.type = "LLM-Node"
         self.model_name = model_name  #
         self.system_prompt = system_prompt
+        # 流式输出: 生成过程中逐段发送 node.output.delta 事件
+        self.stream = stream
+        # 响应缓存: off / read / readwrite; LLM节点不带对话状态，相同输入可直接复用
+        self.cache_mode = normalize_cache_mode(cache_mode)
 
 
     def parse_received(self, data: SimpleMessage, pattern = None):
-        # Remained to be solved!
+        # 发给模型(以及缓存/录制键)的是消息文本，而不是消息对象本身
+        if isinstance(data, SimpleMessage):
+            return str(data.content or '')
+        if isinstance(data, list):
+            return "\n".join(self.parse_received(message) for message in data)
         return data
 
 
@@ -34,33 +54,127 @@ class LLMNode(BaseNode):
 
 
     
+    def _build_messages(self, data):
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": data}
+        ]
+
+    def _create(self, data, on_delta=None) -> str:
+        if on_delta is None:
+            return openai.chat.completions.create(
+                model=self.model_name,
+                messages=self._build_messages(data),
+            ).choices[0].message.content.strip()
+
+        text = ""
+        for chunk in openai.chat.completions.create(
+            model=self.model_name,
+            messages=self._build_messages(data),
+            stream=True,
+        ):
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                text += delta
+                on_delta(delta)
+        return text.strip()
+
+    async def _acreate(self, data, on_delta=None) -> str:
+        if on_delta is None:
+            response = await get_async_client().chat.completions.create(
+                model=self.model_name,
+                messages=self._build_messages(data),
+            )
+            return response.choices[0].message.content.strip()
+
+        text = ""
+        async for chunk in await get_async_client().chat.completions.create(
+            model=self.model_name,
+            messages=self._build_messages(data),
+            stream=True,
+        ):
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                text += delta
+                on_delta(delta)
+        return text.strip()
+
+    def _record_output(self, processed_data):
+        print(f"Raw processed data: {processed_data}")
+
+        processed_data = self.parse_processed(processed_data)
+
+        processed_data = SimpleMessageCreator().create_message(content=processed_data, maker=self.name)
+        self.processed.append(processed_data)
+        print(f"{self.name} processed data: {processed_data}")
+
     def process(self):
         """Process the received data using the LLM."""
         if not self.received:
             print(f"{self.name} has no data to process.")
             return
         
-        for data in self.received:
+        for index, data in enumerate(self.received):
             data = self.parse_received(data)
+            on_delta = self.delta_sink(index) if self.stream else None
+            called = []
+
+            def call(data=data, on_delta=on_delta):
+                called.append(True)
+                return self._create(data, on_delta)
+
             try:
-                processed_data = openai.chat.completions.create(
-                    model=self.model_name,
-                    messages=[
-                        {"role": "system", "content": self.system_prompt},
-                        {"role": "user", "content": data}
-                    ]
-                ).choices[0].message.content.strip()
+                processed_data = complete(
+                    ModelRequest.build('llm', self.model_name, self.system_prompt, data),
+                    call,
+                    cache=self.cache_mode,
+                    on_cache=self.report_cache_lookup,
+                    run_id=self.run_id,
+                    on_wait=self.report_model_slot,
+                    on_shared=self.report_shared_call,
+                    deadline=self.model_deadline(),
+                )
+                # 缓存/回放命中时没有流，整段作为一个delta
+                if on_delta is not None and not called:
+                    on_delta(str(processed_data))
 
             except Exception as e:
                 print(f"Node {self.type}-{self.name} with model {self.model_name} processing error: {e}")
                 processed_data = None
-            print(f"Raw processed data: {processed_data}")
+            self._record_output(processed_data)
+
+    async def aprocess(self):
+        """Async variant of :meth:`process` using the shared ``AsyncOpenAI`` client."""
+        if not self.received:
+            print(f"{self.name} has no data to process.")
+            return
+
+        for index, data in enumerate(self.received):
+            data = self.parse_received(data)
+            on_delta = self.delta_sink(index) if self.stream else None
+            called = []
 
-            processed_data = self.parse_processed(processed_data)
+            async def call(data=data, on_delta=on_delta):
+                called.append(True)
+                return await self._acreate(data, on_delta)
 
-            processed_data = SimpleMessageCreator().create_message(content=processed_data, maker=self.name)
-            self.processed.append(processed_data)
-            print(f"{self.name} processed data: {processed_data}")
+            try:
+                processed_data = await acomplete(
+                    ModelRequest.build('llm', self.model_name, self.system_prompt, data),
+                    call,
+                    cache=self.cache_mode,
+                    on_cache=self.report_cache_lookup,
+                    run_id=self.run_id,
+                    on_wait=self.report_model_slot,
+                    on_shared=self.report_shared_call,
+                    deadline=self.model_deadline(),
+                )
+                if on_delta is not None and not called:
+                    on_delta(str(processed_data))
+            except Exception as e:
+                print(f"Node {self.type}-{self.name} with model {self.model_name} processing error: {e}")
+                processed_data = None
+            self._record_output(processed_data)
 
     def show(self): 
         """Display or visualize the node's state."""
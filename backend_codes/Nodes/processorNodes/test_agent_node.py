@@ -0,0 +1,195 @@
+import asyncio
+import sys
+import os
+import time
+
+import pytest
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import Nodes.processorNodes.agent_node as agent_node
+from Edges.test_baseEdge import message
+from Messages.simpleMessage import SimpleMessageCreator
+from Nodes.processorNodes.test_node_streaming import deltas
+from Teams.simpleTeam import SimpleTeam
+from Teams.test_simpleTeam import node, team_config
+from conftest import _Response
+
+
+class Stream(list):
+    pass
+
+
+def answer(system_prompt, msg):
+    """What :class:`conftest.FakeChatAgent` replies to ``msg``."""
+    return f"{system_prompt} <- {msg.to_str().splitlines()[0]}"
+
+
+@pytest.fixture
+def streaming(monkeypatch):
+    monkeypatch.setattr(agent_node, 'StreamingChatAgentResponse', Stream)
+
+
+def chunked(agent):
+    """Make ``agent`` stream ``Hel`` + ``lo`` and remember the exchange like a real ChatAgent."""
+    def step(payload):
+        agent.memory.extend([('user', payload), ('assistant', 'Hello')])
+        return Stream([_Response('Hel'), _Response('lo')])
+    agent.step = step
+
+
+# ---- deadlines & hedging -------------------------------------------------------
+def test_run_deadline_keeps_the_call_in_place(fake_agent, streaming):
+    events, msg = [], message('hi')
+    node = agent_node.AgentNode('writer', stream=True, emit=events.append)
+    node.run_deadline = time.monotonic() + 60
+    chunked(node.agent)
+    node.receive(msg)
+    node.process()
+
+    assert not node._isolated_attempts()
+    assert deltas(events) == [('writer', 'Hel', 0), ('writer', 'lo', 1)]
+    assert len(node.agent.memory) == 2
+
+
+def test_node_timeout_runs_on_a_copy_and_remembers_the_winner(fake_agent):
+    events, msg = [], message('hi')
+    node = agent_node.AgentNode('writer', system_prompt='W', stream=True, timeout=5, emit=events.append)
+    node.receive(msg)
+    node.process()
+
+    assert node._isolated_attempts()
+    # 副本上的尝试不流式输出，胜出的回复整段作为一个delta
+    assert deltas(events) == [('writer', answer('W', msg), 0)]
+    assert [role for role, _ in node.agent.memory] == ['user', 'assistant']
+
+
+def test_node_timeout_gives_up_on_a_straggler(fake_agent):
+    fake_agent.latency = 0.5
+    msg = message('hi')
+    node = agent_node.AgentNode('writer', timeout=0.05)
+    node.receive(msg)
+    started = time.monotonic()
+    node.process()
+
+    assert time.monotonic() - started < 0.4
+    assert not node.processed[-1].content
+    assert node.agent.memory == []
+
+
+def test_hedged_agent_keeps_one_exchange(fake_agent):
+    reports, msg = [], message('hi')
+    node = agent_node.AgentNode('writer', system_prompt='W', hedge=0.05, emit=reports.append)
+    original = node.agent.clone
+    clones = []
+
+    def clone(with_memory=False):
+        copy = original(with_memory)
+        clones.append(copy)
+        if len(clones) == 1:  # 主请求很慢
+            slow_step = copy.step
+            copy.step = lambda payload: (time.sleep(0.5), slow_step(payload))[1]
+        return copy
+    node.agent.clone = clone
+    node.receive(msg)
+    node.process()
+
+    assert node.processed[-1].content == answer('W', msg)
+    assert len(clones) == 2
+    assert [e['meta']['won'] for e in reports if e['type'] == 'llm.hedge'] == [True]
+    assert len(node.agent.memory) == 2
+
+
+# ---- batch modes ---------------------------------------------------------------
+def upload(file_id):
+    return {'fileId': file_id, 'displayName': 'notes.txt', 'storagePath': f'/uploads/{file_id}/notes.txt'}
+
+
+def with_files(content, *files):
+    return SimpleMessageCreator().create_message(content=content, maker='tester', attachments=list(files))
+
+
+def batched(batch_mode, **kwargs):
+    return agent_node.AgentNode('writer', system_prompt='W', batch_mode=batch_mode, **kwargs)
+
+
+def test_merged_mode_sends_one_prompt_with_every_attachment(fake_agent):
+    node = batched('merged')
+    node.receive([with_files('one', upload('f1')), with_files('two', upload('f2'), upload('f1'))])
+    node.process()
+
+    [payload] = fake_agent.payloads
+    assert '[Message 1]' in payload and '[Message 2]' in payload
+    # 同名但不同的上传文件都保留，重复的只列一次
+    assert payload.count('id=f1') == 1 and payload.count('id=f2') == 1
+    assert [m.content for m in node.processed] == ['W <- [Message 1]']
+
+
+def test_merged_mode_splits_batches_on_the_token_budget(fake_agent):
+    messages = [message('x' * 200) for _ in range(5)]
+    node = batched('merged')
+    per_message = agent_node.estimate_tokens(node._build_payload(messages[0]))
+    node.batch_token_budget = agent_node.estimate_tokens(node.system_prompt) + 2 * per_message
+
+    assert [len(batch) for batch in node._batches(messages)] == [2, 2, 1]
+    node.receive(messages)
+    node.process()
+    assert fake_agent.calls == 3 and len(node.processed) == 3
+
+
+def test_oversized_message_forms_its_own_batch(fake_agent):
+    node = batched('merged', batch_token_budget=10)
+    messages = [message('small'), message('y' * 400), message('small')]
+    assert [len(batch) for batch in node._batches(messages)] == [1, 1, 1]
+
+
+@pytest.mark.parametrize('use_async', [False, True])
+def test_parallel_mode_commits_in_input_order(fake_agent, monkeypatch, use_async):
+    # 越靠前的消息越慢，完成顺序与输入顺序相反
+    delays = {'m0': 0.15, 'm1': 0.1, 'm2': 0.05}
+    step, astep = fake_agent.step, fake_agent.astep
+
+    def slow_step(self, payload):
+        time.sleep(delays[payload.split()[-1]])
+        return step(self, payload)
+
+    async def slow_astep(self, payload):
+        await asyncio.sleep(delays[payload.split()[-1]])
+        return await astep(self, payload)
+    monkeypatch.setattr(fake_agent, 'step', slow_step)
+    monkeypatch.setattr(fake_agent, 'astep', slow_astep)
+
+    messages = [message(f'm{i}') for i in range(3)]
+    node = batched('parallel')
+    node.receive(messages)
+    started = time.perf_counter()
+    asyncio.run(node.aprocess()) if use_async else node.process()
+
+    assert time.perf_counter() - started < 0.3  # 串行需要0.3s
+    assert [m.content for m in node.processed] == [answer('W', m) for m in messages]
+    assert [text for role, text in node.agent.memory if role == 'assistant'] == [answer('W', m) for m in messages]
+
+
+def test_parallel_mode_skips_failed_calls_in_memory(fake_agent):
+    fake_agent.fail_on = 'm1'
+    messages = [message(f'm{i}') for i in range(3)]
+    node = batched('parallel')
+    node.receive(messages)
+    node.process()
+
+    assert [m.content for m in node.processed] == [answer('W', messages[0]), '', answer('W', messages[2])]
+    assert len(node.agent.memory) == 4
+
+
+def test_batch_mode_is_read_from_the_team_config(fake_agent):
+    nodes = [node(f'a{i}', systemPrompt=f'A{i}') for i in range(3)]
+    nodes.append(node('w', systemPrompt='W', batchMode='merged', batchTokenBudget=4000))
+    edges = [{'source': 'input-node', 'target': f'a{i}'} for i in range(3)]
+    edges += [{'source': f'a{i}', 'target': 'w'} for i in range(3)] + [{'source': 'w', 'target': 'output-node'}]
+    team = SimpleTeam(goal='hello', config=team_config(nodes, edges))
+    team.run()
+
+    writer = team.nodes['w']
+    assert (writer.batch_mode, writer.batch_token_budget) == ('merged', 4000)
+    assert [m.content for m in team.nodes['output-node'].received] == ['W <- [Message 1]']
@@ -0,0 +1,84 @@
+import queue
+import sys
+import os
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import Nodes.processorNodes.agent_node as agent_node
+from Nodes.processorNodes.llm_node import LLMNode
+from Teams.simpleTeam import SimpleTeam
+from Teams.test_simpleTeam import fan_out
+from conftest import _Response
+from telemetry import QueueEmitter
+
+
+def deltas(events):
+    return [(e['node']['name'], e['delta'], e['meta']['seq']) for e in events if e['type'] == 'node.output.delta']
+
+
+def chunked_create(self, data, on_delta=None):
+    for piece in ('Hel', 'lo'):
+        if on_delta is not None:
+            on_delta(piece)
+    return 'Hello'
+
+
+def test_llm_node_streams_chunks_as_they_arrive(monkeypatch):
+    monkeypatch.setattr(LLMNode, '_create', chunked_create)
+    events = []
+    node = LLMNode('llm', stream=True)
+    node.bind_run(events.append, 'run')
+    node.receive('hi')
+    node.process()
+
+    assert deltas(events) == [('llm', 'Hel', 0), ('llm', 'lo', 1)]
+    assert node.processed[-1].content == 'Hello'
+
+
+def test_cached_answer_is_streamed_as_one_delta(monkeypatch):
+    monkeypatch.setattr(LLMNode, '_create', chunked_create)
+    for _ in range(2):
+        events = []
+        node = LLMNode('llm', stream=True, cache_mode='readwrite')
+        node.bind_run(events.append, 'run')
+        node.receive('hi')
+        node.process()
+
+    assert deltas(events) == [('llm', 'Hello', 0)]
+
+
+def test_non_streaming_node_emits_no_deltas(monkeypatch):
+    monkeypatch.setattr(LLMNode, '_create', chunked_create)
+    events = []
+    node = LLMNode('llm')
+    node.bind_run(events.append, 'run')
+    node.receive('hi')
+    node.process()
+    assert deltas(events) == []
+
+
+def test_agent_deltas_reach_the_run_queue(fake_agent):
+    events = queue.Queue()
+    SimpleTeam(goal='hello', config=fan_out(1, stream=True), emit=QueueEmitter(events)).run()
+
+    emitted = list(events.queue)
+    assert deltas(emitted) == [('A0', 'A0 <- USER: hello', 0)]
+    # 增量先于完成事件到达
+    types = [e['type'] for e in emitted if (e.get('node') or {}).get('id') == 'a0']
+    assert types.index('node.output.delta') < types.index('node.processing.finished')
+
+
+def test_agent_forwards_streamed_chunks(fake_agent, monkeypatch):
+    class Stream(list):
+        pass
+
+    monkeypatch.setattr(agent_node, 'StreamingChatAgentResponse', Stream)
+    events = []
+    node = agent_node.AgentNode('writer', stream=True, emit=events.append)
+    node.agent.step = lambda payload: Stream([_Response('Hel'), _Response('lo')])
+    node.receive('hi')
+    node.process()
+
+    assert deltas(events) == [('writer', 'Hel', 0), ('writer', 'lo', 1)]
+    assert node.processed[-1].content == 'Hello'
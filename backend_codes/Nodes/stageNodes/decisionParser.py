@@ -0,0 +1,72 @@
+import sys
+import os
+from typing import Any, Dict
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from utils import extract_json
+
+# 决策中必须是字符串的字段；detailed_message 可以缺省
+REQUIRED_TEXT_FIELDS = ('next_step', 'next_agent')
+OPTIONAL_TEXT_FIELDS = ('detailed_message',)
+BOOLEAN_FIELDS = ('done', 'out_of_league')
+
+
+class DecisionParseError(ValueError):
+    """The stage manager's reply is not a valid decision."""
+
+    def __init__(self, reason: str, raw: Any = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.raw = raw
+
+
+def _as_bool(name: str, value: Any, raw: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+        return value.strip().lower() == 'true'
+    raise DecisionParseError(f"'{name}' must be true or false, got {value!r}", raw)
+
+
+def parse_decision(output: Any) -> Dict[str, Any]:
+    """Parse and validate a stage manager decision.
+
+    Accepts a dict or the raw reply text (plain, fenced or embedded JSON).
+    Returns the decision with ``done``/``out_of_league`` as bools and
+    ``detailed_message`` defaulting to ``""``; raises DecisionParseError.
+    """
+    if isinstance(output, dict):
+        decision = dict(output)
+    else:
+        try:
+            decision = extract_json(str(output))
+        except ValueError as e:
+            raise DecisionParseError(f"reply is not valid JSON ({e})", output) from None
+    if not isinstance(decision, dict):
+        raise DecisionParseError(f"expected a JSON object, got {type(decision).__name__}", output)
+
+    missing = [name for name in REQUIRED_TEXT_FIELDS if decision.get(name) in (None, '')]
+    if missing:
+        raise DecisionParseError(f"missing required field(s): {', '.join(missing)}", output)
+    for name in REQUIRED_TEXT_FIELDS + OPTIONAL_TEXT_FIELDS:
+        value = decision.get(name)
+        if value is None:
+            decision[name] = ""
+        elif isinstance(value, (dict, list)):
+            raise DecisionParseError(f"'{name}' must be a string, got {type(value).__name__}", output)
+        else:
+            decision[name] = str(value)
+    for name in BOOLEAN_FIELDS:
+        decision[name] = _as_bool(name, decision.get(name, False), output)
+    return decision
+
+
+def repair_prompt(error: DecisionParseError) -> str:
+    """Follow-up message asking the manager to resend a valid decision."""
+    return (
+        f"Your previous reply could not be used: {error.reason}.\n"
+        "Reply again with only the JSON object described in the Output Format "
+        "(fields: done, final_answer, out_of_league, global_plans, next_agent, next_step, detailed_message), "
+        "with no text or markdown around it."
+    )
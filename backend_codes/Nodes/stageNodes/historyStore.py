@@ -0,0 +1,97 @@
+import sys
+import os
+from collections import deque
+from typing import Callable, Iterator, List, Optional
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from model_governor import estimate_tokens
+
+EMPTY_HISTORY = "This is the first round of the task, no history yet.\n" + '-'*10
+
+
+class HistoryStore:
+    """Bounded, incrementally rendered history of a stage manager.
+
+    Every entry is rendered once when it is appended. Only the most recent
+    entries are kept, limited by ``window`` (entry count) and/or
+    ``token_budget`` (estimated tokens of the rendered entries). Entries that
+    fall out are folded into a rolling summary by ``summarizer(summary,
+    evicted_entries) -> str`` if one is given, otherwise they are only counted.
+    Rounds keep their original numbers after older ones are dropped.
+    """
+
+    def __init__(self,
+                 window: Optional[int] = None,
+                 token_budget: Optional[int] = None,
+                 summarizer: Optional[Callable[[str, List[str]], str]] = None):
+        self.window = int(window) if window else None
+        self.token_budget = int(token_budget) if token_budget else None
+        self.summarizer = summarizer
+        self.summary = ""
+        self.dropped = 0
+        self._entries = deque()   # (raw entry, rendered entry, tokens)
+        self._tokens = 0
+        self._rendered = None
+
+    def append(self, entry: str) -> None:
+        round_no = self.dropped + len(self._entries) + 1
+        rendered = f"At Round {round_no}: \n {entry}" + '-'*10
+        tokens = estimate_tokens(rendered)
+        self._entries.append((entry, rendered, tokens))
+        self._tokens += tokens
+        self._trim()
+        self._rendered = None
+
+    def _over_limit(self) -> bool:
+        if self.window is not None and len(self._entries) > self.window:
+            return True
+        # 至少保留最近一条，否则预算过小时历史会整个消失
+        return self.token_budget is not None and self._tokens > self.token_budget and len(self._entries) > 1
+
+    def _trim(self) -> None:
+        evicted = []
+        while self._over_limit():
+            entry, _, tokens = self._entries.popleft()
+            self._tokens -= tokens
+            evicted.append(entry)
+        if not evicted:
+            return
+        self.dropped += len(evicted)
+        if self.summarizer is not None:
+            try:
+                self.summary = self.summarizer(self.summary, evicted)
+            except Exception as e:
+                print(f"⚠️ History summarization failed, dropping {len(evicted)} rounds: {e}")
+
+    def render(self) -> str:
+        """The history text for the prompt (cached until the next append)."""
+        if self._rendered is None:
+            if not self._entries and not self.dropped:
+                self._rendered = EMPTY_HISTORY
+            else:
+                if self.summary:
+                    head = f"Summary of Rounds 1-{self.dropped}: \n {self.summary}\n" + '-'*10
+                elif self.dropped:
+                    head = f"({self.dropped} earlier rounds omitted)\n" + '-'*10
+                else:
+                    head = ""
+                self._rendered = head + ''.join(rendered for _, rendered, _ in self._entries)
+        return self._rendered
+
+    @property
+    def tokens(self) -> int:
+        return self._tokens
+
+    def clear(self) -> None:
+        self.summary = ""
+        self.dropped = 0
+        self._entries.clear()
+        self._tokens = 0
+        self._rendered = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return (entry for entry, _, _ in self._entries)
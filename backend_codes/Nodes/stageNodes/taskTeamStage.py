@@ -3,11 +3,16 @@ import os
 import re
 from typing import Any, Dict, List
 from camel.agents import ChatAgent
+from camel.messages import BaseMessage
+from camel.types import OpenAIBackendRole
 # 把项目根目录加入搜索路径
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from Nodes.base_node import BaseNode
+from Nodes.stageNodes.historyStore import HistoryStore
+from Nodes.stageNodes.decisionParser import DecisionParseError, parse_decision, repair_prompt
 from Messages.simpleMessage import SimpleMessageCreator
-from utils import load_prompt_from_template, parse_json_from_str, raw_LLM_response
+from utils import load_prompt_from_template, raw_LLM_response
+from model_calls import ModelRequest, complete
 import openai
 
 class StageManagerNode(BaseNode):
@@ -26,7 +31,11 @@ class StageManagerNode(BaseNode):
                 use_chat_agent: bool = True, 
                 system_prompt_path = None, 
                 model_info = None, 
-                version = "searchqa_v1"
+                version = "searchqa_v1",
+                history_window: int | None = None,
+                history_token_budget: int | None = None,
+                summarize_history: bool = False,
+                max_decision_retries: int = 1,
                  ):
         super().__init__(name)
         self.type = "Stage-Manager-Node"
@@ -36,15 +45,18 @@ class StageManagerNode(BaseNode):
         self.system_prompt_path = system_prompt_path if system_prompt_path else \
             f"Nodes/stageNodes/templates/{self.version}/stage_manager_system.md"
         self.model_info = model_info if model_info else ('openai', 'gpt-4o')
+        # 渲染后的系统提示词(含团队目标与成员信息)，同时作为模型调用的身份信息
+        self.system_prompt = load_prompt_from_template(
+            template_path=self.system_prompt_path,
+            params={
+                'team_goal': team_goal,
+                'team_info': team_member_info,
+            },
+            memoize=True,
+        )
         self.agent = ChatAgent(
             model= self.model_info,
-            system_message=load_prompt_from_template(
-                template_path=self.system_prompt_path,
-                params={
-                    'team_goal': team_goal,
-                    'team_info': team_member_info,
-                }
-            ),
+            system_message=self.system_prompt,
             tools=[] 
         )
      
@@ -54,7 +66,15 @@ class StageManagerNode(BaseNode):
         self.todo_list = []
         self.current_stage = 0
         
-        self.history = []
+        # 历史只保留最近的轮次(条数窗口/token预算)，更早的轮次可滚动摘要
+        self.history = HistoryStore(
+            window=history_window,
+            token_budget=history_token_budget,
+            summarizer=self._summarize_history if summarize_history else None,
+        )
+
+        # 决策无法解析时最多重新询问的次数
+        self.max_decision_retries = max(0, int(max_decision_retries))
 
         self.started = False
         self.goal_achieved = False
@@ -79,13 +99,26 @@ class StageManagerNode(BaseNode):
 
      
     def parse_history(self):
-        if not self.history or len(self.history) == 0:
-            return "This is the first round of the task, no history yet.\n" + '-'*10
-        history_str = ""
-        for id, entry in enumerate(self.history):
-            history_str += f"At Round {id+1}: \n {entry}" + '-'*10
+        return self.history.render()
 
-        return history_str
+    def _summarize_history(self, summary: str, rounds: List[str]) -> str:
+        """Fold rounds that fell out of the history window into the rolling summary."""
+        prompt = load_prompt_from_template(
+            template_path="Nodes/stageNodes/templates/default/stage_manager_history_summary.md",
+            params={
+                'summary': summary or "(empty)",
+                'rounds': '\n'.join(rounds),
+            }
+        )
+        return raw_LLM_response(
+            prompt=prompt,
+            model=self.model_info[1],
+            temperature=0.2,
+            max_tokens=600,
+            run_id=self.run_id,
+            on_wait=self.report_model_slot,
+            deadline=self.model_deadline(),
+        )
 
 
     def send(self):
@@ -117,28 +150,8 @@ class StageManagerNode(BaseNode):
                 'message': recieved_content,
             }
         )
-        if self.use_chat_agent: 
-            manager_decision = self.agent.step(input_msg).msgs[0].content
-        else:
-            manager_decision = raw_LLM_response(
-                prompt = input_msg,
-                model = self.model_info[1],
-                temperature=0.2,
-                max_tokens=1000,
-                system_message=load_prompt_from_template(
-                    template_path=self.system_prompt_path,
-                    params={
-                        'team_goal': self.team_goal,
-                        'team_info': self.team_member_info,
-                    }
-                )
-            )
-        try:
-            parsed_decision = self.parse_processed(manager_decision)
-        except Exception as e:
-            print(f"\033[31m❌ Error parsing manager decision: {e}. Decision content: {manager_decision} \033[0m")  # red
-            print(f"type of decision: {type(manager_decision)}")
-            exit()
+        parsed_decision = self._decide(input_msg)
+        if parsed_decision is None:
             return
         # self.todo_list = parsed_decision.get('global_plans', self.todo_list)
         
@@ -168,10 +181,85 @@ class StageManagerNode(BaseNode):
         self.processed.append(manager_decision_msg)
         self.started = True
 
+    def _ask_manager(self, message: str, previous_reply: str | None = None) -> str:
+        """One manager LLM call; ``previous_reply`` marks a repair request."""
+        if self.use_chat_agent: 
+            # 检索prompt中已包含完整history，因此请求本身就能区分不同轮次
+            stepped = []
+
+            def call():
+                stepped.append(True)
+                return self.agent.step(message).msgs[0].content
+
+            response = complete(
+                ModelRequest.build('stage_manager', self.model_info[1], self.system_prompt, message, previous=previous_reply),
+                call,
+                run_id=self.run_id,
+                on_wait=self.report_model_slot,
+                on_shared=self.report_shared_call,
+                deadline=self.model_deadline(),
+            )
+            # 共享了其他调用的回复(single-flight/回放)时，agent自己没有这轮对话
+            if not stepped:
+                self._remember(message, response)
+            return response
+        else:
+            return raw_LLM_response(
+                prompt = message,
+                model = self.model_info[1],
+                temperature=0.2,
+                max_tokens=1000,
+                system_message=self.system_prompt,
+                run_id=self.run_id,
+                on_wait=self.report_model_slot,
+                deadline=self.model_deadline(),
+            )
+
+    def _remember(self, message: str, response: Any) -> None:
+        """Write an exchange the agent did not run itself into its memory."""
+        try:
+            self.agent.update_memory(
+                BaseMessage.make_user_message(role_name="user", content=message),
+                OpenAIBackendRole.USER,
+            )
+            self.agent.update_memory(
+                BaseMessage.make_assistant_message(role_name=self.name, content=str(response)),
+                OpenAIBackendRole.ASSISTANT,
+            )
+        except Exception as e:
+            print(f"⚠️ Stage Manager failed to update agent memory: {e}")
+
+    def _decide(self, input_msg: str):
+        """Ask for a decision, re-asking up to ``max_decision_retries`` times when the reply is malformed.
+
+        Returns the parsed decision, or None if no valid decision was obtained.
+        """
+        message, previous_reply = input_msg, None
+        for attempt in range(self.max_decision_retries + 1):
+            manager_decision = self._ask_manager(message, previous_reply)
+            try:
+                return self.parse_processed(manager_decision)
+            except DecisionParseError as e:
+                print(f"\033[31m❌ Error parsing manager decision (attempt {attempt + 1}): {e}. Decision content: {manager_decision} \033[0m")  # red
+                try:
+                    self.emit({
+                        'type': 'stage.decision.invalid',
+                        'runId': self.run_id,
+                        'teamId': self.team_id,
+                        'node': {'id': self.id, 'name': self.name},
+                        'meta': {'attempt': attempt + 1, 'reason': e.reason},
+                    })
+                except Exception:
+                    pass
+                previous_reply = str(manager_decision)
+                # chat agent记得上一条回复，只需追问；无状态调用需要带上原始prompt和上一条回复
+                message = repair_prompt(e) if self.use_chat_agent else \
+                    f"{input_msg}\n\nYour previous reply was:\n{previous_reply}\n\n{repair_prompt(e)}"
+        return None
 
     def parse_processed(self, output: str):
         """Parse the manager's decision output."""
-        return parse_json_from_str(output)
+        return parse_decision(output)
 
 
     # 接到所有信息，actor的，planner的，StageNode的
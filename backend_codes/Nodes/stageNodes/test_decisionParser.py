@@ -0,0 +1,31 @@
+import sys
+import os
+
+import pytest
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from Nodes.stageNodes.decisionParser import DecisionParseError, parse_decision, repair_prompt
+
+
+def test_decision_is_normalized():
+    decision = parse_decision('Decision:\n```json\n{"next_step": 2, "next_agent": "searcher", "done": "false"}\n```')
+    assert decision['next_step'] == '2'
+    assert decision['detailed_message'] == ''
+    assert decision['done'] is False and decision['out_of_league'] is False
+
+
+@pytest.mark.parametrize('reply, reason', [
+    ('no json here', 'not valid JSON'),
+    ('[1, 2]', 'expected a JSON object'),
+    ('{"next_step": "search"}', 'next_agent'),
+    ('{"next_step": "s", "next_agent": ["a"]}', "'next_agent' must be a string"),
+    ('{"next_step": "s", "next_agent": "a", "done": "maybe"}', "'done' must be true or false"),
+])
+def test_invalid_decisions_say_why(reply, reason):
+    with pytest.raises(DecisionParseError) as error:
+        parse_decision(reply)
+    assert reason in error.value.reason
+    assert error.value.raw == reply
+    assert error.value.reason in repair_prompt(error.value)
@@ -0,0 +1,72 @@
+import sys
+import os
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from Nodes.stageNodes.historyStore import EMPTY_HISTORY, HistoryStore
+
+
+def test_empty_history_has_the_first_round_note():
+    assert HistoryStore().render() == EMPTY_HISTORY
+
+
+def test_window_keeps_the_latest_rounds_with_their_numbers():
+    history = HistoryStore(window=2)
+    for entry in ('one', 'two', 'three'):
+        history.append(entry)
+
+    assert list(history) == ['two', 'three']
+    rendered = history.render()
+    assert rendered.startswith('(1 earlier rounds omitted)')
+    assert 'At Round 2' in rendered and 'At Round 3' in rendered and 'one' not in rendered
+
+
+def test_token_budget_bounds_the_prompt():
+    history = HistoryStore(token_budget=50)
+    for index in range(20):
+        history.append(f'round {index} ' + 'x' * 80)
+        assert history.tokens <= 50 or len(history) == 1
+
+    assert history.dropped + len(history) == 20
+    assert list(history)[-1].startswith('round 19')
+
+
+def test_oversized_entry_is_still_kept():
+    history = HistoryStore(token_budget=5)
+    history.append('x' * 400)
+    assert len(history) == 1
+
+
+def test_evicted_rounds_are_folded_into_the_summary():
+    calls = []
+
+    def summarizer(summary, rounds):
+        calls.append(list(rounds))
+        return (summary + ' ' + '+'.join(rounds)).strip()
+
+    history = HistoryStore(window=1, summarizer=summarizer)
+    for entry in ('one', 'two', 'three'):
+        history.append(entry)
+
+    assert calls == [['one'], ['two']]
+    assert history.render().startswith('Summary of Rounds 1-2: \n one two')
+
+
+def test_failed_summary_keeps_the_history_usable():
+    def broken(summary, rounds):
+        raise RuntimeError('no model')
+
+    history = HistoryStore(window=1, summarizer=broken)
+    history.append('one')
+    history.append('two')
+    assert history.render().startswith('(1 earlier rounds omitted)')
+
+
+def test_render_is_cached_until_the_next_append():
+    history = HistoryStore()
+    history.append('one')
+    first = history.render()
+    assert history.render() is first
+    history.append('two')
+    assert history.render() is not first and 'At Round 2' in history.render()
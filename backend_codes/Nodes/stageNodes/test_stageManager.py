@@ -0,0 +1,107 @@
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import Nodes.stageNodes.taskTeamStage as task_team_stage
+from Nodes.stageNodes.taskTeamStage import StageManagerNode
+from conftest import _Response
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def in_backend_root(monkeypatch):
+    # 模板路径相对于 backend_codes
+    monkeypatch.chdir(ROOT)
+
+
+def manager(goal='find the answer', **kwargs):
+    return StageManagerNode(team_goal=goal, team_member_info='a0: searcher', version='default', **kwargs)
+
+
+def ask_concurrently(managers, message='round 1'):
+    with ThreadPoolExecutor(len(managers)) as pool:
+        return list(pool.map(lambda m: m._ask_manager(message), managers))
+
+
+def test_system_prompt_is_rendered_with_the_goal(fake_agent):
+    assert 'find the answer' in manager().system_prompt
+    assert manager('goal one').system_prompt != manager('goal two').system_prompt
+
+
+def test_managers_with_different_goals_are_not_collapsed(fake_agent):
+    fake_agent.latency = 0.2
+    first, second = manager('goal one'), manager('goal two')
+    answers = ask_concurrently([first, second])
+
+    assert fake_agent.calls == 2
+    assert 'goal one' in answers[0] and 'goal two' in answers[1]
+
+
+def test_identical_managers_share_one_call(fake_agent):
+    fake_agent.latency = 0.2
+    managers = [manager() for _ in range(3)]
+    shared = []
+    for node in managers:
+        node.bind_run(lambda e: shared.append(e) if e['type'] == 'llm.singleflight.shared' else None, 'run')
+    answers = ask_concurrently(managers)
+
+    assert fake_agent.calls == 1
+    assert len(set(answers)) == 1
+    assert len(shared) == 2
+    # 拿到共享回复的manager也记住了这轮对话，后续追问有上下文
+    assert all(len(node.agent.memory) == 2 for node in managers)
+    assert all(node.agent.memory[1][1] == answers[0] for node in managers)
+
+
+VALID = '{"next_step": "search", "next_agent": "A0", "detailed_message": "go"}'
+
+
+def scripted(node, replies):
+    """Make the manager's agent answer ``replies`` in order and record what it was asked."""
+    asked = []
+
+    def step(message):
+        asked.append(message)
+        return _Response(replies[len(asked) - 1])
+    node.agent.step = step
+    return asked
+
+
+def test_malformed_decision_is_repaired(fake_agent):
+    node = manager(max_decision_retries=1)
+    events = []
+    node.bind_run(events.append, 'run')
+    asked = scripted(node, ['I think we should search.', VALID])
+
+    decision = node._decide('round 1')
+    assert decision['next_agent'] == 'A0'
+    # chat agent记得第一次回复，追问只需要修复提示
+    assert asked[1].startswith('Your previous reply could not be used')
+    assert [e['meta']['attempt'] for e in events if e['type'] == 'stage.decision.invalid'] == [1]
+
+
+def test_retries_are_bounded(fake_agent):
+    node = manager(max_decision_retries=2)
+    asked = scripted(node, ['nope'] * 5)
+    assert node._decide('round 1') is None
+    assert len(asked) == 3
+
+
+def test_stateless_retry_resends_the_prompt_and_reply(fake_agent, monkeypatch):
+    prompts = []
+    replies = iter(['nope', VALID])
+
+    def raw_response(prompt, **kwargs):
+        prompts.append(prompt)
+        return next(replies)
+    monkeypatch.setattr(task_team_stage, 'raw_LLM_response', raw_response)
+    node = manager(use_chat_agent=False)
+
+    assert node._decide('round 1')['next_step'] == 'search'
+    assert prompts[1].startswith('round 1') and 'nope' in prompts[1]
@@ -0,0 +1,62 @@
+import sys
+import os
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from Nodes.outbox import Outbox
+from Edges.test_baseEdge import connect, message
+
+
+def test_each_subscriber_reads_every_entry_once():
+    outbox = Outbox()
+    outbox.subscribe('a')
+    outbox.subscribe('b')
+    outbox.append('m1')
+    outbox.append('m2')
+
+    assert outbox.read('a') == ('m1', 'm2')
+    assert outbox.read('a') == ()
+    outbox.append('m3')
+    assert outbox.read('b') == ('m1', 'm2', 'm3')
+    assert outbox.read('a') == ('m3',)
+
+
+def test_entries_read_by_every_subscriber_are_dropped():
+    outbox = Outbox()
+    outbox.subscribe('a')
+    outbox.subscribe('b')
+    outbox.extend(['m1', 'm2'])
+    outbox.read('a')
+    assert len(outbox) == 2
+    outbox.read('b')
+    assert len(outbox) == 0
+    assert outbox.end == 2
+
+
+def test_without_subscribers_the_whole_log_is_kept():
+    outbox = Outbox()
+    outbox.append(['m1', ['m2']])  # 嵌套列表在写入时展平
+    outbox.append('m3')
+    assert list(outbox) == ['m1', 'm2', 'm3']
+
+
+def test_read_limit_leaves_the_rest_pending():
+    outbox = Outbox()
+    outbox.subscribe('a')
+    outbox.extend(['m1', 'm2', 'm3'])
+    assert outbox.read('a', limit=2) == ('m1', 'm2')
+    assert outbox.pending('a') == 1
+    assert outbox.read('a') == ('m3',)
+
+
+def test_edge_never_resends_earlier_output():
+    source, target, edge = connect()
+    source.processed.append(message('first'))
+    assert edge.load(0) == 1
+    assert edge.load(1) == 0
+    source.processed.append(message('second'))
+    assert edge.load(2) == 1
+
+    edge.deliver(10)
+    assert [m.content for m in target.received] == ['first', 'second']
@@ -0,0 +1,349 @@
+import copy
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from Nodes.processorNodes.agent_node import AgentNode, normalize_batch_mode
+from Nodes.procedureNodes.baseprocedureNodes import BaseProcedureNode
+from Nodes.logicNodes.goThroughNode import GoThroughNode
+from Nodes.logicNodes.joinNode import JoinNode
+from Nodes.logicNodes.mapNode import MapNode, normalize_split
+from Nodes.logicNodes.reduceNode import ReduceNode
+from Edges.baseEdge import STREAM_EDGE_TYPE, normalize_overflow
+from Tools.Basic.tools_pool import resolve_tool
+from llm_cache import normalize_cache_mode
+from model_calls import HedgePolicy
+
+# 同一进程内最多缓存的执行计划数量
+PLAN_CACHE_SIZE = 128
+
+GO_THROUGH_TYPES = ('go-through', 'go_through', 'gothrough')
+
+# metadata.edgeDelay: 'relative' 表示边的delay是相对加载tick的延迟。
+# 没有该标记的旧配置里，delay 是绝对的送达tick(delay+1)，按旧含义执行
+RELATIVE_EDGE_DELAY = 'relative'
+
+
+@dataclass(frozen=True)
+class NodeSpec:
+    """A validated node entry of a team config."""
+    id: str
+    name: str
+    kind: str
+    factory: Callable[["NodeSpec", Any], Any]
+    options: Mapping[str, Any]
+    tool_loaders: Tuple[Callable[[], list], ...] = ()
+
+    def build(self, team):
+        return self.factory(self, team)
+
+
+@dataclass(frozen=True)
+class EdgeSpec:
+    """A validated edge whose endpoints are both known nodes."""
+    source: str
+    target: str
+    edge_type: str
+    delay: int
+    options: Mapping[str, Any]
+    capacity: Optional[int] = None
+    overflow: str = 'block'
+    absolute_delay: bool = False
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """Immutable, shareable result of compiling a team config.
+
+    Holds everything SimpleTeam used to derive from the raw config on every
+    construction: resolved node factories and tool loaders, validated edges,
+    adjacency arrays (edge indices per node index) and a topological order.
+    SimpleTeam builds each source's outgoing edges from ``out_edges``, orders
+    its ready queue by ``order``, and join nodes read their upstreams from
+    ``in_edges``.
+    """
+    key: str
+    team_id: Optional[str]
+    nodes: Tuple[NodeSpec, ...]
+    edges: Tuple[EdgeSpec, ...]
+    index: Mapping[str, int]
+    out_edges: Tuple[Tuple[int, ...], ...]
+    in_edges: Tuple[Tuple[int, ...], ...]
+    order: Tuple[str, ...]
+    output_id: Optional[str]
+    settings: Mapping[str, Any]
+
+
+# ---- node factories ----------------------------------------------------------
+def _streams_output(spec: NodeSpec, plan: "ExecutionPlan") -> bool:
+    """Node config/team settings ask for streaming, or the node feeds a STREAM edge."""
+    if spec.options.get('stream', plan.settings.get('stream', False)):
+        return True
+    return any(edge.source == spec.id and edge.edge_type == STREAM_EDGE_TYPE for edge in plan.edges)
+
+
+def _build_agent(spec: NodeSpec, team, stream: bool | None = None) -> AgentNode:
+    tools = []
+    for loader in spec.tool_loaders:
+        tools.extend(loader())
+    return AgentNode(
+        name=spec.name,
+        id=spec.id,
+        model_name=spec.options.get('model', 'gpt-4o-mini'),
+        system_prompt=spec.options.get('systemPrompt', ''),
+        agent_resume=spec.options.get('description', ''),
+        emit=team.emit,
+        run_id=team.run_id,
+        team_id=team.team_id,
+        tools=tools,
+        cache_mode=spec.options.get('cache', 'off'),
+        stream=_streams_output(spec, team.plan) if stream is None else stream,
+        timeout=spec.options.get('timeout'),
+        hedge=spec.options.get('hedge'),
+        batch_mode=spec.options.get('batchMode'),
+        batch_token_budget=spec.options.get('batchTokenBudget'),
+    )
+
+
+def _build_go_through(spec: NodeSpec, team) -> GoThroughNode:
+    return GoThroughNode(
+        name=spec.name,
+        id=spec.id,
+        emit=team.emit,
+        run_id=team.run_id,
+        team_id=team.team_id,
+        logic_type=spec.options.get('logicType', 'go-through').lower(),
+    )
+
+
+def _build_map(spec: NodeSpec, team) -> MapNode:
+    # 副本是与map节点同名同id的普通AgentNode；多个副本同时输出，不做流式
+    return MapNode(
+        name=spec.name,
+        id=spec.id,
+        replica_factory=lambda: _build_agent(spec, team, stream=False),
+        split=spec.options.get('split', 'lines'),
+        part_size=spec.options.get('partSize'),
+        replicas=spec.options.get('replicas', 4),
+        emit=team.emit,
+        run_id=team.run_id,
+        team_id=team.team_id,
+    )
+
+
+def _build_reduce(spec: NodeSpec, team) -> ReduceNode:
+    return ReduceNode(
+        name=spec.name,
+        id=spec.id,
+        separator=spec.options.get('separator', "\n\n"),
+        emit=team.emit,
+        run_id=team.run_id,
+        team_id=team.team_id,
+    )
+
+
+def _build_join(spec: NodeSpec, team) -> JoinNode:
+    # 默认等待所有入边的源节点
+    plan = team.plan
+    sources = spec.options.get('sources') or [plan.edges[i].source for i in plan.in_edges[plan.index[spec.id]]]
+    return JoinNode(
+        name=spec.name,
+        id=spec.id,
+        sources=sources,
+        timeout_ticks=spec.options.get('timeoutTicks'),
+        separator=spec.options.get('separator', "\n\n"),
+        emit=team.emit,
+        run_id=team.run_id,
+        team_id=team.team_id,
+    )
+
+
+def _build_procedure(spec: NodeSpec, team) -> BaseProcedureNode:
+    return BaseProcedureNode(
+        name=spec.name,
+        id=spec.id,
+        emit=team.emit,
+        run_id=team.run_id,
+        team_id=team.team_id,
+    )
+
+
+def _resolve_factory(node_type: str, options: Mapping[str, Any]):
+    if node_type == 'agent':
+        return _build_agent
+    if node_type in ('input', 'output'):
+        return _build_procedure
+    if node_type == 'logic':
+        logic_type = options.get('logicType', 'go-through').lower()
+        if logic_type in GO_THROUGH_TYPES:
+            return _build_go_through
+        if logic_type == 'map':
+            return _build_map
+        if logic_type == 'reduce':
+            return _build_reduce
+        if logic_type == 'join':
+            return _build_join
+        print(f"⚠️ 未知的逻辑节点类型: {logic_type}")
+        return None
+    print(f"❌ 未知节点类型: {node_type}")
+    return None
+
+
+# ---- compilation -------------------------------------------------------------
+def config_hash(config: Dict[str, Any]) -> str:
+    """Content hash of a team config (key order independent)."""
+    canonical = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _freeze(value: Optional[Dict[str, Any]]) -> Mapping[str, Any]:
+    return MappingProxyType(copy.deepcopy(dict(value or {})))
+
+
+def _topological_order(node_ids: List[str], index: Mapping[str, int], edges, out_edges) -> Tuple[str, ...]:
+    """Kahn's algorithm in config order; nodes on cycles follow in config order."""
+    indegree = [0] * len(node_ids)
+    for edge in edges:
+        indegree[index[edge.target]] += 1
+    queue = deque(i for i, degree in enumerate(indegree) if degree == 0)
+    visited = [False] * len(node_ids)
+    order: List[str] = []
+    while queue:
+        i = queue.popleft()
+        visited[i] = True
+        order.append(node_ids[i])
+        for edge_idx in out_edges[i]:
+            j = index[edges[edge_idx].target]
+            indegree[j] -= 1
+            if indegree[j] == 0:
+                queue.append(j)
+    order.extend(node_id for i, node_id in enumerate(node_ids) if not visited[i])
+    return tuple(order)
+
+
+def _uses_legacy_delays(config: Dict[str, Any]) -> bool:
+    """Config saved before edge delays became relative, with a delay that depends on it."""
+    metadata = config.get('metadata') or {}
+    if str(metadata.get('edgeDelay', '')).lower() == RELATIVE_EDGE_DELAY:
+        return False
+    delayed = [edge for edge in config.get('edges', []) if int(edge.get('delay', 0) or 0) > 0]
+    if delayed:
+        print(f"⚠️ 团队 {config.get('name') or metadata.get('name')} 是旧版配置: {len(delayed)} 条边的delay按绝对送达tick执行。"
+              f"改为相对延迟后请在metadata中设置 edgeDelay: {RELATIVE_EDGE_DELAY}")
+    return bool(delayed)
+
+
+def compile_team_config(config: Dict[str, Any], key: Optional[str] = None) -> ExecutionPlan:
+    """Turn a raw team config into an immutable :class:`ExecutionPlan`.
+
+    Unknown node/logic types are skipped (as SimpleTeam always did), edges whose
+    endpoints are missing are dropped, and unknown tool names, cache modes,
+    hedge settings, batch modes, map split strategies or edge overflow
+    policies raise ValueError.
+    """
+    node_specs: List[NodeSpec] = []
+    output_id = None
+    for node_config in config.get('nodes', []):
+        node_type = str(node_config.get('type', '')).lower()
+        options = _freeze(node_config.get('config'))
+        factory = _resolve_factory(node_type, options)
+        if factory is None:
+            continue
+        tool_loaders: Tuple[Callable[[], list], ...] = ()
+        if node_type == 'agent' or factory is _build_map:
+            tool_loaders = tuple(resolve_tool(name) for name in options.get('tools', []) or [])
+            # 提前校验缓存模式和对冲设置，配置错误在编译时就报出来
+            normalize_cache_mode(options.get('cache'))
+            HedgePolicy.from_config(options.get('hedge'))
+            normalize_batch_mode(options.get('batchMode'))
+        if factory is _build_map:
+            normalize_split(options.get('split'))
+        spec = NodeSpec(
+            id=node_config.get('id', None),
+            name=node_config['name'],
+            kind=node_type,
+            factory=factory,
+            options=options,
+            tool_loaders=tool_loaders,
+        )
+        node_specs.append(spec)
+        if node_type == 'output':
+            output_id = spec.id
+
+    node_ids = [spec.id for spec in node_specs]
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+
+    legacy_delays = _uses_legacy_delays(config)
+    edge_specs: List[EdgeSpec] = []
+    out_lists: List[List[int]] = [[] for _ in node_ids]
+    in_lists: List[List[int]] = [[] for _ in node_ids]
+    for edge_config in config.get('edges', []):
+        source_id = edge_config.get('source')
+        target_id = edge_config.get('target')
+        if source_id not in index or target_id not in index:
+            print(f"❌ 无法注册边: {edge_config} (源或目标节点不存在)")
+            continue
+        options = _freeze(edge_config.get('config'))
+        # capacity/overflow 可以写在边上，也可以写在边的config里
+        capacity = edge_config.get('capacity', options.get('capacity'))
+        out_lists[index[source_id]].append(len(edge_specs))
+        in_lists[index[target_id]].append(len(edge_specs))
+        edge_specs.append(EdgeSpec(
+            source=source_id,
+            target=target_id,
+            edge_type=str(edge_config.get('type', 'HARD')).upper(),
+            delay=max(0, int(edge_config.get('delay', 0) or 0)),
+            options=options,
+            capacity=max(1, int(capacity)) if capacity else None,
+            overflow=normalize_overflow(edge_config.get('overflow', options.get('overflow'))),
+            absolute_delay=legacy_delays,
+        ))
+
+    out_edges = tuple(tuple(ids) for ids in out_lists)
+    return ExecutionPlan(
+        key=key or config_hash(config),
+        team_id=config.get('name', None),
+        nodes=tuple(node_specs),
+        edges=tuple(edge_specs),
+        index=MappingProxyType(index),
+        out_edges=out_edges,
+        in_edges=tuple(tuple(ids) for ids in in_lists),
+        order=_topological_order(node_ids, index, edge_specs, out_edges),
+        output_id=output_id,
+        settings=_freeze(config.get('settings')),
+    )
+
+
+_plan_cache: "OrderedDict[str, ExecutionPlan]" = OrderedDict()
+_plan_cache_lock = threading.Lock()
+
+
+def get_execution_plan(config: Dict[str, Any]) -> ExecutionPlan:
+    """Return the cached plan for ``config``, compiling it on first use."""
+    key = config_hash(config)
+    with _plan_cache_lock:
+        plan = _plan_cache.get(key)
+        if plan is not None:
+            _plan_cache.move_to_end(key)
+            return plan
+
+    plan = compile_team_config(config, key=key)
+    with _plan_cache_lock:
+        _plan_cache[key] = plan
+        _plan_cache.move_to_end(key)
+        while len(_plan_cache) > PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+    return plan
+
+
+def clear_plan_cache() -> None:
+    with _plan_cache_lock:
+        _plan_cache.clear()
@@ -4,6 +4,7 @@ import os
 # 把项目根目录加入搜索路径
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from Nodes.base_node import BaseNode
+from Messages.baseMessage import message_order
 from Nodes.stageNodes.taskTeamStage import StageManagerNode
 from Teams.baseTeam import BaseTeam
 from utils import parse_team
@@ -32,7 +33,10 @@ class PCTeam(BaseTeam):
         instructions = None, 
         use_chat_stage_manager = True,
         manager_model = ('openai', 'gpt-4o'),
-        manager_version = "searchqa_ablation"
+        manager_version = "searchqa_ablation",
+        history_window = None,
+        history_token_budget = None,
+        summarize_history = False,
         ):
         super().__init__()
 
@@ -42,6 +46,10 @@ class PCTeam(BaseTeam):
         self.manager_model = manager_model
         self.instructions = instructions
         self.manager_version = manager_version
+        # Stage manager历史的上限: 保留的轮次数 / token预算，超出部分可滚动摘要
+        self.history_window = history_window
+        self.history_token_budget = history_token_budget
+        self.summarize_history = summarize_history
         self.initialize(nodes=nodes)
         self.max_replan_times = 3
 
@@ -65,7 +73,10 @@ class PCTeam(BaseTeam):
             team_member_info=team_member_info,
             use_chat_agent=self.use_chat_stage_manager,
             model_info=self.manager_model,
-            version = self.manager_version
+            version = self.manager_version,
+            history_window=self.history_window,
+            history_token_budget=self.history_token_budget,
+            summarize_history=self.summarize_history,
         )
 
         self.register_nodes(self.stage_manager)
@@ -112,12 +123,12 @@ class PCTeam(BaseTeam):
                 self.nodes[target].receive([msg])
                 print(f"📡: {node.name} → {target}:\n {msg.content}")
 
-        # Sorting all nodes msg according to the timetag, earlier goes first
+        # Sorting all nodes msg according to (ts, seq), earlier goes first
         for key, node in self.nodes.items():
             print(f"📝 Node {node.name}'s recieving list size is: {len(node.received)}")
-            node.received.sort(key=lambda x: x.timetag)
+            node.received.sort(key=message_order)
             # clear | reset the processed messages after sending
-            node.processed = []
+            node.processed.clear()
 
     def register_nodes(self, nodes):
         """Register nodes in the team and assign colors."""
@@ -235,12 +246,12 @@ class PCTaskTeam(BaseTeam):
                 self.nodes[target].receive([msg])
                 print(f"📡: {node.name} → {target}:\n {msg.content}")
 
-        # Sorting all nodes msg according to the timetag, earlier goes first
+        # Sorting all nodes msg according to (ts, seq), earlier goes first
         for key, node in self.nodes.items():
             print(f"📝 Node {node.name}'s recieving list size is: {len(node.received)}")
-            node.received.sort(key=lambda x: x.timetag)
+            node.received.sort(key=message_order)
             # clear | reset the processed messages after sending
-            node.processed = []
+            node.processed.clear()
 
     def register_nodes(self, nodes):
         """Register nodes in the team and assign colors."""
@@ -1,24 +1,23 @@
+import asyncio
 import sys
 import os
+import time
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 from typing import Any, Dict, List, Optional
 
-from networkx import config, nodes
-
 # 把项目根目录加入搜索路径
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from Nodes.base_node import BaseNode
-from Nodes.processorNodes.agent_node import AgentNode
-from Nodes.procedureNodes.baseprocedureNodes import BaseProcedureNode
 from Nodes.stageNodes.taskTeamStage import StageManagerNode
 from Messages.simpleMessage import SimpleMessageCreator
 from Teams.baseTeam import BaseTeam
 from utils import parse_team
 import yaml
 from Edges.baseEdge import BaseEdge
-from Tools.Basic.tools_pool import load_tool
-from Nodes.logicNodes.goThroughNode import GoThroughNode
+from Teams.executionPlan import ExecutionPlan, get_execution_plan
+from Teams.scheduler import ReadyQueueScheduler
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -35,6 +34,9 @@ COLORS = [
 ]
 RESET = "\033[0m"
 
+# 每个tick内并发处理节点的默认线程数 (settings.maxWorkers 可覆盖)
+DEFAULT_MAX_WORKERS = 8
+
 # An Agent Team for question answering
 class SimpleTeam(BaseTeam):
     def __init__(
@@ -44,10 +46,13 @@ class SimpleTeam(BaseTeam):
         emit=None,
         run_id: str | None = None,
         input_attachments: Optional[List[Dict[str, Any]]] = None,
+        plan: Optional[ExecutionPlan] = None,
         ):
         super().__init__()
 
         self.config = config
+        # 解析/校验好的执行计划按config内容哈希缓存，同一团队的后续运行无需重新解析
+        self.plan = plan or get_execution_plan(config)
 
         # print(f"团队配置内容: {self.config}")
 
@@ -60,135 +65,113 @@ class SimpleTeam(BaseTeam):
         self.nodes = {}
         self.edges = {}
         self.edges_by_source = defaultdict(list)
+        # delay为0的STREAM边: 上游处理完后消息在同一tick内直接交给下游
+        self.pipelined_edges_by_source = defaultdict(list)
         self.output_node_id = None
+        self.input_node_ids: List[str] = []
+        # 队列已满、源节点outbox里还有积压消息的 block 边
+        self.blocked_edges: Dict[str, BaseEdge] = {}
 
 
         self.register_nodes()
         self.register_edges()
+        # 就绪节点按执行计划的拓扑序处理: 同一tick内上游节点先启动
+        self.scheduler = ReadyQueueScheduler(
+            self._ordered_node_ids(),
+            sink_ids=[self.output_node_id] if self.output_node_id else [],
+        )
+        self.seed_inputs()
 
 
     def register_nodes(self):
-        for node_config in self.config['nodes']:
-            print(f"节点类型: {node_config['type']}")
-            if node_config['type'].lower() == 'agent':
-                tools = []
-                for tool_name in node_config['config'].get('tools', []):
-                    print(f"Trying To Load Tool: {tool_name}")
-                    tool_instances = load_tool(tool_name)
-                    tools.extend(tool_instances)
-                
-                try:
-                    node = AgentNode(
-                        name = node_config['name'], 
-                        id = node_config.get('id', None), 
-                        model_name = node_config['config'].get('model', 'gpt-4o-mini'),
-                        system_prompt = node_config['config'].get('systemPrompt', ''),
-                        agent_resume = node_config['config'].get('description', ''),
-                        emit=self.emit,
-                        run_id=self.run_id,
-                        team_id=self.team_id,
-                        tools = tools,
-                    )
-                except Exception as e:
-                    print(f"❌ 无法创建代理节点: {e}")
-                    continue
-
-                self.nodes[node.id] = node 
-                print(f"✅ 注册节点: {node.name} (ID: {node.id})")
-
-            elif node_config['type'].lower() == 'input':
-                node = BaseProcedureNode(
-                    name = node_config['name'], 
-                    id = node_config.get('id', None),
-                    emit=self.emit,
-                    run_id=self.run_id,
-                    team_id=self.team_id,
-                )
-                
-                initial_message = SimpleMessageCreator().create_message(
-                    content = self.goal,
-                    maker = "System",
-                    target_agent = None,
-                    attachments=self.initial_attachments if self.initial_attachments else None,
-                )
-                node.receive([initial_message])
-
-                self.nodes[node.id] = node
-                print(f"✅ 注册输入节点: {node.name} (ID: {node.id})")
-            elif node_config['type'].lower() == 'logic':
-                logic_type = node_config.get('config', {}).get('logicType', 'go-through').lower()
-                try:
-                    if logic_type in ('go-through', 'go_through', 'gothrough'):
-                        node = GoThroughNode(
-                            name=node_config['name'],
-                            id=node_config.get('id', None),
-                            emit=self.emit,
-                            run_id=self.run_id,
-                            team_id=self.team_id,
-                            logic_type=logic_type,
-                        )
-                    else:
-                        print(f"⚠️ 未知的逻辑节点类型: {logic_type}")
-                        continue
-                except Exception as e:
-                    print(f"⚠️ 无法创建逻辑节点: {e}")
-                    continue
-
-                self.nodes[node.id] = node
-                print(f"✅ 注册逻辑节点: {node.name} (ID: {node.id}, 类型: {logic_type})")
-
-            elif node_config['type'].lower() == 'output':
-                node = BaseProcedureNode(
-                    name = node_config['name'], 
-                    id = node_config.get('id', None),
-                    emit=self.emit,
-                    run_id=self.run_id,
-                    team_id=self.team_id,
-                )
-                self.nodes[node.id] = node
+        for spec in self.plan.nodes:
+            print(f"节点类型: {spec.kind}")
+            try:
+                node = spec.build(self)
+            except Exception as e:
+                print(f"❌ 无法创建节点 {spec.name}: {e}")
+                continue
+
+            node.streaming_input = bool(spec.options.get('streamingInput', False))
+            self.nodes[node.id] = node
+            if spec.kind == 'output':
                 self.output_node_id = node.id
-                print(f"✅ 注册输出节点: {node.name} (ID: {node.id})")
-              
-            else:
-                print(f"❌ 未知节点类型: {node['type']}")
-
+            elif spec.kind == 'input':
+                self.input_node_ids.append(node.id)
+            print(f"✅ 注册节点: {node.name} (ID: {node.id}, 类型: {spec.kind})")
 
+    def _ordered_node_ids(self) -> List[str]:
+        """Built nodes in the plan's topological order (nodes without a config id last)."""
+        ordered = [node_id for node_id in self.plan.order if node_id in self.nodes]
+        known = set(ordered)
+        return ordered + [node_id for node_id in self.nodes if node_id not in known]
 
     def register_edges(self):
-        print(self.config['edges'])
-        for edge_config in self.config['edges']:
-            source_id = edge_config['source']
-            target_id = edge_config['target']
-            edge_type = edge_config.get('type', 'HARD').upper()
-            delay = edge_config.get('delay', 0)
-
-            if source_id in self.nodes and target_id in self.nodes:
+        """Build the plan's edges; each source's outgoing edges come from ``plan.out_edges``."""
+        built: List[Optional[BaseEdge]] = []
+        for spec in self.plan.edges:
+            if spec.source in self.nodes and spec.target in self.nodes:
                 edge = BaseEdge(
-                    source=self.nodes[source_id],
-                    target=self.nodes[target_id],
-                    edge_type=edge_type,
-                    delay=delay,
+                    source=self.nodes[spec.source],
+                    target=self.nodes[spec.target],
+                    edge_type=spec.edge_type,
+                    delay=spec.delay,
                     id=None,
                     emit=self.emit,
                     run_id=self.run_id,
                     team_id=self.team_id,
+                    capacity=spec.capacity,
+                    overflow=spec.overflow,
+                    absolute_delay=spec.absolute_delay,
                 )
                 self.edges[edge.edge_id] = edge
-                self.edges_by_source[source_id].append(edge)
-                print(f"✅ 注册边: {edge.edge_id} (源: {source_id}, 目标: {target_id}, 类型: {edge_type})")
+                built.append(edge)
+                print(f"✅ 注册边: {edge.edge_id} (源: {spec.source}, 目标: {spec.target}, 类型: {spec.edge_type})")
             else:
-                print(f"❌ 无法注册边: {edge_config} (源或目标节点不存在)") 
-    
-    def run(self):
+                built.append(None)
+                print(f"❌ 无法注册边: {spec} (源或目标节点创建失败)")
+
+        for spec, edge_indices in zip(self.plan.nodes, self.plan.out_edges):
+            for edge_index in edge_indices:
+                edge = built[edge_index]
+                if edge is None:
+                    continue
+                self.edges_by_source[spec.id].append(edge)
+                if edge.pipelined and edge.target_node.id != self.output_node_id:
+                    self.pipelined_edges_by_source[spec.id].append(edge)
+
+    def seed_inputs(self) -> None:
+        """把本次运行的goal(及附件)作为初始消息放入输入节点。"""
+        for node_id in self.input_node_ids:
+            initial_message = SimpleMessageCreator().create_message(
+                content = self.goal,
+                maker = "System",
+                target_agent = None,
+                attachments=self.initial_attachments if self.initial_attachments else None,
+            )
+            self.nodes[node_id].receive([initial_message])
+
+    def _settings(self) -> Dict[str, Any]:
+        return self.config.get('settings', {}) if isinstance(self.config, dict) else {}
+
+    def _start_run(self):
+        """校验输出节点并发送开始事件，返回输出节点。"""
         output_id = self.output_node_id or 'output-node'
         if output_id not in self.nodes:
             raise ValueError('SimpleTeam requires an output node.')
         out_node = self.nodes[output_id]
-      
-        settings = self.config.get('settings', {}) if isinstance(self.config, dict) else {}
-        max_ticks = settings.get('maxTicks', 5)
-        current_tick = 0
-       
+
+        # settings.runTimeout: 整个run的时间预算(秒)，传给各节点约束其中的模型调用
+        run_timeout = self._settings().get('runTimeout')
+        self.run_deadline = time.monotonic() + float(run_timeout) if run_timeout else None
+        for node in self.nodes.values():
+            node.run_deadline = self.run_deadline
+
+        # 以当前各节点的待处理输入(如输入节点的goal)初始化就绪队列
+        self.scheduler.reset()
+        self.blocked_edges.clear()
+        for node_id in self._ordered_node_ids():
+            self.scheduler.mark_ready(node_id, len(getattr(self.nodes[node_id], 'received', []) or []))
 
         try:
             self.emit({
@@ -209,85 +192,307 @@ class SimpleTeam(BaseTeam):
                 })
         except Exception:
             pass
+        return out_node
+
+    def _is_system_stable(self) -> bool:
+        """检查系统是否达到稳定状态：
+        边上没有待投递的消息，除了output node以外也没有任何node有待处理消息
+        """
+        if not self.scheduler.is_idle():
+            print(f"系统还有 {self.scheduler.pending} 条待投递/待处理消息")
+            return False
+        if self.blocked_edges:
+            print(f"系统还有 {len(self.blocked_edges)} 条边因背压积压消息")
+            return False
+
+        print("系统已达到稳定状态：除输出节点外无待处理消息")
+        return True
+
+    def _finalize(self, out_node) -> str | None:
+        if not self._is_system_stable():
+            return None
+
+        msg = '\n'.join([getattr(m, 'content') for m in out_node.received])
+        print(f"\n🏁 系统稳定，输出节点 {out_node.id} 收到最终消息:\n{msg}\n")
+        try:
+            self.emit({
+                'type': 'node.state.done',
+                'runId': self.run_id,
+                'teamId': self.team_id,
+                'node': {'id': out_node.id, 'name': out_node.name},
+            })
+        except Exception:
+            pass
+        try:
+            self.emit({
+                'type': 'team.run.finished',
+                'runId': self.run_id,
+                'teamId': self.team_id,
+                'output': msg
+            })
+        except Exception:
+            pass
+        return msg
+
+    def _begin_tick(self, current_tick: int) -> List[str]:
+        """只在到期的边上传递消息，返回本tick就绪(有待处理输入)的节点。"""
+        print(f"\n=== Tick {current_tick} ===")
+        for edge in self.scheduler.pop_due_edges(current_tick):
+            self.scheduler.mark_delivered(edge, edge.deliver(current_tick))
+        self.scheduler.pop_wakeups(current_tick)
+        ready = self.scheduler.pop_ready()
+        for node_id in ready:
+            self.nodes[node_id].tick = current_tick
+        if not self.blocked_edges:
+            return ready
+        # 背压: 出边仍有积压的节点暂不处理新输入，等下游消费后再继续
+        throttled = {edge.source_node.id for edge in self.blocked_edges.values()}
+        self.scheduler.defer(node_id for node_id in ready if node_id in throttled)
+        return [node_id for node_id in ready if node_id not in throttled]
+
+    def _end_tick(self, active_ids: List[str], current_tick: int) -> int:
+        """本tick所有节点处理完毕后，清空输入并统一加载输出到边；返回下一个需要执行的tick。"""
+        loading = dict(self.blocked_edges)
+        for node_id in active_ids:
+            node = self.nodes[node_id]
+            self.scheduler.mark_processed(len(node.received))
+            node.received = []
+            self.scheduler.wake(node_id, node.wake_tick())
+            for edge in self.edges_by_source.get(node_id, []):
+                loading[edge.edge_id] = edge
+        for edge_id, edge in loading.items():
+            self.scheduler.schedule_edge(edge, current_tick, edge.load(current_tick))
+            self.scheduler.mark_evicted(edge.evicted)
+            if edge.overflow == 'block' and edge.backlog:
+                self.blocked_edges[edge_id] = edge
+            else:
+                self.blocked_edges.pop(edge_id, None)
 
-        def is_system_stable() -> bool:
-            """检查系统是否达到稳定状态：
-            除了output node以外，没有任何其他node有received消息
-            """
-            # 检查除输出节点外的所有节点是否还有待处理的消息
-            for node in self.nodes.values():
-                if node.id != self.output_node_id and getattr(node, 'received', []):
-                    print(f"节点 {node.id} 还有 {len(node.received)} 条待处理消息")
-                    return False
-                    
-            print("系统已达到稳定状态：除输出节点外无待处理消息")
-            return True
-
-        def finalize() -> str | None:
-            if not is_system_stable():
-                return None
-                
-            msg = '\n'.join([getattr(m, 'content') for m in out_node.received])
-            print(f"\n🏁 系统稳定，输出节点 {out_node.id} 收到最终消息:\n{msg}\n")
-            try:
-                self.emit({
-                    'type': 'node.state.done',
-                    'runId': self.run_id,
-                    'teamId': self.team_id,
-                    'node': {'id': out_node.id, 'name': out_node.name},
-                })
-            except Exception:
-                pass
-            try:
-                self.emit({
-                    'type': 'team.run.finished',
-                    'runId': self.run_id,
-                    'teamId': self.team_id,
-                    'output': msg
-                })
-            except Exception:
-                pass
-            return msg
+        # 中间没有任何边到期的tick直接跳过
+        next_due = self.scheduler.next_due_tick()
+        return current_tick + 1 if next_due is None else max(current_tick + 1, next_due)
+
+    @staticmethod
+    def _within_budget(current_tick: int, max_ticks) -> bool:
+        # maxTicks 为 None/0 时不限制tick数，运行到系统稳定为止
+        return not max_ticks or current_tick < max_ticks
+
+    def _deadline_passed(self) -> bool:
+        deadline = getattr(self, 'run_deadline', None)
+        return deadline is not None and time.monotonic() >= deadline
+
+    def _report_deadline(self, current_tick: int) -> None:
+        if not self._deadline_passed():
+            return
+        print(f"⏱️ Run {self.run_id} exceeded runTimeout at tick {current_tick}")
+        try:
+            self.emit({
+                'type': 'team.run.deadline',
+                'runId': self.run_id,
+                'teamId': self.team_id,
+                'meta': {'tick': current_tick, 'runTimeout': self._settings().get('runTimeout')},
+            })
+        except Exception:
+            pass
+
+    def run(self):
+        out_node = self._start_run()
+        settings = self._settings()
+        max_ticks = settings.get('maxTicks', 5)
+        max_workers = max(1, int(settings.get('maxWorkers', DEFAULT_MAX_WORKERS) or 1))
+        current_tick = 0
 
         final_output = None
-        while current_tick < max_ticks:
-            print(f"\n=== Tick {current_tick} ===")
-            
-            # 传递消息
-            for edge in self.edges.values():
-                edge.deliver(current_tick)
-
-            # deliver后检查是否已经稳定，如果稳定就结束
-            final_output = finalize()
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="team-node") as executor:
+            while self._within_budget(current_tick, max_ticks) and not self._deadline_passed():
+                # deliver后检查是否已经稳定，如果稳定就结束
+                active_ids = self._begin_tick(current_tick)
+                final_output = self._finalize(out_node)
+                if final_output is not None:
+                    return final_output
+
+                # 本tick内有输入的节点并发执行，全部结束后再统一加载到边
+                active_ids = self._process_tick(active_ids, executor, current_tick)
+                current_tick = self._end_tick(active_ids, current_tick)
+
+        print(f"Final output is: {final_output}")
+        self._report_deadline(current_tick)
+
+        final_output = self._finalize(out_node)
+        if final_output is not None:
+            return final_output
+        return 'No Output Generated'
+
+    async def arun(self):
+        """Asyncio version of :meth:`run` with identical tick semantics.
+
+        Nodes of a tick are awaited together through ``aprocess()``, bounded by
+        ``settings.maxWorkers``, so a single event loop can drive many runs and
+        their in-flight LLM calls without a thread per run.
+        """
+        out_node = self._start_run()
+        settings = self._settings()
+        max_ticks = settings.get('maxTicks', 5)
+        max_workers = max(1, int(settings.get('maxWorkers', DEFAULT_MAX_WORKERS) or 1))
+        semaphore = asyncio.Semaphore(max_workers)
+        current_tick = 0
+
+        async def bounded(node_id):
+            async with semaphore:
+                await self.nodes[node_id].aprocess()
+            return node_id
+
+        final_output = None
+        while self._within_budget(current_tick, max_ticks) and not self._deadline_passed():
+            active_ids = self._begin_tick(current_tick)
+            final_output = self._finalize(out_node)
             if final_output is not None:
                 return final_output
 
-            # 处理节点
-            for node_id, node in self.nodes.items():
-                if getattr(node, 'received', []):
-                    node.process()
-                    node.received = []
-                    # 加载输出到边
-                    for edge in self.edges_by_source.get(node_id, []):
-                        edge.load()
- 
-            current_tick += 1
-            
-            
+            if not self.pipelined_edges_by_source:
+                results = await asyncio.gather(
+                    *(bounded(node_id) for node_id in active_ids),
+                    return_exceptions=True,
+                )
+                errors = [r for r in results if isinstance(r, BaseException)]
+                if errors:
+                    raise errors[0]
+            else:
+                active_ids = await self._aprocess_pipelined(active_ids, bounded, current_tick)
+            current_tick = self._end_tick(active_ids, current_tick)
+
         print(f"Final output is: {final_output}")
+        self._report_deadline(current_tick)
 
-        final_output = finalize()
+        final_output = self._finalize(out_node)
         if final_output is not None:
             return final_output
         return 'No Output Generated'
 
+    def _process_tick(self, node_ids: List[str], executor: ThreadPoolExecutor, current_tick: int = 0) -> List[str]:
+        """Run ``process()`` for every node that has input in the current tick.
+
+        Messages are only delivered at the start of a tick, so nodes inside one
+        tick never observe each other's output and can run concurrently: the
+        tick costs the slowest node instead of the sum of all of them.
+        Errors are re-raised in node order after every node has finished.
+        Returns the ids of every node processed in this tick.
+        """
+        if self.pipelined_edges_by_source:
+            return self._process_pipelined(node_ids, executor, current_tick)
+
+        if len(node_ids) <= 1:
+            for node_id in node_ids:
+                self.nodes[node_id].process()
+            return node_ids
+
+        futures = [executor.submit(self.nodes[node_id].process) for node_id in node_ids]
+        errors = []
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+        return node_ids
+
+    def _pipeline_from(self, node_id: str, started: set, current_tick: int) -> List[str]:
+        """Forward a finished node's output over its pipelined STREAM edges.
+
+        Targets that have not run in this tick receive the messages immediately
+        and are returned so the caller can start them right away; the others
+        get the messages through the regular end-of-tick load.
+        """
+        targets = []
+        for edge in self.pipelined_edges_by_source.get(node_id, []):
+            target_id = edge.target_node.id
+            if target_id in started:
+                continue
+            edge.target_node.tick = current_tick
+            count = edge.forward(current_tick)
+            if count:
+                self.scheduler.mark_ready(target_id, count)
+                self.scheduler.claim(target_id)
+                started.add(target_id)
+                targets.append(target_id)
+        return targets
+
+    def _process_pipelined(self, node_ids: List[str], executor: ThreadPoolExecutor, current_tick: int) -> List[str]:
+        processed = list(node_ids)
+        started = set(node_ids)
+        futures = {executor.submit(self.nodes[node_id].process): node_id for node_id in node_ids}
+        errors = []
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                node_id = futures.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                for target_id in self._pipeline_from(node_id, started, current_tick):
+                    processed.append(target_id)
+                    futures[executor.submit(self.nodes[target_id].process)] = target_id
+        if errors:
+            raise errors[0]
+        return processed
+
+    async def _aprocess_pipelined(self, node_ids: List[str], bounded, current_tick: int) -> List[str]:
+        processed = list(node_ids)
+        started = set(node_ids)
+        tasks = {asyncio.ensure_future(bounded(node_id)) for node_id in node_ids}
+        errors = []
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    errors.append(task.exception())
+                    continue
+                for target_id in self._pipeline_from(task.result(), started, current_tick):
+                    processed.append(target_id)
+                    tasks.add(asyncio.ensure_future(bounded(target_id)))
+        if errors:
+            raise errors[0]
+        return processed
+
 
 
-    def reset(self):
-        """Reset the team to its initial state."""
+    def reset(
+        self,
+        goal: Optional[str] = None,
+        emit=None,
+        run_id: str | None = None,
+        input_attachments: Optional[List[Dict[str, Any]]] = None,
+        ):
+        """Reset the team to its initial state so it can serve another run.
+
+        Clears node buffers and outboxes, agent memory, edge queues and the
+        scheduler, rebinds telemetry to the new run and re-seeds the input
+        nodes. Nodes, agents and loaded tools are reused, which makes this far
+        cheaper than building a new team.
+        """
+        if goal is not None:
+            self.goal = goal
+        self.initial_attachments = list(input_attachments or [])
+
         for node in self.nodes.values():
             node.reset()
-        self.stage.reset()
+        for edge in self.edges.values():
+            edge.reset()
+        self.bind_run(emit, run_id)
+        self.scheduler.reset()
+        self.seed_inputs()
+
+    def bind_run(self, emit=None, run_id: str | None = None) -> None:
+        """Point the team, its nodes and its edges at a run's telemetry sink."""
+        self.emit = emit or (lambda _e: None)
+        self.run_id = run_id
+        for node in self.nodes.values():
+            node.bind_run(self.emit, self.run_id)
+        for edge in self.edges.values():
+            edge.bind_run(self.emit, self.run_id)
 
 
 
@@ -0,0 +1,92 @@
+import os
+import sys
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from Teams.executionPlan import get_execution_plan
+from Teams.simpleTeam import SimpleTeam
+
+# 每个执行计划最多保留的空闲团队实例数
+DEFAULT_MAX_IDLE_PER_PLAN = 4
+
+
+class TeamPool:
+    """Pool of pre-built SimpleTeam instances keyed by execution-plan hash.
+
+    Building a team constructs a ChatAgent per agent node and loads its
+    toolkits; checking a team out of the pool only runs ``SimpleTeam.reset``.
+    A checked-out team belongs to one run until it is checked back in.
+    """
+
+    def __init__(self, max_idle_per_plan: int = DEFAULT_MAX_IDLE_PER_PLAN):
+        self.max_idle_per_plan = max_idle_per_plan
+        self._idle: Dict[str, List[SimpleTeam]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def checkout(
+        self,
+        config: Dict[str, Any],
+        goal: str,
+        emit=None,
+        run_id: str | None = None,
+        input_attachments: Optional[List[Dict[str, Any]]] = None,
+    ) -> SimpleTeam:
+        plan = get_execution_plan(config)
+        with self._lock:
+            idle = self._idle.get(plan.key)
+            team = idle.pop() if idle else None
+
+        if team is None:
+            self.created += 1
+            return SimpleTeam(
+                goal=goal,
+                config=config,
+                emit=emit,
+                run_id=run_id,
+                input_attachments=input_attachments,
+                plan=plan,
+            )
+
+        self.reused += 1
+        team.reset(goal=goal, emit=emit, run_id=run_id, input_attachments=input_attachments)
+        return team
+
+    def checkin(self, team: SimpleTeam) -> None:
+        # 释放对本次运行的遥测回调的引用，避免空闲团队持有已结束的SSE队列
+        team.bind_run(None, None)
+        with self._lock:
+            idle = self._idle[team.plan.key]
+            if len(idle) < self.max_idle_per_plan:
+                idle.append(team)
+
+    @contextmanager
+    def lease(self, config: Dict[str, Any], goal: str, **kwargs):
+        """``with pool.lease(config, goal) as team:`` — checkout/checkin pair."""
+        team = self.checkout(config, goal, **kwargs)
+        try:
+            yield team
+        finally:
+            self.checkin(team)
+
+    def prewarm(self, config: Dict[str, Any], count: int = 1) -> None:
+        """Build ``count`` idle teams for ``config`` ahead of the first request."""
+        plan = get_execution_plan(config)
+        teams = [SimpleTeam(config=config, plan=plan) for _ in range(count)]
+        self.created += len(teams)
+        with self._lock:
+            idle = self._idle[plan.key]
+            idle.extend(teams[: max(0, self.max_idle_per_plan - len(idle))])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._idle.clear()
+
+
+# 进程内共享的默认团队池
+default_team_pool = TeamPool()
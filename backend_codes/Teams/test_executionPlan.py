@@ -0,0 +1,61 @@
+import sys
+import os
+
+import pytest
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from Teams.executionPlan import compile_team_config, get_execution_plan
+from Teams.simpleTeam import SimpleTeam
+
+
+def chain_config():
+    # 节点故意按逆序列出: 拓扑序与配置顺序不同
+    return {
+        'name': 'chain',
+        'nodes': [
+            {'id': 'output-node', 'name': 'out', 'type': 'output', 'config': {}},
+            {'id': 'b', 'name': 'B', 'type': 'logic', 'config': {}},
+            {'id': 'a', 'name': 'A', 'type': 'logic', 'config': {}},
+            {'id': 'input-node', 'name': 'in', 'type': 'input', 'config': {}},
+        ],
+        'edges': [
+            {'source': 'a', 'target': 'b'},
+            {'source': 'input-node', 'target': 'a'},
+            {'source': 'b', 'target': 'output-node'},
+            {'source': 'a', 'target': 'missing'},
+        ],
+        'settings': {'maxTicks': 10},
+    }
+
+
+def test_plan_holds_adjacency_and_topological_order():
+    plan = compile_team_config(chain_config())
+
+    assert plan.order == ('input-node', 'a', 'b', 'output-node')
+    assert len(plan.edges) == 3  # 指向不存在节点的边被丢弃
+    a = plan.index['a']
+    assert [plan.edges[i].target for i in plan.out_edges[a]] == ['b']
+    assert [plan.edges[i].source for i in plan.in_edges[a]] == ['input-node']
+
+
+def test_plans_are_cached_by_content():
+    config = chain_config()
+    reordered = dict(reversed(list(config.items())))
+    assert get_execution_plan(config) is get_execution_plan(reordered)
+
+
+def test_invalid_settings_fail_at_compile_time():
+    config = chain_config()
+    config['nodes'].append({'id': 'x', 'name': 'X', 'type': 'agent', 'config': {'cache': 'sometimes'}})
+    with pytest.raises(ValueError):
+        compile_team_config(config)
+
+
+def test_team_is_wired_from_the_plan():
+    team = SimpleTeam(goal='hello', config=chain_config())
+
+    assert team._ordered_node_ids() == ['input-node', 'a', 'b', 'output-node']
+    assert [edge.target_node.id for edge in team.edges_by_source['a']] == ['b']
+    assert team.run() == 'hello'
@@ -0,0 +1,92 @@
+import asyncio
+import sys
+import os
+
+import pytest
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from Edges.test_baseEdge import message
+from Teams.simpleTeam import SimpleTeam
+from Teams.test_simpleTeam import node, team_config
+
+
+def chain(edge_type='STREAM', streaming_input=True, delay=0):
+    return team_config(
+        [node('drafter', systemPrompt='D'), node('reviewer', systemPrompt='R', streamingInput=streaming_input)],
+        [{'source': 'input-node', 'target': 'drafter'},
+         {'source': 'drafter', 'target': 'reviewer', 'type': edge_type, 'delay': delay},
+         {'source': 'reviewer', 'target': 'output-node'}],
+    )
+
+
+def run_recording_ticks(config, use_async=False):
+    """Run the team and return ``(output, {node_id: tick it was processed in})``."""
+    team = SimpleTeam(goal='hello', config=config)
+    ticks = {}
+    for node_id in ('drafter', 'reviewer'):
+        target = team.nodes[node_id]
+        process = target.process
+
+        def recording(target=target, process=process, node_id=node_id):
+            ticks[node_id] = target.tick
+            process()
+        target.process = recording
+        # aprocess 默认在线程中调用 process
+        target.aprocess = lambda recording=recording: asyncio.to_thread(recording)
+    output = asyncio.run(team.arun()) if use_async else team.run()
+    return output, ticks, team
+
+
+@pytest.mark.parametrize('use_async', [False, True])
+def test_stream_edge_runs_downstream_in_the_same_tick(fake_agent, use_async):
+    output, ticks, _ = run_recording_ticks(chain(), use_async)
+    assert ticks == {'drafter': 1, 'reviewer': 1}
+    assert output == 'R <- USER: D <- USER: hello'
+
+
+@pytest.mark.parametrize('config', [chain('HARD'), chain(streaming_input=False), chain(delay=1)])
+def test_other_edges_keep_the_tick_boundary(fake_agent, config):
+    output, ticks, _ = run_recording_ticks(config)
+    assert ticks['reviewer'] > ticks['drafter']
+    assert output == 'R <- USER: D <- USER: hello'
+
+
+def watch_partials(team):
+    """Record the reviewer's view of the drafter's text after every chunk."""
+    seen = []
+    reviewer = team.nodes['reviewer']
+    reviewer.on_partial_input = lambda source_id, delta, meta: seen.append(reviewer.partial_text(source_id, meta['messageIndex']))
+    return seen
+
+
+def test_partial_output_reaches_the_streaming_input_node(fake_agent):
+    team = SimpleTeam(goal='hello', config=chain())
+    seen = watch_partials(team)
+    team.run()
+
+    assert team.nodes['drafter'].stream
+    assert seen[-1] == 'D <- USER: hello'
+    # 完整消息送达后分段缓冲被清空
+    assert team.nodes['reviewer'].partial_received == {}
+
+
+def test_second_message_does_not_see_the_first(fake_agent):
+    team = SimpleTeam(goal='hello', config=chain())
+    seen = watch_partials(team)
+    team.run()
+    drafter, reviewer = team.nodes['drafter'], team.nodes['reviewer']
+    edge = next(edge for edge in team.edges.values() if edge.target_node is reviewer)
+
+    drafter.received = [message('second')]
+    drafter.process()
+    assert seen[-1] == reviewer.partial_text('drafter') == 'D <- USER: second'
+
+    edge.forward(drafter.tick)
+    assert reviewer.partial_received == {}
+
+
+def test_partials_are_not_forwarded_without_streaming_input(fake_agent):
+    _, _, team = run_recording_ticks(chain(streaming_input=False))
+    assert team.nodes['reviewer'].partial_received == {}
@@ -0,0 +1,80 @@
+import sys
+import os
+from types import SimpleNamespace
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from Teams.scheduler import ReadyQueueScheduler
+from Teams.simpleTeam import SimpleTeam
+from Teams.test_simpleTeam import fan_out
+
+
+def make_edge(edge_id, target, delay=0):
+    return SimpleNamespace(
+        edge_id=edge_id,
+        target_node=SimpleNamespace(id=target),
+        due_tick=lambda load_tick: load_tick + delay + 1,
+    )
+
+
+def test_ready_nodes_pop_in_registration_order():
+    scheduler = ReadyQueueScheduler(['a', 'b', 'c'])
+    scheduler.mark_ready('c', 1)
+    scheduler.mark_ready('a', 2)
+    scheduler.mark_ready('b', 0)  # 没有新消息不算就绪
+
+    assert scheduler.pop_ready() == ['a', 'c']
+    assert scheduler.pop_ready() == []
+    assert scheduler.pending == 3
+
+
+def test_sinks_never_become_ready_or_pending():
+    scheduler = ReadyQueueScheduler(['a', 'out'], sink_ids=['out'])
+    scheduler.mark_ready('out', 5)
+    assert scheduler.pop_ready() == []
+    assert scheduler.is_idle()
+
+
+def test_edges_are_popped_on_their_due_tick():
+    scheduler = ReadyQueueScheduler(['a', 'b'])
+    slow = make_edge('slow', 'b', delay=3)
+    fast = make_edge('fast', 'a')
+    scheduler.schedule_edge(slow, 0, 2)
+    scheduler.schedule_edge(fast, 0, 1)
+
+    assert scheduler.next_due_tick() == 1
+    assert scheduler.pop_due_edges(0) == []
+    assert scheduler.pop_due_edges(1) == [fast]
+    assert scheduler.next_due_tick() == 4
+    # 错过的tick也会被取出
+    assert scheduler.pop_due_edges(10) == [slow]
+
+
+def test_pending_counts_messages_until_processed():
+    scheduler = ReadyQueueScheduler(['a', 'b'])
+    edge = make_edge('e', 'b')
+    scheduler.schedule_edge(edge, 0, 2)
+    assert not scheduler.is_idle()
+
+    scheduler.mark_delivered(edge, 2)
+    assert scheduler.pop_ready() == ['b']
+    assert not scheduler.is_idle()
+
+    scheduler.mark_processed(2)
+    assert scheduler.is_idle()
+
+
+def test_only_nodes_with_input_are_processed(fake_agent):
+    team = SimpleTeam(goal='hello', config=fan_out(2))
+    processed = []
+    for node_id, node in team.nodes.items():
+        original = node.process
+
+        def tracked(node_id=node_id, original=original):
+            processed.append(node_id)
+            original()
+        node.process = tracked
+
+    team.run()
+    assert sorted(processed) == ['a0', 'a1', 'input-node']
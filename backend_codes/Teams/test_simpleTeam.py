@@ -0,0 +1,86 @@
+import asyncio
+import sys
+import os
+import time
+
+import pytest
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from Teams.simpleTeam import SimpleTeam
+
+
+def node(node_id, kind='agent', **config):
+    return {'id': node_id, 'name': node_id.upper(), 'type': kind, 'config': config}
+
+
+def team_config(nodes, edges, **settings):
+    nodes = [node('input-node', 'input'), node('output-node', 'output')] + nodes
+    return {'name': 'test-team', 'nodes': nodes, 'edges': edges, 'settings': {'maxTicks': 10, **settings},
+            'metadata': {'edgeDelay': 'relative'}}
+
+
+def fan_out(width, **settings):
+    nodes = [node(f'a{i}', systemPrompt=f'A{i}') for i in range(width)]
+    edges = [{'source': 'input-node', 'target': f'a{i}'} for i in range(width)]
+    edges += [{'source': f'a{i}', 'target': 'output-node'} for i in range(width)]
+    return team_config(nodes, edges, **settings)
+
+
+def test_nodes_of_a_tick_run_concurrently(fake_agent):
+    fake_agent.latency = 0.2
+    team = SimpleTeam(goal='hello', config=fan_out(4))
+    started = time.perf_counter()
+    output = team.run()
+    elapsed = time.perf_counter() - started
+
+    assert fake_agent.calls == 4
+    assert elapsed < 0.6  # 串行需要0.8s
+    assert sorted(output.splitlines()) == [f'A{i} <- USER: hello' for i in range(4)]
+
+
+def test_max_workers_bounds_tick_concurrency(fake_agent):
+    fake_agent.latency = 0.1
+    team = SimpleTeam(goal='hello', config=fan_out(4, maxWorkers=1))
+    started = time.perf_counter()
+    team.run()
+    assert time.perf_counter() - started >= 0.4
+
+
+def test_node_errors_are_raised_after_the_tick(fake_agent):
+    config = team_config(
+        [node('a'), node('g', 'logic', logicType='go-through')],
+        [{'source': 'input-node', 'target': 'a'}, {'source': 'input-node', 'target': 'g'},
+         {'source': 'a', 'target': 'output-node'}, {'source': 'g', 'target': 'output-node'}],
+    )
+    team = SimpleTeam(goal='hello', config=config)
+
+    def broken():
+        raise RuntimeError('boom')
+    team.nodes['g'].process = broken
+
+    with pytest.raises(RuntimeError, match='boom'):
+        team.run()
+    # 出错节点之外的节点仍然完成了本tick
+    assert fake_agent.calls == 1
+
+
+def test_arun_matches_run(fake_agent):
+    config = fan_out(3)
+    assert sorted(asyncio.run(SimpleTeam(goal='hello', config=config).arun()).splitlines()) == \
+        sorted(SimpleTeam(goal='hello', config=config).run().splitlines())
+
+
+def test_many_runs_share_one_event_loop(fake_agent):
+    fake_agent.latency = 0.2
+
+    async def run_all():
+        teams = [SimpleTeam(goal=f'goal {i}', config=fan_out(2)) for i in range(5)]
+        return await asyncio.gather(*(team.arun() for team in teams))
+
+    started = time.perf_counter()
+    outputs = asyncio.run(run_all())
+    assert time.perf_counter() - started < 1.0  # 串行需要2s
+    assert fake_agent.calls == 10
+    assert all(f'goal {i}' in output for i, output in enumerate(outputs))
@@ -0,0 +1,45 @@
+import sys
+import os
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from Teams.simpleTeam import SimpleTeam
+from Teams.teamPool import TeamPool
+from Teams.test_simpleTeam import fan_out
+
+
+def test_reset_team_answers_like_a_fresh_one(fake_agent):
+    config = fan_out(2)
+    team = SimpleTeam(goal='first', config=config)
+    team.run()
+    team.reset(goal='second')
+
+    assert sorted(team.run().splitlines()) == sorted(SimpleTeam(goal='second', config=config).run().splitlines())
+    # agent记忆也被清空: 第二次运行不带第一次的对话
+    assert all(payload.endswith(('first', 'second')) for payload in fake_agent.payloads)
+    assert all(len(team.nodes[f'a{i}'].agent.memory) == 2 for i in range(2))
+
+
+def test_checked_in_teams_are_reused_per_plan(fake_agent):
+    pool = TeamPool(max_idle_per_plan=1)
+    config = fan_out(2)
+    with pool.lease(config, 'one') as team:
+        first = team
+        team.run()
+    with pool.lease(config, 'two') as team:
+        assert team is first
+        assert 'two' in team.run()
+    with pool.lease(fan_out(3), 'three') as team:
+        assert team is not first
+
+    assert (pool.created, pool.reused) == (2, 1)
+
+
+def test_idle_teams_are_capped(fake_agent):
+    pool = TeamPool(max_idle_per_plan=1)
+    config = fan_out(1)
+    teams = [pool.checkout(config, 'goal') for _ in range(3)]
+    for team in teams:
+        pool.checkin(team)
+    assert len(pool._idle[teams[0].plan.key]) == 1
@@ -2,22 +2,43 @@ from camel.toolkits.function_tool import FunctionTool
 from camel.toolkits import MathToolkit, CodeExecutionToolkit
 from camel.toolkits import SearchToolkit
 
-def load_tool(tool_name): 
-    if tool_name == "math":
-        math_toolkit = MathToolkit()
-        tools = math_toolkit.get_tools()
 
-    elif tool_name == "code_executor": 
-        code_execution_toolkit = CodeExecutionToolkit()
-        tools = code_execution_toolkit.get_tools()
+def _load_math():
+    math_toolkit = MathToolkit()
+    return math_toolkit.get_tools()
 
-    elif tool_name == "wiki":
-        search_toolkit = SearchToolkit()
-        tools = [FunctionTool(search_toolkit.search_wiki)]
 
+def _load_code_executor():
+    code_execution_toolkit = CodeExecutionToolkit()
+    return code_execution_toolkit.get_tools()
 
-    elif tool_name == "bing_search":
-        search_toolkit = SearchToolkit()
-        tools = [FunctionTool(search_toolkit.search_bing)]
 
-    return tools
\ No newline at end of file
+def _load_wiki():
+    search_toolkit = SearchToolkit()
+    return [FunctionTool(search_toolkit.search_wiki)]
+
+
+def _load_bing_search():
+    search_toolkit = SearchToolkit()
+    return [FunctionTool(search_toolkit.search_bing)]
+
+
+# tool name -> loader; loaders build fresh toolkit instances on every call
+TOOL_LOADERS = {
+    "math": _load_math,
+    "code_executor": _load_code_executor,
+    "wiki": _load_wiki,
+    "bing_search": _load_bing_search,
+}
+
+
+def resolve_tool(tool_name):
+    """Return the loader for ``tool_name`` without instantiating the toolkit."""
+    try:
+        return TOOL_LOADERS[tool_name]
+    except KeyError:
+        raise ValueError(f"Unknown tool: {tool_name}") from None
+
+
+def load_tool(tool_name):
+    return resolve_tool(tool_name)()
@@ -0,0 +1,414 @@
+"""
+Synthetic-graph benchmarks for the team engine.
+
+Generates team configs of configurable size and shape, runs them through
+``SimpleTeam.run`` with a stub agent node (no LLM calls) and writes the
+measurements as JSON so runs on different commits can be diffed.
+
+Shapes
+    chain     input -> n nodes in a line -> output
+    fanout    input -> n parallel nodes -> output
+    fanin     n input nodes -> one node -> output
+    cycle     input -> ring of n nodes (closing edge delayed) -> output,
+              bounded by maxTicks
+
+Measured
+    SimpleTeam.run   ticks/sec, messages/sec, wall time, peak memory
+                     (tracemalloc), with telemetry off vs. a QueueEmitter
+    BaseEdge.deliver ns per delivered message, telemetry off vs. on
+    make_event       ns per event
+
+Usage (from backend_codes/):
+    python benchmarks/bench_team.py --shapes chain,fanout --sizes 8,64 \
+        --repeat 5 --output bench_results.json
+"""
+
+import argparse
+import contextlib
+import dataclasses
+import datetime
+import json
+import os
+import platform
+import queue
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from Edges.baseEdge import BaseEdge
+from Messages.simpleMessage import SimpleMessageCreator
+from Nodes.base_node import BaseNode
+from Nodes.logicNodes.goThroughNode import GoThroughNode
+from Teams.executionPlan import ExecutionPlan, compile_team_config
+from Teams.simpleTeam import SimpleTeam
+from telemetry import QueueEmitter, make_event
+
+SHAPES = ('chain', 'fanout', 'fanin', 'cycle')
+NODE_KINDS = ('agent', 'logic', 'mixed')
+
+
+class StubAgentNode(BaseNode):
+    """Agent stand-in: answers every received message with a new message.
+
+    Emits the same processing events as AgentNode so telemetry costs are
+    comparable, and can sleep ``latency`` seconds per message to mimic a model.
+    """
+
+    def __init__(self, name: str, id=None, emit=None, run_id=None, team_id=None, latency: float = 0.0):
+        super().__init__(name, id, emit=emit, run_id=run_id, team_id=team_id)
+        self.type = "Stub_Agent-Node"
+        self.latency = latency
+
+    def receive(self, input_data):
+        self.received.extend([input_data] if not isinstance(input_data, list) else input_data)
+
+    def process(self):
+        if not self.received:
+            return
+        try:
+            self.emit({
+                'type': 'node.processing.started',
+                'runId': self.run_id,
+                'teamId': self.team_id,
+                'node': {'id': self.id, 'name': self.name},
+                'meta': {'receivedCount': len(self.received)},
+            })
+        except Exception:
+            pass
+        produced_from = len(self.processed)
+        for message in self.received:
+            if self.latency:
+                time.sleep(self.latency)
+            self.processed.append(SimpleMessageCreator().create_message(
+                content=f"{self.name}: {(getattr(message, 'content', '') or '')[:200]}",
+                maker=self.name,
+                target_agent='stage_manager',
+            ))
+        try:
+            self.emit({
+                'type': 'node.processing.finished',
+                'runId': self.run_id,
+                'teamId': self.team_id,
+                'node': {'id': self.id, 'name': self.name},
+                'messages': [{
+                    'maker': m.maker,
+                    'target': m.target_agent,
+                    'timetag': m.timetag,
+                    'preview': (m.content or '')[:120],
+                    'attachments': m.attachments,
+                } for m in self.processed[produced_from:]],
+                'meta': {'producedCount': len(self.processed) - produced_from},
+            })
+        except Exception:
+            pass
+
+
+# ---- config generation -------------------------------------------------------
+def _node(node_id: str, index: int, node_kind: str) -> Dict[str, Any]:
+    kind = node_kind if node_kind != 'mixed' else ('agent' if index % 2 == 0 else 'logic')
+    if kind == 'agent':
+        return {'id': node_id, 'name': node_id, 'type': 'agent', 'config': {'model': 'stub'}}
+    return {'id': node_id, 'name': node_id, 'type': 'logic', 'config': {'logicType': 'go-through'}}
+
+
+def _edge(source: str, target: str, delay: int = 0) -> Dict[str, Any]:
+    return {'source': source, 'target': target, 'type': 'HARD', 'delay': delay}
+
+
+def make_config(shape: str, size: int, node_kind: str = 'mixed', delay: int = 1,
+                max_ticks: int = 0, max_workers: int = 8) -> Dict[str, Any]:
+    """Build a team config of the given ``shape`` with ``size`` worker nodes."""
+    size = max(1, size)
+    workers = [f"n{i}" for i in range(size)]
+    nodes = [_node(node_id, i, node_kind) for i, node_id in enumerate(workers)]
+    edges: List[Dict[str, Any]] = []
+    inputs = ['input']
+
+    if shape == 'chain':
+        edges.append(_edge('input', workers[0]))
+        edges.extend(_edge(a, b) for a, b in zip(workers, workers[1:]))
+        edges.append(_edge(workers[-1], 'output'))
+    elif shape == 'fanout':
+        edges.extend(_edge('input', node_id) for node_id in workers)
+        edges.extend(_edge(node_id, 'output') for node_id in workers)
+    elif shape == 'fanin':
+        inputs = [f"input{i}" for i in range(size)]
+        nodes = [_node('sink', 0, node_kind)]
+        edges.extend(_edge(input_id, 'sink') for input_id in inputs)
+        edges.append(_edge('sink', 'output'))
+    elif shape == 'cycle':
+        edges.append(_edge('input', workers[0]))
+        edges.extend(_edge(a, b) for a, b in zip(workers, workers[1:]))
+        edges.append(_edge(workers[-1], workers[0], delay))
+        edges.append(_edge(workers[-1], 'output'))
+        # 环上的消息永远不会耗尽，必须用tick上限结束
+        max_ticks = max_ticks or 4 * size * (delay + 1)
+    else:
+        raise ValueError(f"Unknown shape: {shape}")
+
+    nodes = (
+        [{'id': input_id, 'name': input_id, 'type': 'input'} for input_id in inputs]
+        + nodes
+        + [{'id': 'output', 'name': 'output', 'type': 'output'}]
+    )
+    return {
+        'name': f"bench-{shape}-{size}",
+        'nodes': nodes,
+        'edges': edges,
+        'settings': {'maxTicks': max_ticks, 'maxWorkers': max_workers},
+    }
+
+
+def stub_plan(config: Dict[str, Any], latency: float = 0.0) -> ExecutionPlan:
+    """Compile ``config`` with every agent node replaced by :class:`StubAgentNode`."""
+
+    def build_stub(spec, team):
+        return StubAgentNode(
+            name=spec.name,
+            id=spec.id,
+            emit=team.emit,
+            run_id=team.run_id,
+            team_id=team.team_id,
+            latency=latency,
+        )
+
+    plan = compile_team_config(config)
+    nodes = tuple(
+        dataclasses.replace(spec, factory=build_stub) if spec.kind == 'agent' else spec
+        for spec in plan.nodes
+    )
+    return dataclasses.replace(plan, nodes=nodes)
+
+
+# ---- measurement -------------------------------------------------------------
+@contextlib.contextmanager
+def _silenced(enabled: bool = True):
+    """The engine prints on every tick; keep that out of the numbers and the terminal."""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+        yield
+
+
+def _instrument(team: SimpleTeam) -> Dict[str, int]:
+    """Count ticks and delivered messages on this team instance only."""
+    counters = {'ticks': 0, 'messages': 0}
+    begin_tick = team._begin_tick
+    mark_delivered = team.scheduler.mark_delivered
+
+    def counting_begin_tick(current_tick):
+        counters['ticks'] += 1
+        return begin_tick(current_tick)
+
+    def counting_mark_delivered(edge, count):
+        counters['messages'] += max(0, count)
+        return mark_delivered(edge, count)
+
+    team._begin_tick = counting_begin_tick
+    team.scheduler.mark_delivered = counting_mark_delivered
+    return counters
+
+
+def _make_emit(telemetry: str):
+    if telemetry == 'off':
+        return None, None
+    sink = queue.Queue()
+    return QueueEmitter(sink), sink
+
+
+def run_once(config: Dict[str, Any], plan: ExecutionPlan, telemetry: str, trace_memory: bool = False) -> Dict[str, Any]:
+    emit, sink = _make_emit(telemetry)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        team = SimpleTeam(goal='benchmark goal', config=config, emit=emit, run_id='bench', plan=plan)
+        built = time.perf_counter()
+        counters = _instrument(team)
+        team.run()
+        finished = time.perf_counter()
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    run_seconds = finished - built
+    result = {
+        'buildSeconds': built - started,
+        'runSeconds': run_seconds,
+        'ticks': counters['ticks'],
+        'messages': counters['messages'],
+        'ticksPerSec': counters['ticks'] / run_seconds if run_seconds else None,
+        'messagesPerSec': counters['messages'] / run_seconds if run_seconds else None,
+        'events': sink.qsize() if sink is not None else 0,
+    }
+    if peak is not None:
+        result['peakMemoryBytes'] = peak
+    return result
+
+
+def _summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    run_times = [s['runSeconds'] for s in samples]
+    best = min(samples, key=lambda s: s['runSeconds'])
+    return {
+        'repeat': len(samples),
+        'runSecondsMedian': statistics.median(run_times),
+        'runSecondsMin': min(run_times),
+        'buildSecondsMedian': statistics.median(s['buildSeconds'] for s in samples),
+        'ticks': best['ticks'],
+        'messages': best['messages'],
+        'events': best['events'],
+        'ticksPerSec': best['ticksPerSec'],
+        'messagesPerSec': best['messagesPerSec'],
+    }
+
+
+def bench_team(shape: str, size: int, args) -> Dict[str, Any]:
+    config = make_config(shape, size, node_kind=args.node_kind, delay=args.delay,
+                         max_ticks=args.max_ticks, max_workers=args.max_workers)
+    plan = stub_plan(config, latency=args.latency)
+
+    result: Dict[str, Any] = {'shape': shape, 'size': size, 'nodeKind': args.node_kind}
+    with _silenced(not args.verbose):
+        for telemetry in ('off', 'queue'):
+            for _ in range(args.warmup):
+                run_once(config, plan, telemetry)
+            samples = [run_once(config, plan, telemetry) for _ in range(args.repeat)]
+            result[f"telemetry_{telemetry}"] = _summarize(samples)
+        result['peakMemoryBytes'] = run_once(config, plan, 'off', trace_memory=True)['peakMemoryBytes']
+
+    off = result['telemetry_off']['runSecondsMedian']
+    on = result['telemetry_queue']['runSecondsMedian']
+    result['telemetryOverheadPct'] = (on - off) / off * 100 if off else None
+    return result
+
+
+def _time_per_op(fn: Callable[[], int], repeat: int) -> float:
+    """Best-of-``repeat`` nanoseconds per operation; ``fn`` returns its op count."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        ops = fn()
+        elapsed = (time.perf_counter_ns() - started) / max(1, ops)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_edge_deliver(batch: int, repeat: int) -> Dict[str, Any]:
+    """Cost of moving ``batch`` messages across one edge, per message."""
+    creator = SimpleMessageCreator()
+    messages = [creator.create_message(content=f"message {i}", maker='bench') for i in range(batch)]
+
+    def measure(emit) -> float:
+        source = GoThroughNode('source', id='source')
+        target = GoThroughNode('target', id='target')
+        edge = BaseEdge(source, target, emit=emit, run_id='bench')
+
+        def one_round() -> int:
+            source.processed.extend(messages)
+            edge.load(0)
+            delivered = edge.deliver(1)
+            target.received = []
+            return delivered
+
+        return _time_per_op(one_round, repeat)
+
+    emit, _ = _make_emit('queue')
+    off = measure(None)
+    on = measure(emit)
+    return {
+        'batch': batch,
+        'nsPerMessageTelemetryOff': off,
+        'nsPerMessageTelemetryQueue': on,
+        'telemetryOverheadPct': (on - off) / off * 100 if off else None,
+    }
+
+
+def bench_make_event(count: int, repeat: int) -> Dict[str, Any]:
+    def many() -> int:
+        for i in range(count):
+            make_event('node.processing.started', 'bench', 'team', node={'id': 'n', 'name': 'n'}, meta={'i': i})
+        return count
+
+    return {'count': count, 'nsPerEvent': _time_per_op(many, repeat)}
+
+
+# ---- entry point -------------------------------------------------------------
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _csv(value: str, cast=str) -> List[Any]:
+    return [cast(item) for item in value.split(',') if item.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SimpleTeam engine on synthetic graphs.")
+    parser.add_argument('--shapes', default=','.join(SHAPES), help="comma separated: " + ', '.join(SHAPES))
+    parser.add_argument('--sizes', default='4,32,128', help="comma separated worker-node counts")
+    parser.add_argument('--node-kind', default='mixed', choices=NODE_KINDS,
+                        help="worker nodes: stub agents, go-through logic nodes, or alternating")
+    parser.add_argument('--delay', type=int, default=1, help="delay of the edge closing a cycle")
+    parser.add_argument('--max-ticks', type=int, default=0, help="maxTicks (0: until stable; cycles get a default)")
+    parser.add_argument('--max-workers', type=int, default=8, help="settings.maxWorkers")
+    parser.add_argument('--latency', type=float, default=0.0, help="simulated seconds per stub agent call")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--edge-batch', type=int, default=1000, help="messages per BaseEdge.deliver round")
+    parser.add_argument('--events', type=int, default=100000, help="make_event calls per round")
+    parser.add_argument('--output', help="write JSON results to this file (default: stdout)")
+    parser.add_argument('--verbose', action='store_true', help="keep the engine's own prints")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> Dict[str, Any]:
+    args = parse_args(argv)
+    shapes = _csv(args.shapes)
+    for shape in shapes:
+        if shape not in SHAPES:
+            raise SystemExit(f"Unknown shape: {shape}")
+
+    results: Dict[str, Any] = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': vars(args),
+        },
+        'team': [],
+    }
+    for shape in shapes:
+        for size in _csv(args.sizes, int):
+            print(f"[bench] {shape} x {size} ...", file=sys.stderr)
+            results['team'].append(bench_team(shape, size, args))
+
+    with _silenced(not args.verbose):
+        results['edgeDeliver'] = bench_edge_deliver(args.edge_batch, args.repeat)
+        results['makeEvent'] = bench_make_event(args.events, args.repeat)
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            handle.write(text + '\n')
+        print(f"[bench] results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return results
+
+
+if __name__ == "__main__":
+    main()
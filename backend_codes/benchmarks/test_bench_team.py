@@ -0,0 +1,35 @@
+import json
+import sys
+import os
+
+import pytest
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from benchmarks.bench_team import SHAPES, main, make_config, run_once, stub_plan
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+def test_every_shape_runs_to_completion(shape):
+    config = make_config(shape, 4)
+    result = run_once(config, stub_plan(config), 'queue')
+
+    assert result['ticks'] > 0
+    assert result['messages'] > 0
+    assert result['events'] > 0
+
+
+def test_unknown_shape_is_rejected():
+    with pytest.raises(ValueError):
+        make_config('star', 4)
+
+
+def test_main_writes_json_results(tmp_path):
+    output = tmp_path / 'bench.json'
+    main(['--shapes', 'chain,fanout', '--sizes', '2', '--repeat', '1', '--warmup', '0',
+          '--edge-batch', '10', '--events', '10', '--output', str(output)])
+
+    results = json.loads(output.read_text())
+    assert [(r['shape'], r['size']) for r in results['team']] == [('chain', 2), ('fanout', 2)]
+    assert results['edgeDeliver'] and results['makeEvent']
@@ -0,0 +1,110 @@
+"""Shared pytest fixtures: an offline stand-in for camel's ChatAgent and a clean model-call layer per test."""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# 把项目根目录加入搜索路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import model_calls
+from llm_cache import ResponseCache, set_response_cache
+from model_governor import reset_governor
+
+
+class _Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class _Response:
+    def __init__(self, content):
+        self.msgs = [_Message(content)]
+
+
+class FakeChatAgent:
+    """Answers ``"<system prompt> <- <first payload line>"`` after ``latency`` seconds.
+
+    Every instance (clones included) counts its calls in ``FakeChatAgent.calls``
+    and keeps the exchanges it has seen in ``memory``.
+    """
+
+    latency = 0.0
+    calls = 0
+    payloads = []
+    fail_on = None  # 包含该子串的payload抛出异常
+    _lock = threading.Lock()
+
+    def __init__(self, model=None, system_message=None, tools=None, **kwargs):
+        self.model = model
+        self.system_message = system_message
+        self.tools = tools
+        self.memory = []
+
+    def _answer(self, payload):
+        with FakeChatAgent._lock:
+            FakeChatAgent.calls += 1
+            FakeChatAgent.payloads.append(payload)
+        if FakeChatAgent.fail_on and FakeChatAgent.fail_on in payload:
+            raise RuntimeError(f"fake failure on {payload!r}")
+        answer = f"{self.system_message} <- {payload.splitlines()[0] if payload else ''}"
+        self.memory.extend([('user', payload), ('assistant', answer)])
+        return _Response(answer)
+
+    def step(self, payload):
+        if FakeChatAgent.latency:
+            time.sleep(FakeChatAgent.latency)
+        return self._answer(payload)
+
+    async def astep(self, payload):
+        import asyncio
+        if FakeChatAgent.latency:
+            await asyncio.sleep(FakeChatAgent.latency)
+        return self._answer(payload)
+
+    def clone(self, with_memory=False):
+        copy = FakeChatAgent(self.model, self.system_message, self.tools)
+        if with_memory:
+            copy.memory = list(self.memory)
+        return copy
+
+    def update_memory(self, message, role):
+        self.memory.append((getattr(role, 'value', str(role)), getattr(message, 'content', message)))
+
+    def reset(self):
+        self.memory = []
+
+
+@pytest.fixture
+def fake_agent(monkeypatch):
+    """Replace ChatAgent in every node module with :class:`FakeChatAgent`."""
+    import Nodes.processorNodes.agent_node as agent_node
+    import Nodes.stageNodes.taskTeamStage as task_team_stage
+    FakeChatAgent.latency = 0.0
+    FakeChatAgent.calls = 0
+    FakeChatAgent.payloads = []
+    FakeChatAgent.fail_on = None
+    monkeypatch.setattr(agent_node, 'ChatAgent', FakeChatAgent)
+    monkeypatch.setattr(task_team_stage, 'ChatAgent', FakeChatAgent)
+    return FakeChatAgent
+
+
+@pytest.fixture(autouse=True)
+def clean_model_layer(monkeypatch):
+    """Live backend, memory-only cache, no governor limits and fresh single-flight/latency state."""
+    monkeypatch.setattr(model_calls, '_backend', model_calls.LiveBackend())
+    monkeypatch.setattr(model_calls, '_singleflight', model_calls.SingleFlight())
+    monkeypatch.setattr(model_calls, '_latency', model_calls.LatencyTracker())
+    monkeypatch.setattr(model_calls, '_hedge_stats', model_calls.HedgeStats())
+    set_response_cache(ResponseCache())
+    reset_governor()
+    yield
+    # 被放弃的尝试(超时/对冲失败)在后台结束，不让它们计入下一个测试
+    for thread in threading.enumerate():
+        if thread.name.startswith('model-attempt'):
+            thread.join(timeout=5)
+    set_response_cache(None)
+    reset_governor()
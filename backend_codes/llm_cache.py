@@ -0,0 +1,262 @@
+"""
+Opt-in LLM response cache.
+
+Responses are keyed on :meth:`model_calls.ModelRequest.key`, i.e. on model,
+system prompt, rendered payload and call parameters (temperature, tools
+signature, conversation digest, ...). Two tiers:
+
+    memory  bounded LRU (OrderedDict), per process
+    sqlite  optional on-disk tier shared across processes/restarts, with TTL
+            and size-based eviction (entry count and total bytes)
+
+Callers opt in per call with a cache mode:
+
+    off        bypass the cache (default)
+    read       serve hits, never store
+    readwrite  serve hits and store fresh responses
+
+Configure the process-wide cache through the environment:
+
+    ARCHUB_LLM_CACHE=path/to/llm_cache.sqlite   (unset: memory tier only)
+    ARCHUB_LLM_CACHE_TTL=<seconds>              (default 7 days, 0 = no expiry)
+    ARCHUB_LLM_CACHE_MAX_ENTRIES=<n>            (sqlite tier, default 50000)
+    ARCHUB_LLM_CACHE_MAX_BYTES=<n>              (sqlite tier, default 256 MiB)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+CACHE_MODES = ('off', 'read', 'readwrite')
+
+DEFAULT_MEMORY_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# 每写入这么多次才做一次过期/容量清理，避免每次写都扫表
+PURGE_EVERY = 256
+
+_MISSING = object()
+
+
+def normalize_cache_mode(mode: Any) -> str:
+    """Map a config value (``None``/bool/str) to one of :data:`CACHE_MODES`."""
+    if mode is None or mode is False:
+        return 'off'
+    if mode is True:
+        return 'readwrite'
+    value = str(mode).strip().lower().replace('-', '').replace('_', '')
+    if value in ('', 'off', 'none', 'false'):
+        return 'off'
+    if value in ('read', 'readonly'):
+        return 'read'
+    if value in ('readwrite', 'rw', 'on', 'true'):
+        return 'readwrite'
+    raise ValueError(f"Unknown cache mode: {mode} (expected one of {', '.join(CACHE_MODES)})")
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + optional SQLite) response cache.
+
+    Args:
+        path: SQLite file for the persistent tier; ``None`` keeps memory only.
+        memory_entries: Capacity of the in-memory LRU tier.
+        ttl: Seconds an entry stays valid; ``0``/``None`` disables expiry.
+        max_entries: Entry limit of the SQLite tier (least recently used go first).
+        max_bytes: Byte limit of the stored responses in the SQLite tier.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike | None = None,
+        *,
+        memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+        ttl: float | None = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.path = Path(path) if path else None
+        self.memory_entries = max(0, memory_entries)
+        self.ttl = ttl or None
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        if self.path is not None:
+            self._open()
+
+    # ---- sqlite tier -------------------------------------------------------
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY,'
+            ' response TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' created REAL NOT NULL,'
+            ' accessed REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed)')
+        self._db.commit()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _db_get(self, key: str, now: float) -> Any:
+        row = self._db.execute('SELECT response, created FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return _MISSING
+        if self._expired(row[1], now):
+            self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self._db.commit()
+            self.evictions += 1
+            return _MISSING
+        self._db.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+        self._db.commit()
+        return json.loads(row[0]), row[1]
+
+    def _db_put(self, key: str, response: Any, now: float) -> None:
+        encoded = json.dumps(response, ensure_ascii=False, default=str)
+        self._db.execute(
+            'INSERT OR REPLACE INTO responses (key, response, size, created, accessed) VALUES (?, ?, ?, ?, ?)',
+            (key, encoded, len(encoded.encode('utf-8')), now, now),
+        )
+        self._db.commit()
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            self._purge(now)
+
+    def _purge(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones beyond the limits."""
+        removed = 0
+        if self.ttl is not None:
+            removed += self._db.execute('DELETE FROM responses WHERE created < ?', (now - self.ttl,)).rowcount
+        count, total = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        if self.max_entries and count > self.max_entries:
+            removed += self._db.execute(
+                'DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed LIMIT ?)',
+                (count - self.max_entries,),
+            ).rowcount
+        if self.max_bytes and total > self.max_bytes:
+            excess = total - self.max_bytes
+            freed = 0
+            stale = []
+            for key, size in self._db.execute('SELECT key, size FROM responses ORDER BY accessed'):
+                if freed >= excess:
+                    break
+                stale.append((key,))
+                freed += size
+            removed += len(stale)
+            self._db.executemany('DELETE FROM responses WHERE key = ?', stale)
+        self._db.commit()
+        self.evictions += removed
+
+    # ---- memory tier -------------------------------------------------------
+    def _memory_put(self, key: str, created: float, response: Any) -> None:
+        if not self.memory_entries:
+            return
+        self._memory[key] = (created, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    # ---- public interface --------------------------------------------------
+    def get(self, key: str, default: Any = None) -> Any:
+        """Cached response for ``key`` or ``default``; updates hit/miss counters."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+            if self._db is not None:
+                found = self._db_get(key, now)
+                if found is not _MISSING:
+                    response, created = found
+                    self._memory_put(key, created, response)
+                    self.hits += 1
+                    return response
+
+            self.misses += 1
+            return default
+
+    def put(self, key: str, response: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._memory_put(key, now, response)
+            if self._db is not None:
+                self._db_put(key, response, now)
+            self.stores += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM responses')
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'memoryHits': self.memory_hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'hitRate': self.hits / lookups if lookups else 0.0,
+            'memoryEntries': len(self._memory),
+            'persistent': self.path is not None,
+        }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """The process-wide cache, created from the environment on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    os.environ.get('ARCHUB_LLM_CACHE') or None,
+                    ttl=float(os.environ.get('ARCHUB_LLM_CACHE_TTL', DEFAULT_TTL_SECONDS)),
+                    max_entries=int(os.environ.get('ARCHUB_LLM_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+                    max_bytes=int(os.environ.get('ARCHUB_LLM_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+                )
+    return _cache
+
+
+def set_response_cache(cache: Optional[ResponseCache]) -> None:
+    """Install the process-wide cache (``None``: rebuild from the environment on next use)."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
@@ -0,0 +1,687 @@
+"""
+Pluggable model-call layer shared by every node that talks to an LLM.
+
+Nodes describe each call as a :class:`ModelRequest` and hand the layer a
+zero-argument callable that performs the real provider call. The active
+backend decides what happens:
+
+    LiveBackend      call the provider (default)
+    CassetteBackend  record request/response pairs to an on-disk cassette, or
+                     replay them offline with optional simulated latency
+
+Select a cassette without code changes through the environment:
+
+    ARCHUB_MODEL_CASSETTE=bench/cassettes/searchqa.jsonl
+    ARCHUB_MODEL_MODE=record | replay
+    ARCHUB_MODEL_REPLAY_LATENCY=recorded | <seconds>   (replay only, default 0)
+
+Independently of the backend, a call may opt into the response cache
+(:mod:`llm_cache`) with ``cache="read"`` or ``cache="readwrite"``; hits skip
+the backend entirely. Identical requests that are in flight at the same time
+share one backend call (single-flight, disable with ARCHUB_MODEL_SINGLEFLIGHT=0).
+Calls that actually reach the provider first take a slot from the per-model
+governor (:mod:`model_governor`).
+
+Live calls can carry a ``deadline`` (absolute ``time.monotonic()``) and a hedge
+policy: if the call has not returned after the model's recent p95 latency (or
+a fixed delay), a second attempt is fired and the first response wins. A
+deadline alone only keeps calls from starting (or taking a governor slot) once
+it has passed; with ``hard_deadline=True`` a call still running at the deadline
+is abandoned as well. Hedged and hard-deadline calls must therefore be safe to
+run twice at once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+
+from llm_cache import get_response_cache, normalize_cache_mode
+from model_governor import estimate_tokens, get_governor
+
+
+@dataclass(frozen=True)
+class ModelRequest:
+    """Everything that determines a model response, in hashable form."""
+    kind: str
+    model: str
+    system_prompt: str
+    payload: str
+    params: Tuple[Tuple[str, Any], ...] = field(default_factory=tuple)
+
+    @classmethod
+    def build(cls, kind: str, model: Any, system_prompt: Any, payload: Any, **params: Any) -> "ModelRequest":
+        return cls(
+            kind=kind,
+            model=str(model),
+            system_prompt=str(system_prompt or ''),
+            payload=str(payload or ''),
+            params=tuple(sorted((k, v) for k, v in params.items() if v is not None)),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'kind': self.kind,
+            'model': self.model,
+            'systemPrompt': self.system_prompt,
+            'payload': self.payload,
+            'params': dict(self.params),
+        }
+
+    def key(self) -> str:
+        canonical = json.dumps(self.to_dict(), sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class CassetteMissError(KeyError):
+    """Replay was asked for a request that the cassette never recorded."""
+
+
+class LiveBackend:
+    """Send every request to the provider."""
+
+    def complete(self, request: ModelRequest, call: Callable[[], Any]) -> Any:
+        return call()
+
+    async def acomplete(self, request: ModelRequest, acall: Callable[[], Awaitable[Any]]) -> Any:
+        return await acall()
+
+
+class CassetteBackend:
+    """Record model responses to a JSONL cassette, or replay them.
+
+    Each line holds ``{key, request, response, latencyMs, recordedAt}``. On load
+    the file is indexed by request key; identical requests recorded several
+    times are replayed in recording order (the last one repeats).
+
+    Args:
+        path: Cassette file.
+        mode: ``"record"`` (call through and append) or ``"replay"``.
+        latency: Replay delay: seconds, or ``"recorded"`` to reuse the recorded
+            latency of each response.
+        latency_scale: Multiplier applied to the replay delay.
+        fallback_live: On a replay miss, call the provider instead of raising.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        mode: str = 'replay',
+        *,
+        latency: float | str = 0.0,
+        latency_scale: float = 1.0,
+        fallback_live: bool = False,
+    ):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.fallback_live = fallback_live
+        self._lock = threading.Lock()
+        self._index: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            if self.mode == 'replay' and not self.fallback_live:
+                raise FileNotFoundError(f"Cassette not found: {self.path}")
+            return
+        with self.path.open('r', encoding='utf-8') as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                self._index.setdefault(record['key'], []).append(record)
+
+    def __len__(self) -> int:
+        return sum(len(records) for records in self._index.values())
+
+    # ---- replay ------------------------------------------------------------
+    def _next_record(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            records = self._index.get(key)
+            if not records:
+                self.misses += 1
+                return None
+            position = self._cursor.get(key, 0)
+            self._cursor[key] = position + 1
+            self.hits += 1
+            return records[min(position, len(records) - 1)]
+
+    def _replay_delay(self, record: Dict[str, Any]) -> float:
+        if self.latency == 'recorded':
+            delay = (record.get('latencyMs') or 0) / 1000.0
+        else:
+            delay = float(self.latency or 0.0)
+        return max(0.0, delay * self.latency_scale)
+
+    # ---- record ------------------------------------------------------------
+    def _append(self, request: ModelRequest, response: Any, latency_ms: int) -> None:
+        record = {
+            'key': request.key(),
+            'request': request.to_dict(),
+            'response': response,
+            'latencyMs': latency_ms,
+            'recordedAt': time.time(),
+        }
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open('a', encoding='utf-8') as handle:
+                handle.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            self._index.setdefault(record['key'], []).append(record)
+
+    # ---- backend interface -------------------------------------------------
+    def complete(self, request: ModelRequest, call: Callable[[], Any]) -> Any:
+        if self.mode == 'replay':
+            record = self._next_record(request.key())
+            if record is not None:
+                delay = self._replay_delay(record)
+                if delay:
+                    time.sleep(delay)
+                return record['response']
+            if not self.fallback_live:
+                raise CassetteMissError(f"No cassette entry for {request.kind} call to {request.model}")
+
+        started = time.perf_counter()
+        response = call()
+        self._append(request, response, int((time.perf_counter() - started) * 1000))
+        return response
+
+    async def acomplete(self, request: ModelRequest, acall: Callable[[], Awaitable[Any]]) -> Any:
+        if self.mode == 'replay':
+            record = self._next_record(request.key())
+            if record is not None:
+                delay = self._replay_delay(record)
+                if delay:
+                    await asyncio.sleep(delay)
+                return record['response']
+            if not self.fallback_live:
+                raise CassetteMissError(f"No cassette entry for {request.kind} call to {request.model}")
+
+        started = time.perf_counter()
+        response = await acall()
+        await asyncio.to_thread(self._append, request, response, int((time.perf_counter() - started) * 1000))
+        return response
+
+
+_backend: Any = LiveBackend()
+
+
+def get_backend():
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """Install the process-wide backend (``None`` restores the live backend)."""
+    global _backend
+    _backend = backend if backend is not None else LiveBackend()
+
+
+def configure_from_env() -> None:
+    cassette = os.environ.get('ARCHUB_MODEL_CASSETTE')
+    if not cassette:
+        return
+    latency: float | str = os.environ.get('ARCHUB_MODEL_REPLAY_LATENCY', '0')
+    if latency != 'recorded':
+        latency = float(latency)
+    set_backend(CassetteBackend(
+        cassette,
+        mode=os.environ.get('ARCHUB_MODEL_MODE', 'replay'),
+        latency=latency,
+    ))
+
+
+class DeadlineExceeded(TimeoutError):
+    """A model call did not finish before its node/run deadline."""
+
+
+# ---- latency tracking & hedging -----------------------------------------------
+# 每个模型保留的最近延迟样本数
+LATENCY_WINDOW = 200
+
+
+class LatencyTracker:
+    """Rolling window of successful live-call latencies per model."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[model].append(seconds)
+
+    def count(self, model: str) -> int:
+        return len(self._samples.get(model, ()))
+
+    def percentile(self, model: str, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """When to fire a second attempt.
+
+    ``after`` is a fixed delay in seconds, or ``None`` to use the model's
+    ``percentile`` latency once ``min_samples`` calls have been observed.
+    """
+    after: Optional[float] = None
+    percentile: float = 0.95
+    min_samples: int = 20
+
+    @classmethod
+    def from_config(cls, value: Any) -> Optional["HedgePolicy"]:
+        """``true`` / ``"p95"`` / seconds / ``{"after": ..., "minSamples": ...}``; falsy disables."""
+        if not value:
+            return None
+        if value is True:
+            return cls()
+        try:
+            if isinstance(value, (int, float)):
+                return cls(after=float(value))
+            if isinstance(value, str):
+                return cls._parse_after(value, cls())
+            if isinstance(value, Mapping):
+                base = cls(min_samples=int(value.get('minSamples', 20)))
+                return cls._parse_after(value.get('after', 'p95'), base)
+        except (TypeError, ValueError):
+            pass
+        raise ValueError(f"Invalid hedge setting: {value!r} (expected true, 'p95', seconds or {{'after': ...}})")
+
+    @classmethod
+    def _parse_after(cls, after: Any, base: "HedgePolicy") -> "HedgePolicy":
+        if isinstance(after, str) and after.lower().startswith('p'):
+            return cls(percentile=float(after[1:]) / 100.0, min_samples=base.min_samples)
+        return cls(after=float(after), min_samples=base.min_samples)
+
+    def delay(self, model: str, tracker: LatencyTracker) -> Optional[float]:
+        if self.after is not None:
+            return self.after
+        if tracker.count(model) < self.min_samples:
+            return None
+        return tracker.percentile(model, self.percentile)
+
+
+class HedgeStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.fired = 0
+        self.won = 0
+        self.deadlines = 0
+
+    def record(self, fired: bool = False, won: bool = False, deadline: bool = False) -> None:
+        with self._lock:
+            self.fired += fired
+            self.won += won
+            self.deadlines += deadline
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'hedgesFired': self.fired,
+            'hedgesWon': self.won,
+            'hedgeWinRate': self.won / self.fired if self.fired else 0.0,
+            'deadlinesExceeded': self.deadlines,
+        }
+
+
+_latency = LatencyTracker()
+_hedge_stats = HedgeStats()
+# 同步调用最多同时有主请求和对冲请求两次尝试
+ATTEMPTS_PER_CALL = 2
+
+
+def get_latency_tracker() -> LatencyTracker:
+    return _latency
+
+
+def hedge_stats() -> Dict[str, Any]:
+    return _hedge_stats.stats()
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _min_timeout(*values: Optional[float]) -> Optional[float]:
+    present = [max(0.0, v) for v in values if v is not None]
+    return min(present) if present else None
+
+
+def _expired(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def _deadline_error(request: "ModelRequest") -> DeadlineExceeded:
+    _hedge_stats.record(deadline=True)
+    return DeadlineExceeded(f"{request.kind} call to {request.model} exceeded its deadline")
+
+
+def _report_hedge(on_hedge, won: bool, delay: float) -> None:
+    _hedge_stats.record(fired=True, won=won)
+    if on_hedge is not None:
+        on_hedge({'won': won, 'delayMs': round(delay * 1000, 3), **_hedge_stats.stats()})
+
+
+def _check_start(request: "ModelRequest", deadline, abandoned: Optional[threading.Event] = None) -> None:
+    """Refuse to start a provider call whose attempt was abandoned or whose deadline has passed."""
+    if abandoned is not None and abandoned.is_set():
+        raise DeadlineExceeded(f"{request.kind} call to {request.model} was abandoned")
+    if _expired(deadline):
+        raise _deadline_error(request)
+
+
+def _attempts(request: "ModelRequest", call: Callable[..., Any], deadline, hedge: Optional[HedgePolicy], on_hedge, hard_deadline: bool = False) -> Callable[[], Any]:
+    """Wrap a governed ``call`` with deadline enforcement and optional hedging (sync).
+
+    Only hedged and hard-deadline calls leave the calling thread. Their
+    attempts run on an executor of their own, so attempt threads scale with
+    the callers (the team's ``maxWorkers``) instead of sharing a fixed pool.
+    An attempt that loses the race or outlives the deadline is abandoned and
+    finishes in the background; if it is still queued for its governor slot
+    it never starts the provider call.
+    """
+    if hedge is None and not (hard_deadline and deadline is not None):
+        return call
+
+    def run_attempts():
+        if _expired(deadline):
+            raise _deadline_error(request)
+        delay = hedge.delay(request.model, _latency) if hedge is not None else None
+        abandoned = threading.Event()
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=ATTEMPTS_PER_CALL, thread_name_prefix="model-attempt")
+        try:
+            futures = {executor.submit(call, abandoned): 'primary'}
+            done, _ = concurrent.futures.wait(futures, timeout=_min_timeout(delay, _remaining(deadline)))
+            if not done and delay is not None and not _expired(deadline):
+                futures[executor.submit(call, abandoned)] = 'hedge'
+            error = None
+            while futures:
+                done, _ = concurrent.futures.wait(
+                    futures, timeout=_remaining(deadline), return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                if not done:
+                    raise _deadline_error(request)
+                for future in done:
+                    role = futures.pop(future)
+                    if future.exception() is not None:
+                        error = future.exception()
+                        continue
+                    if role == 'hedge' or futures:
+                        _report_hedge(on_hedge, role == 'hedge', delay)
+                    return future.result()
+            raise error
+        finally:
+            abandoned.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return run_attempts
+
+
+def _aattempts(request: "ModelRequest", acall: Callable[[], Awaitable[Any]], deadline, hedge: Optional[HedgePolicy], on_hedge, hard_deadline: bool = False) -> Callable[[], Awaitable[Any]]:
+    """Async counterpart of :func:`_attempts`; losing attempts are cancelled."""
+    if hedge is None and not (hard_deadline and deadline is not None):
+        return acall
+
+    async def run_attempts():
+        if _expired(deadline):
+            raise _deadline_error(request)
+        delay = hedge.delay(request.model, _latency) if hedge is not None else None
+        tasks = {asyncio.ensure_future(acall()): 'primary'}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=_min_timeout(delay, _remaining(deadline)))
+            if not done and delay is not None and not _expired(deadline):
+                tasks[asyncio.ensure_future(acall())] = 'hedge'
+            error = None
+            while tasks:
+                done, _ = await asyncio.wait(
+                    tasks, timeout=_min_timeout(_remaining(deadline)), return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    raise _deadline_error(request)
+                for task in done:
+                    role = tasks.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if role == 'hedge' or tasks:
+                        _report_hedge(on_hedge, role == 'hedge', delay)
+                    return task.result()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return run_attempts
+
+
+class SingleFlight:
+    """Collapse identical concurrent calls into one.
+
+    The first caller of a key (the leader) runs the call; callers arriving
+    while it is in flight (followers) wait on the same future and get the same
+    response or exception. Sync and async callers share one table, so a thread
+    and a coroutine asking for the same request are deduplicated too.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def _join(self, key: str) -> Tuple[concurrent.futures.Future, bool]:
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.followers += 1
+                return future, False
+            future = self._inflight[key] = concurrent.futures.Future()
+            self.leaders += 1
+            return future, True
+
+    def _settle(self, key: str, future: concurrent.futures.Future, response: Any = None, error: BaseException | None = None) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(response)
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Return ``(response, shared)``; ``shared`` is True for followers.
+
+        ``timeout`` bounds how long a follower waits for the leader.
+        """
+        if not self.enabled:
+            return fn(), False
+        future, leader = self._join(key)
+        if not leader:
+            try:
+                return future.result(timeout=timeout), True
+            except concurrent.futures.TimeoutError:
+                raise DeadlineExceeded("timed out waiting for an identical in-flight call") from None
+        try:
+            response = fn()
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, response)
+        return response, False
+
+    async def ado(self, key: str, afn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        if not self.enabled:
+            return await afn(), False
+        future, leader = self._join(key)
+        if not leader:
+            try:
+                return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout), True
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("timed out waiting for an identical in-flight call") from None
+        try:
+            response = await afn()
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, response)
+        return response, False
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.leaders + self.followers
+        return {
+            'leaders': self.leaders,
+            'followers': self.followers,
+            'inFlight': len(self._inflight),
+            'dedupRatio': self.followers / calls if calls else 0.0,
+        }
+
+
+_singleflight = SingleFlight(os.environ.get('ARCHUB_MODEL_SINGLEFLIGHT', '1').lower() not in ('0', 'false', 'off'))
+
+
+def get_singleflight() -> SingleFlight:
+    return _singleflight
+
+
+_NOT_CACHED = object()
+
+
+def _cache_lookup(request: ModelRequest, cache: Any, on_cache: Optional[Callable[[bool, Dict[str, Any]], None]]):
+    mode = normalize_cache_mode(cache)
+    if mode == 'off':
+        return mode, None, _NOT_CACHED
+    store = get_response_cache()
+    key = request.key()
+    response = store.get(key, _NOT_CACHED)
+    if on_cache is not None:
+        on_cache(response is not _NOT_CACHED, store.stats())
+    return mode, key, response
+
+
+def _governed(request: ModelRequest, call: Callable[[], Any], run_id, on_wait, deadline=None) -> Callable[..., Any]:
+    """Wrap the provider call so it holds a governor slot while it runs.
+
+    The deadline is checked before and after queueing for the slot, so a call
+    that waited past it gives the slot back without reaching the provider.
+    """
+    def governed_call(abandoned: Optional[threading.Event] = None):
+        _check_start(request, deadline, abandoned)
+        with get_governor().slot(request.model, run_id, estimate_tokens(request.system_prompt, request.payload), on_wait) as slot:
+            _check_start(request, deadline, abandoned)
+            started = time.monotonic()
+            response = call()
+            _latency.record(request.model, time.monotonic() - started)
+            if slot is not None:
+                slot.completed(response)
+            return response
+    return governed_call
+
+
+def _agoverned(request: ModelRequest, acall: Callable[[], Awaitable[Any]], run_id, on_wait, deadline=None) -> Callable[[], Awaitable[Any]]:
+    async def governed_call():
+        _check_start(request, deadline)
+        async with get_governor().aslot(request.model, run_id, estimate_tokens(request.system_prompt, request.payload), on_wait) as slot:
+            _check_start(request, deadline)
+            started = time.monotonic()
+            response = await acall()
+            _latency.record(request.model, time.monotonic() - started)
+            if slot is not None:
+                slot.completed(response)
+            return response
+    return governed_call
+
+
+def complete(
+    request: ModelRequest,
+    call: Callable[[], Any],
+    cache: Any = 'off',
+    on_cache: Optional[Callable[[bool, Dict[str, Any]], None]] = None,
+    run_id: str | None = None,
+    on_wait: Optional[Callable[[Dict[str, Any]], None]] = None,
+    on_shared: Optional[Callable[[Dict[str, Any]], None]] = None,
+    deadline: Optional[float] = None,
+    hedge: Optional[HedgePolicy] = None,
+    on_hedge: Optional[Callable[[Dict[str, Any]], None]] = None,
+    hard_deadline: bool = False,
+) -> Any:
+    """Run one model call through the response cache, single-flight, the governor and the active backend.
+
+    ``on_cache(hit, stats)`` is invoked after every cache lookup,
+    ``on_wait(stats)`` whenever a governed model grants the call its slot,
+    ``on_shared(stats)`` when the response came from an identical in-flight call
+    and ``on_hedge(stats)`` when a hedged attempt raced the primary one.
+    ``run_id`` is the fairness key of the governor queue; ``deadline`` is an
+    absolute ``time.monotonic()`` value, past which :class:`DeadlineExceeded`
+    is raised instead of starting the call; ``hard_deadline=True`` also
+    abandons a call that is still running when the deadline passes.
+    """
+    mode, key, response = _cache_lookup(request, cache, on_cache)
+    if response is not _NOT_CACHED:
+        return response
+    live_call = _attempts(request, _governed(request, call, run_id, on_wait, deadline), deadline, hedge, on_hedge, hard_deadline)
+    response, shared = _singleflight.do(
+        key or request.key(),
+        lambda: _backend.complete(request, live_call),
+        timeout=_min_timeout(_remaining(deadline)),
+    )
+    if shared:
+        if on_shared is not None:
+            on_shared(_singleflight.stats())
+        return response
+    if mode == 'readwrite':
+        get_response_cache().put(key, response)
+    return response
+
+
+async def acomplete(
+    request: ModelRequest,
+    acall: Callable[[], Awaitable[Any]],
+    cache: Any = 'off',
+    on_cache: Optional[Callable[[bool, Dict[str, Any]], None]] = None,
+    run_id: str | None = None,
+    on_wait: Optional[Callable[[Dict[str, Any]], None]] = None,
+    on_shared: Optional[Callable[[Dict[str, Any]], None]] = None,
+    deadline: Optional[float] = None,
+    hedge: Optional[HedgePolicy] = None,
+    on_hedge: Optional[Callable[[Dict[str, Any]], None]] = None,
+    hard_deadline: bool = False,
+) -> Any:
+    """Async counterpart of :func:`complete`."""
+    mode, key, response = _cache_lookup(request, cache, on_cache)
+    if response is not _NOT_CACHED:
+        return response
+    live_call = _aattempts(request, _agoverned(request, acall, run_id, on_wait, deadline), deadline, hedge, on_hedge, hard_deadline)
+    response, shared = await _singleflight.ado(
+        key or request.key(),
+        lambda: _backend.acomplete(request, live_call),
+        timeout=_min_timeout(_remaining(deadline)),
+    )
+    if shared:
+        if on_shared is not None:
+            on_shared(_singleflight.stats())
+        return response
+    if mode == 'readwrite':
+        get_response_cache().put(key, response)
+    return response
+
+
+configure_from_env()
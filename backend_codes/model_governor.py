@@ -0,0 +1,329 @@
+"""
+Process-wide rate limiter and concurrency governor for provider calls.
+
+Every live model call acquires a slot from the governor of its model before
+it is sent and releases it when the response arrives. Per model it enforces
+
+    rpm           requests per minute (token bucket)
+    tpm           tokens per minute (token bucket, estimated from the request
+                  before the call and topped up with the response afterwards)
+    maxInFlight   concurrent requests
+
+Waiting calls are queued per run and granted round-robin across runs, so one
+large batch cannot starve an interactive run that shares the model.
+
+Limits come from ``configure_limits`` or the environment, e.g.
+
+    ARCHUB_MODEL_LIMITS='{"gpt-4o-mini": {"rpm": 500, "tpm": 200000, "maxInFlight": 16},
+                          "*": {"maxInFlight": 32}}'
+
+``"*"`` applies to models without their own entry. Models without limits are
+not governed at all.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional
+
+
+def estimate_tokens(*texts: Any) -> int:
+    """Cheap token estimate (~4 characters per token)."""
+    return max(1, sum(len(str(text or '')) for text in texts) // 4)
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    rpm: Optional[float] = None
+    tpm: Optional[float] = None
+    max_in_flight: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ModelLimits":
+        in_flight = data.get('maxInFlight', data.get('max_in_flight'))
+        return cls(
+            rpm=float(data['rpm']) if data.get('rpm') else None,
+            tpm=float(data['tpm']) if data.get('tpm') else None,
+            max_in_flight=int(in_flight) if in_flight else None,
+        )
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rpm is None and self.tpm is None and self.max_in_flight is None
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units per minute up to one minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` units are available (0 if they are now)."""
+        self._refill(now)
+        # 超过桶容量的请求只要求桶满，否则永远拿不到
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        # 允许透支: 回复比预估长时由后续请求补偿
+        self.level -= amount
+
+
+class _Waiter:
+    __slots__ = ('run_id', 'tokens', 'enqueued', 'granted', 'event', 'loop', 'future')
+
+    def __init__(self, run_id, tokens: int, loop=None):
+        self.run_id = run_id
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.event = threading.Event() if loop is None else None
+        self.loop = loop
+        self.future = loop.create_future() if loop is not None else None
+
+    def grant(self) -> None:
+        self.granted = True
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(True)
+
+
+class Slot:
+    """A granted permission to send one request."""
+
+    def __init__(self, governor: "ModelGovernor", tokens: int, wait_seconds: float, queue_depth: int):
+        self.governor = governor
+        self.tokens = tokens
+        self.wait_seconds = wait_seconds
+        self.queue_depth = queue_depth
+        self.completion_tokens = 0
+
+    def completed(self, response: Any) -> None:
+        """Record the response so its tokens count against the TPM budget."""
+        self.completion_tokens = estimate_tokens(response)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'model': self.governor.model,
+            'waitMs': round(self.wait_seconds * 1000, 3),
+            'queueDepth': self.queue_depth,
+            'inFlight': self.governor.in_flight,
+            'estimatedTokens': self.tokens,
+        }
+
+
+class ModelGovernor:
+    """Limits and fair queue of one model."""
+
+    def __init__(self, model: str, limits: ModelLimits):
+        self.model = model
+        self.limits = limits
+        self._requests = TokenBucket(limits.rpm) if limits.rpm else None
+        self._tokens = TokenBucket(limits.tpm) if limits.tpm else None
+        self._lock = threading.Lock()
+        self._queues: "OrderedDict[Any, Deque[_Waiter]]" = OrderedDict()
+        self.in_flight = 0
+        self.waiting = 0
+        self.granted = 0
+
+    # ---- scheduling --------------------------------------------------------
+    def _enqueue(self, waiter: _Waiter) -> int:
+        with self._lock:
+            self._queues.setdefault(waiter.run_id, deque()).append(waiter)
+            self.waiting += 1
+            return self.waiting
+
+    def _dispatch(self) -> Optional[float]:
+        """Grant every waiter that fits; return seconds until the next one may."""
+        with self._lock:
+            while self._queues:
+                if self.limits.max_in_flight and self.in_flight >= self.limits.max_in_flight:
+                    return None  # 等待release唤醒
+                run_id, queue = next(iter(self._queues.items()))
+                waiter = queue[0]
+                now = time.monotonic()
+                delay = max(
+                    self._requests.wait_time(1, now) if self._requests else 0.0,
+                    self._tokens.wait_time(waiter.tokens, now) if self._tokens else 0.0,
+                )
+                if delay > 0:
+                    return delay
+                if self._requests:
+                    self._requests.take(1)
+                if self._tokens:
+                    self._tokens.take(waiter.tokens)
+                queue.popleft()
+                # 轮转: 本run拿到一个名额后排到队尾
+                if queue:
+                    self._queues.move_to_end(run_id)
+                else:
+                    del self._queues[run_id]
+                self.waiting -= 1
+                self.in_flight += 1
+                self.granted += 1
+                waiter.grant()
+            return None
+
+    def _release(self, slot: Slot) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if self._tokens and slot.completion_tokens:
+                self._tokens.take(slot.completion_tokens)
+        self._dispatch()
+
+    # ---- acquire -----------------------------------------------------------
+    def acquire(self, run_id, tokens: int) -> Slot:
+        waiter = _Waiter(run_id, tokens)
+        depth = self._enqueue(waiter)
+        while not waiter.granted:
+            delay = self._dispatch()
+            if not waiter.granted:
+                waiter.event.wait(timeout=delay)
+        return Slot(self, tokens, time.monotonic() - waiter.enqueued, depth)
+
+    async def aacquire(self, run_id, tokens: int) -> Slot:
+        waiter = _Waiter(run_id, tokens, loop=asyncio.get_running_loop())
+        depth = self._enqueue(waiter)
+        try:
+            while not waiter.granted:
+                delay = self._dispatch()
+                if waiter.granted:
+                    break
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter.future), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        return Slot(self, tokens, time.monotonic() - waiter.enqueued, depth)
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """A cancelled waiter leaves the queue, or gives back the slot it was just granted."""
+        with self._lock:
+            queue = self._queues.get(waiter.run_id)
+            if not waiter.granted and queue is not None and waiter in queue:
+                queue.remove(waiter)
+                if not queue:
+                    del self._queues[waiter.run_id]
+                self.waiting -= 1
+                return
+        if waiter.granted:
+            self._release(Slot(self, waiter.tokens, 0.0, 0))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'model': self.model,
+            'inFlight': self.in_flight,
+            'queueDepth': self.waiting,
+            'granted': self.granted,
+        }
+
+
+class Governor:
+    """Registry of per-model governors."""
+
+    def __init__(self, limits: Optional[Dict[str, ModelLimits]] = None):
+        self._limits: Dict[str, ModelLimits] = dict(limits or {})
+        self._models: Dict[str, Optional[ModelGovernor]] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, model: str, limits: ModelLimits) -> None:
+        with self._lock:
+            self._limits[model] = limits
+            if model == '*':
+                self._models.clear()
+            else:
+                self._models.pop(model, None)
+
+    def for_model(self, model: str) -> Optional[ModelGovernor]:
+        governor = self._models.get(model, False)
+        if governor is not False:
+            return governor
+        with self._lock:
+            if model not in self._models:
+                limits = self._limits.get(model) or self._limits.get('*')
+                self._models[model] = None if limits is None or limits.unlimited else ModelGovernor(model, limits)
+            return self._models[model]
+
+    @contextmanager
+    def slot(self, model: str, run_id=None, tokens: int = 1, on_wait: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """``with governor.slot(model, run_id, tokens) as slot:`` around one provider call.
+
+        Yields ``None`` for ungoverned models.
+        """
+        governor = self.for_model(model)
+        if governor is None:
+            yield None
+            return
+        granted = governor.acquire(run_id, tokens)
+        if on_wait is not None:
+            on_wait(granted.stats())
+        try:
+            yield granted
+        finally:
+            governor._release(granted)
+
+    @asynccontextmanager
+    async def aslot(self, model: str, run_id=None, tokens: int = 1, on_wait: Optional[Callable[[Dict[str, Any]], None]] = None):
+        governor = self.for_model(model)
+        if governor is None:
+            yield None
+            return
+        granted = await governor.aacquire(run_id, tokens)
+        if on_wait is not None:
+            on_wait(granted.stats())
+        try:
+            yield granted
+        finally:
+            governor._release(granted)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {model: governor.stats() for model, governor in list(self._models.items()) if governor is not None}
+
+
+def limits_from_env() -> Dict[str, ModelLimits]:
+    raw = os.environ.get('ARCHUB_MODEL_LIMITS')
+    if not raw:
+        return {}
+    return {model: ModelLimits.from_dict(values or {}) for model, values in json.loads(raw).items()}
+
+
+_governor = Governor(limits_from_env())
+
+
+def get_governor() -> Governor:
+    return _governor
+
+
+def configure_limits(model: str, rpm: float | None = None, tpm: float | None = None, max_in_flight: int | None = None) -> None:
+    """Set the limits of ``model`` (``"*"`` for every model without its own entry)."""
+    _governor.configure(model, ModelLimits(rpm=rpm, tpm=tpm, max_in_flight=max_in_flight))
+
+
+def reset_governor(limits: Optional[Dict[str, ModelLimits]] = None) -> None:
+    """Replace the process-wide governor (tests/benchmarks)."""
+    global _governor
+    _governor = Governor(limits)
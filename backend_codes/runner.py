@@ -4,17 +4,23 @@ Simple Multi-Agent Team Runner
 基础的多智能体团队运行器，用于加载配置文件并处理基本的输入输出
 """
 
+import asyncio
 import os
 import sys
+import threading
+import time
 import yaml
 import json
 import glob
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, Iterator, List, Any, Optional
 # 把项目根目录加入搜索路径
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from backend_codes.Teams.simpleTeam import SimpleTeam
+from backend_codes.Teams.teamPool import TeamPool, default_team_pool
 from uuid import uuid4
 
 
@@ -39,7 +45,9 @@ from uuid import uuid4
 
 
 class SimpleTeamRunner:
-    def __init__(self):
+    def __init__(self, team_pool: Optional[TeamPool] = None):
+        # 预构建团队池：同一config的后续请求复用团队实例，只做一次轻量reset
+        self.team_pool = team_pool or default_team_pool
         self.source_files_dir = Path("./SourceFiles")
         print(f"📁 SourceFiles 目录: {self.source_files_dir.resolve()}")
         print(f"Possible Config Files: {self.list_available_configs()}")
@@ -139,13 +147,9 @@ class SimpleTeamRunner:
     
     def process_input_output(self, user_input: str, config: Dict[str, Any], attachments: Optional[List[Dict[str, Any]]] = None) -> str:
         """Process a single user input and return the team's output."""
-        self.team = SimpleTeam(
-            goal=user_input,
-            config=config,
-            input_attachments=attachments,
-        )
-
-        output_msg = self.team.run()
+        with self.team_pool.lease(config, user_input, input_attachments=attachments) as team:
+            self.team = team
+            output_msg = team.run()
         output = f"Team output: {output_msg}"
 
         return output
@@ -153,17 +157,121 @@ class SimpleTeamRunner:
     def process_input_output_streaming(self, user_input: str, config: Dict[str, Any], emit, attachments: Optional[List[Dict[str, Any]]] = None) -> str:
         """Process user input but emit telemetry events via provided emit callback."""
         run_id = str(uuid4())
-        team = SimpleTeam(
-            goal=user_input,
-            config=config,
+        with self.team_pool.lease(config, user_input, emit=emit, run_id=run_id, input_attachments=attachments) as team:
+            output_msg = team.run()
+        output = f"Team output: {output_msg}"
+        return output
+
+    async def aprocess_input_output_streaming(self, user_input: str, config: Dict[str, Any], emit, attachments: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Async variant of process_input_output_streaming driven by SimpleTeam.arun."""
+        run_id = str(uuid4())
+        # 取出/构建团队(可能要加载工具、创建agent)是阻塞操作，放到线程中避免卡住事件循环
+        team = await asyncio.to_thread(
+            self.team_pool.checkout,
+            config,
+            user_input,
             emit=emit,
             run_id=run_id,
             input_attachments=attachments,
         )
-        output_msg = team.run()
+        try:
+            output_msg = await team.arun()
+        finally:
+            self.team_pool.checkin(team)
         output = f"Team output: {output_msg}"
         return output
 
+    @staticmethod
+    def _normalize_batch_item(index: int, item: Any) -> Dict[str, Any]:
+        """Batch items are plain goal strings or dicts with input/attachments/id."""
+        if isinstance(item, dict):
+            return {
+                'index': index,
+                'id': item.get('id', index),
+                'input': str(item.get('input', '')).strip(),
+                'attachments': item.get('attachments') or None,
+            }
+        return {'index': index, 'id': index, 'input': str(item).strip(), 'attachments': None}
+
+    def iter_batch(self, goals: Iterable[Any], config: Dict[str, Any], concurrency: int = 4) -> Iterator[Dict[str, Any]]:
+        """Run many goals against one team config, yielding per-item results as they finish.
+
+        ``concurrency`` workers each lease one pooled team for the whole batch and
+        reset it between items, so the batch builds at most ``concurrency`` teams.
+        A failing item produces ``success: False`` with its error and never stops
+        the rest of the batch. Results arrive in completion order; use ``index``
+        to restore input order.
+        """
+        items = iter(enumerate(goals))
+        items_lock = threading.Lock()
+        results: queue.Queue = queue.Queue()
+        workers = max(1, int(concurrency or 1))
+        done = object()
+
+        def next_item():
+            with items_lock:
+                try:
+                    return self._normalize_batch_item(*next(items))
+                except StopIteration:
+                    return None
+
+        def worker():
+            team = None
+            try:
+                while True:
+                    item = next_item()
+                    if item is None:
+                        return
+                    started = time.time()
+                    result = {'type': 'result', 'index': item['index'], 'id': item['id'], 'input': item['input']}
+                    try:
+                        if not item['input']:
+                            raise ValueError('Input is required')
+                        if team is None:
+                            team = self.team_pool.checkout(config, item['input'], input_attachments=item['attachments'])
+                        else:
+                            team.reset(goal=item['input'], input_attachments=item['attachments'])
+                        result.update(success=True, output=team.run(), error=None)
+                    except Exception as e:
+                        result.update(success=False, output=None, error=f"{type(e).__name__}: {e}")
+                    result['elapsedMs'] = int((time.time() - started) * 1000)
+                    results.put(result)
+            finally:
+                if team is not None:
+                    self.team_pool.checkin(team)
+                results.put(done)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-worker") as executor:
+            for _ in range(workers):
+                executor.submit(worker)
+            finished = 0
+            while finished < workers:
+                result = results.get()
+                if result is done:
+                    finished += 1
+                    continue
+                yield result
+
+    def process_batch(self, goals: Iterable[Any], config: Dict[str, Any], concurrency: int = 4) -> Dict[str, Any]:
+        """Run a batch to completion; returns results in input order plus a summary."""
+        started = time.time()
+        results = sorted(self.iter_batch(goals, config, concurrency=concurrency), key=lambda r: r['index'])
+        succeeded = sum(1 for r in results if r['success'])
+        return {
+            'results': results,
+            'summary': self.batch_summary(len(results), succeeded, started),
+        }
+
+    @staticmethod
+    def batch_summary(total: int, succeeded: int, started: float) -> Dict[str, Any]:
+        return {
+            'type': 'summary',
+            'total': total,
+            'succeeded': succeeded,
+            'failed': total - succeeded,
+            'elapsedMs': int((time.time() - started) * 1000),
+        }
+
     def run_interactive_session(self):
         """运行交互式会话"""
         print("\n🤖 多智能体团队运行器")
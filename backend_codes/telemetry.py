@@ -22,6 +22,23 @@ def make_event(event_type: str, run_id: str | None, team_id: str | None, **data:
     return event
 
 
+def message_summary(message: Any, with_content: bool = False) -> Dict[str, Any]:
+    """Telemetry view of a message; cached (and shared) for :class:`Messages.baseMessage.BaseMessage`."""
+    summary = getattr(message, 'summary', None)
+    if summary is not None:
+        return summary(with_content)
+    data = {
+        'maker': getattr(message, 'maker', None),
+        'target': getattr(message, 'target_agent', None),
+        'timetag': getattr(message, 'timetag', None),
+        'preview': (getattr(message, 'content', '') or '')[:120],
+        'attachments': getattr(message, 'attachments', []),
+    }
+    if with_content:
+        data['content'] = getattr(message, 'content', '')
+    return data
+
+
 class QueueEmitter:
     """Emitter that pushes events into a queue-like object with put method."""
 
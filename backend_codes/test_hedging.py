@@ -0,0 +1,139 @@
+import asyncio
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(__file__))
+
+import model_calls
+from model_calls import DeadlineExceeded, HedgePolicy, acomplete, complete, hedge_stats
+from model_governor import configure_limits, get_governor
+from test_model_calls import request
+
+
+def slow_then_fast(first=0.5, then=0.01):
+    """A call whose first attempt is slow and every later one fast."""
+    calls = []
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            calls.append(1)
+            attempt = len(calls)
+        time.sleep(first if attempt == 1 else then)
+        return f'attempt {attempt}'
+    return call, calls
+
+
+def test_hedge_policy_from_config():
+    assert HedgePolicy.from_config(None) is None
+    assert HedgePolicy.from_config(True) == HedgePolicy()
+    assert HedgePolicy.from_config(0.5).after == 0.5
+    assert HedgePolicy.from_config('p99').percentile == 0.99
+    assert HedgePolicy.from_config({'after': 'p90', 'minSamples': 5}) == HedgePolicy(percentile=0.9, min_samples=5)
+    with pytest.raises(ValueError):
+        HedgePolicy.from_config('soon')
+
+
+def test_percentile_hedge_waits_for_enough_samples():
+    policy = HedgePolicy(min_samples=3)
+    tracker = model_calls.LatencyTracker()
+    assert policy.delay('gpt-test', tracker) is None
+    for seconds in (0.1, 0.2, 0.3):
+        tracker.record('gpt-test', seconds)
+    assert policy.delay('gpt-test', tracker) == 0.3
+
+
+def test_hedge_fires_and_wins_against_a_straggler():
+    call, calls = slow_then_fast()
+    reports = []
+    started = time.monotonic()
+    response = complete(request(), call, hedge=HedgePolicy(after=0.05), on_hedge=reports.append)
+
+    assert response == 'attempt 2'
+    assert time.monotonic() - started < 0.3
+    assert len(calls) == 2
+    assert reports[0]['won'] and reports[0]['hedgesFired'] == 1
+    assert hedge_stats()['hedgeWinRate'] == 1.0
+
+
+def test_fast_primary_never_hedges():
+    call, calls = slow_then_fast(first=0.01)
+    reports = []
+    assert complete(request(), call, hedge=HedgePolicy(after=0.2), on_hedge=reports.append) == 'attempt 1'
+    assert len(calls) == 1 and reports == []
+
+
+def test_async_hedge_cancels_the_loser():
+    attempts = []
+
+    async def acall():
+        attempts.append(len(attempts) + 1)
+        try:
+            await asyncio.sleep(0.5 if len(attempts) == 1 else 0.01)
+        except asyncio.CancelledError:
+            attempts.append('cancelled')
+            raise
+        return 'done'
+
+    async def scenario():
+        response = await acomplete(request(), acall, hedge=HedgePolicy(after=0.05))
+        await asyncio.sleep(0)
+        return response
+
+    assert asyncio.run(scenario()) == 'done'
+    assert attempts == [1, 2, 'cancelled']
+
+
+def test_hard_deadline_abandons_a_running_call():
+    call, _ = slow_then_fast(first=0.5)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        complete(request(), call, deadline=time.monotonic() + 0.05, hard_deadline=True)
+    assert time.monotonic() - started < 0.3
+    assert hedge_stats()['deadlinesExceeded'] == 1
+
+
+def test_soft_deadline_runs_the_call_on_the_calling_thread():
+    threads = []
+
+    def call():
+        threads.append(threading.current_thread())
+        time.sleep(0.1)
+        return 'late but kept'
+
+    assert complete(request(), call, deadline=time.monotonic() + 0.05) == 'late but kept'
+    assert threads == [threading.current_thread()]
+
+
+def test_expired_deadline_never_reaches_the_provider():
+    configure_limits('gpt-test', max_in_flight=1)
+    call, calls = slow_then_fast()
+    with pytest.raises(DeadlineExceeded):
+        complete(request(), call, deadline=time.monotonic() - 1)
+    assert calls == []
+    assert get_governor().for_model('gpt-test').granted == 0
+
+
+def test_abandoned_attempt_gives_its_slot_back_unused():
+    configure_limits('gpt-test', max_in_flight=1)
+    release = threading.Event()
+    holder = threading.Thread(target=complete, args=(request('holder'), lambda: release.wait(1)))
+    holder.start()
+    while get_governor().for_model('gpt-test').in_flight == 0:
+        time.sleep(0.005)
+
+    call, calls = slow_then_fast()
+    with pytest.raises(DeadlineExceeded):
+        complete(request(), call, deadline=time.monotonic() + 0.05, hard_deadline=True)
+    release.set()
+    holder.join()
+
+    governor = get_governor().for_model('gpt-test')
+    while governor.waiting or governor.in_flight:
+        time.sleep(0.005)
+    assert calls == []
@@ -0,0 +1,110 @@
+import sys
+import os
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(__file__))
+
+import llm_cache
+from llm_cache import ResponseCache
+from Messages.simpleMessage import SimpleMessageCreator
+from model_calls import complete
+from Nodes.processorNodes.llm_node import LLMNode
+from Teams.simpleTeam import SimpleTeam
+from Teams.test_simpleTeam import fan_out
+from test_model_calls import counting, request
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResponseCache(memory_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # a 变成最近使用
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['hits'] == 3 and cache.stats()['misses'] == 1
+
+
+def test_sqlite_tier_survives_restart_and_expires(tmp_path, monkeypatch):
+    path = tmp_path / 'cache.sqlite'
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, 'time', lambda: now[0])
+    first = ResponseCache(path, ttl=60)
+    first.put('k', {'text': 'answer'})
+    first.close()
+
+    second = ResponseCache(path, ttl=60)
+    assert second.get('k') == {'text': 'answer'}
+    assert second.stats()['memoryHits'] == 0
+    second.close()
+
+    now[0] += 61
+    third = ResponseCache(path, ttl=60)
+    assert third.get('k') is None
+    assert third.evictions == 1
+
+
+def test_readwrite_serves_repeated_requests_from_cache():
+    call, calls = counting()
+    lookups = []
+    assert complete(request(), call, cache='readwrite', on_cache=lambda hit, _stats: lookups.append(hit)) == 'answer 1'
+    assert complete(request(), call, cache='readwrite', on_cache=lambda hit, _stats: lookups.append(hit)) == 'answer 1'
+    assert complete(request('other'), call, cache='readwrite') == 'answer 2'
+
+    assert len(calls) == 2
+    assert lookups == [False, True]
+
+
+def test_read_mode_never_stores():
+    call, calls = counting()
+    complete(request(), call, cache='read')
+    complete(request(), call, cache='read')
+    assert len(calls) == 2
+
+    complete(request(), call, cache='readwrite')
+    assert complete(request(), call, cache='read') == 'answer 3'
+
+
+def test_llm_node_uses_the_response_cache(monkeypatch):
+    calls = []
+    monkeypatch.setattr(LLMNode, '_create', lambda self, data, on_delta=None: calls.append(data) or f'echo {data}')
+    events = []
+    outputs = []
+    for _ in range(2):
+        node = LLMNode('llm', cache_mode='readwrite')
+        node.bind_run(events.append, 'run')
+        node.receive('hello')
+        node.process()
+        outputs.append(node.processed[-1].content)
+
+    assert calls == ['hello']
+    assert outputs == ['echo hello', 'echo hello']
+    assert [e['type'] for e in events] == ['llm.cache.miss', 'llm.cache.hit']
+    assert events[1]['meta']['cacheMode'] == 'readwrite'
+
+
+def test_llm_node_keys_team_messages_on_their_text(monkeypatch):
+    calls = []
+    monkeypatch.setattr(LLMNode, '_create', lambda self, data, on_delta=None: calls.append(data) or f'echo {data}')
+    outputs = []
+    for _ in range(2):
+        # 每次都是新的消息对象，内容相同
+        node = LLMNode('llm', cache_mode='readwrite')
+        node.receive(SimpleMessageCreator().create_message(content='hello', maker='upstream'))
+        node.process()
+        outputs.append(node.processed[-1].content)
+
+    assert calls == ['hello']
+    assert outputs == ['echo hello', 'echo hello']
+
+
+def test_cached_agent_answer_is_written_into_memory(fake_agent):
+    config = fan_out(1)
+    config['nodes'][2]['config']['cache'] = 'readwrite'
+    first = SimpleTeam(goal='hello', config=config).run()
+    team = SimpleTeam(goal='hello', config=config)
+
+    assert team.run() == first
+    assert fake_agent.calls == 1
+    assert len(team.nodes['a0'].agent.memory) == 2
@@ -0,0 +1,136 @@
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(__file__))
+
+import model_calls
+from Messages.simpleMessage import SimpleMessageCreator
+from Nodes.processorNodes.llm_node import LLMNode
+from model_calls import CassetteBackend, CassetteMissError, ModelRequest, SingleFlight, complete, set_backend
+
+
+def request(payload='hi', **params):
+    return ModelRequest.build('agent', 'gpt-test', 'system', payload, **params)
+
+
+def counting(response='answer'):
+    calls = []
+
+    def call():
+        calls.append(1)
+        return f"{response} {len(calls)}"
+    return call, calls
+
+
+# ---- record / replay -----------------------------------------------------------
+def test_request_key_covers_call_parameters():
+    assert request().key() == request().key()
+    assert request().key() != request(history='abc').key()
+    assert request().key() != request('other').key()
+
+
+def test_recorded_calls_replay_offline(tmp_path):
+    path = tmp_path / 'cassette.jsonl'
+    set_backend(CassetteBackend(path, mode='record'))
+    call, _ = counting()
+    assert complete(request(), call) == 'answer 1'
+    assert complete(request(), call) == 'answer 2'
+
+    set_backend(CassetteBackend(path, mode='replay'))
+    offline, calls = counting('live')
+    # 同一请求多次录制时按录制顺序回放，最后一条重复
+    assert [complete(request(), offline) for _ in range(3)] == ['answer 1', 'answer 2', 'answer 2']
+    assert calls == []
+
+
+def test_replay_miss_raises_or_falls_back(tmp_path):
+    path = tmp_path / 'cassette.jsonl'
+    path.write_text('')
+    set_backend(CassetteBackend(path, mode='replay'))
+    with pytest.raises(CassetteMissError):
+        complete(request(), counting()[0])
+
+    set_backend(CassetteBackend(path, mode='replay', fallback_live=True))
+    assert complete(request(), counting('live')[0]) == 'live 1'
+    assert len(model_calls.get_backend()) == 1
+
+
+def test_llm_node_replays_with_fresh_messages(tmp_path, monkeypatch):
+    path = tmp_path / 'cassette.jsonl'
+
+    def run_node():
+        node = LLMNode('llm')
+        node.receive(SimpleMessageCreator().create_message(content='hello', maker='upstream'))
+        node.process()
+        return node.processed[-1].content
+
+    set_backend(CassetteBackend(path, mode='record'))
+    monkeypatch.setattr(LLMNode, '_create', lambda self, data, on_delta=None: f'echo {data}')
+    assert run_node() == 'echo hello'
+
+    # 新的后端实例从文件加载，相当于在另一个进程里回放
+    set_backend(CassetteBackend(path, mode='replay'))
+    monkeypatch.setattr(LLMNode, '_create', lambda self, data, on_delta=None: pytest.fail('went live'))
+    assert run_node() == 'echo hello'
+
+
+# ---- single-flight ---------------------------------------------------------------
+def test_identical_in_flight_calls_are_collapsed():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(1)
+        return 'answer'
+
+    shared = []
+    with ThreadPoolExecutor(4) as pool:
+        leader = pool.submit(complete, request(), slow)
+        started.wait(1)
+        followers = [pool.submit(complete, request(), slow, on_shared=shared.append) for _ in range(3)]
+        while model_calls.get_singleflight().followers < 3:
+            time.sleep(0.005)
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert results == ['answer'] * 4
+    assert len(calls) == 1
+    assert len(shared) == 3 and shared[-1]['dedupRatio'] == 0.75
+
+
+def test_followers_get_the_leader_error():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(1)
+        raise RuntimeError('boom')
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, 'k', failing)
+        while not flight._inflight:
+            time.sleep(0.005)
+        follower = pool.submit(flight.do, 'k', failing)
+        while flight.followers < 1:
+            time.sleep(0.005)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result()
+    assert flight.stats()['inFlight'] == 0
+
+
+def test_sequential_calls_are_not_shared():
+    call, calls = counting()
+    complete(request(), call)
+    complete(request(), call)
+    assert len(calls) == 2
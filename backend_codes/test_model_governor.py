@@ -0,0 +1,108 @@
+import asyncio
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(__file__))
+
+from model_calls import complete
+from model_governor import ModelGovernor, ModelLimits, Slot, TokenBucket, _Waiter, configure_limits, get_governor
+from test_model_calls import request
+
+
+def test_ungoverned_models_get_no_slot():
+    with get_governor().slot('gpt-test') as slot:
+        assert slot is None
+
+
+def test_token_bucket_refills_at_the_configured_rate():
+    bucket = TokenBucket(60)
+    now = bucket.updated
+    assert bucket.wait_time(1, now) == 0
+    bucket.take(60)
+    assert bucket.wait_time(1, now) == 1.0
+    assert bucket.wait_time(1, now + 0.5) == 0.5
+    # 超过容量的请求只需等到桶满
+    assert bucket.wait_time(1000, now + 0.5) == 59.5
+
+
+def test_rpm_spaces_out_requests():
+    configure_limits('gpt-test', rpm=600)  # 桶容量600, 每0.1s补一个
+    governor = get_governor().for_model('gpt-test')
+    governor._requests.level = 1
+    started = time.monotonic()
+    for _ in range(3):
+        with get_governor().slot('gpt-test'):
+            pass
+    assert time.monotonic() - started >= 0.15
+
+
+def test_max_in_flight_caps_concurrent_calls():
+    configure_limits('gpt-test', max_in_flight=2)
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def call():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return 'ok'
+
+    with ThreadPoolExecutor(6) as pool:
+        results = list(pool.map(lambda i: complete(request(f'p{i}'), call), range(6)))
+
+    assert results == ['ok'] * 6
+    assert peak[0] == 2
+    assert get_governor().stats()['gpt-test']['granted'] == 6
+
+
+def test_waiting_runs_are_granted_round_robin():
+    governor = ModelGovernor('gpt-test', ModelLimits(max_in_flight=1))
+    waiters = [_Waiter('batch', 1), _Waiter('batch', 1), _Waiter('batch', 1), _Waiter('chat', 1)]
+    for waiter in waiters:
+        governor._enqueue(waiter)
+
+    order = []
+    governor._dispatch()
+    for _ in waiters:
+        granted = [w for w in waiters if w.granted and w not in order]
+        assert len(granted) == 1
+        order.extend(granted)
+        governor._release(Slot(governor, 1, 0.0, 0))
+
+    # 交互式run不用等整个batch排完
+    assert order == [waiters[0], waiters[3], waiters[1], waiters[2]]
+
+
+def test_slot_reports_wait_stats():
+    configure_limits('gpt-test', max_in_flight=1)
+    seen = []
+    with get_governor().slot('gpt-test', 'run', 10, seen.append):
+        pass
+    assert seen[0]['model'] == 'gpt-test'
+    assert seen[0]['inFlight'] == 1 and seen[0]['estimatedTokens'] == 10
+
+
+def test_cancelled_async_waiter_leaves_the_queue():
+    configure_limits('gpt-test', max_in_flight=1)
+    governor = get_governor()
+
+    async def scenario():
+        async with governor.aslot('gpt-test', 'a'):
+            waiter = asyncio.ensure_future(governor.aslot('gpt-test', 'b').__aenter__())
+            await asyncio.sleep(0.01)
+            assert governor.for_model('gpt-test').waiting == 1
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            assert governor.for_model('gpt-test').waiting == 0
+        async with governor.aslot('gpt-test', 'c') as slot:
+            return slot
+
+    assert asyncio.run(scenario()) is not None
+    assert governor.for_model('gpt-test').in_flight == 0
@@ -0,0 +1,37 @@
+import sys
+import os
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(__file__))
+
+from runner import SimpleTeamRunner
+from Teams.teamPool import TeamPool
+from Teams.test_simpleTeam import fan_out
+
+
+def test_batch_results_come_back_in_input_order(fake_agent):
+    fake_agent.latency = 0.05
+    runner = SimpleTeamRunner(team_pool=TeamPool())
+    goals = [f'goal {i}' for i in range(6)]
+    batch = runner.process_batch(goals, fan_out(1), concurrency=3)
+
+    assert [r['index'] for r in batch['results']] == list(range(6))
+    assert all(r['success'] and f'goal {r["index"]}' in r['output'] for r in batch['results'])
+    assert batch['summary']['succeeded'] == 6
+
+
+def test_failing_item_does_not_stop_the_batch(fake_agent):
+    runner = SimpleTeamRunner(team_pool=TeamPool())
+    batch = runner.process_batch(['one', '', {'id': 'x', 'input': 'three'}], fan_out(1), concurrency=2)
+
+    assert [r['success'] for r in batch['results']] == [True, False, True]
+    assert 'Input is required' in batch['results'][1]['error']
+    assert batch['results'][2]['id'] == 'x'
+    assert batch['summary']['failed'] == 1
+
+
+def test_batch_builds_at_most_one_team_per_worker(fake_agent):
+    pool = TeamPool()
+    runner = SimpleTeamRunner(team_pool=pool)
+    runner.process_batch([f'goal {i}' for i in range(8)], fan_out(1), concurrency=2)
+    assert pool.created <= 2
@@ -0,0 +1,84 @@
+import sys
+import os
+import time
+
+import pytest
+
+# 把项目根目录加入搜索路径
+sys.path.append(os.path.dirname(__file__))
+
+from utils import MAX_JSON_CANDIDATES, TemplateRegistry, extract_json, load_prompt_from_template
+
+
+def write(path, text, mtime):
+    path.write_text(text, encoding='utf-8')
+    os.utime(path, ns=(mtime, mtime))
+
+
+# ---- template registry ---------------------------------------------------------
+def test_templates_are_compiled_once(tmp_path):
+    template = tmp_path / 'prompt.md'
+    write(template, 'Hello {{name}}', 1_000_000_000)
+    registry = TemplateRegistry()
+
+    assert registry.render(str(template), {'name': 'a'}) == 'Hello a'
+    assert registry.render(str(template), {'name': 'b'}) == 'Hello b'
+    assert registry.stats()['compiles'] == 1 and registry.stats()['hits'] == 1
+
+
+def test_changed_file_is_recompiled(tmp_path):
+    template = tmp_path / 'prompt.md'
+    write(template, 'Hello {{name}}', 1_000_000_000)
+    registry = TemplateRegistry()
+    assert registry.render(str(template), {'name': 'a'}, memoize=True) == 'Hello a'
+
+    write(template, 'Bye {{name}}', 2_000_000_000)
+    # 文件版本变化后，记忆的渲染结果也随之失效
+    assert registry.render(str(template), {'name': 'a'}, memoize=True) == 'Bye a'
+    assert registry.stats()['compiles'] == 2 and registry.stats()['renderHits'] == 0
+
+
+def test_memoized_renders_are_keyed_on_params_and_bounded(tmp_path):
+    template = tmp_path / 'prompt.md'
+    write(template, '{{goal}}', 1_000_000_000)
+    registry = TemplateRegistry(max_renders=2)
+    for goal in ('a', 'b', 'a', 'c'):
+        registry.render(str(template), {'goal': goal}, memoize=True)
+
+    assert registry.stats()['renderHits'] == 1
+    assert registry.stats()['renders'] == 2
+    registry.render(str(template), {'goal': 'b'}, memoize=True)  # b 已被淘汰
+    assert registry.stats()['renderHits'] == 1
+
+
+def test_non_utf8_templates_still_load(tmp_path):
+    template = tmp_path / 'prompt.md'
+    template.write_bytes('目标: {{goal}}'.encode('gbk'))
+    assert load_prompt_from_template(str(template), {'goal': 'x'}) == '目标: x'
+
+
+# ---- extract_json --------------------------------------------------------------
+@pytest.mark.parametrize('reply, expected', [
+    ('{"a": 1}', {'a': 1}),
+    ('Here you go:\n```json\n{"a": 1}\n```', {'a': 1}),
+    ('```json\n{"a": 1}\n``` or maybe {"a": 2}', {'a': 1}),
+    ('I decided {"next": "b", "note": "use } and ] freely"} as planned.', {'next': 'b', 'note': 'use } and ] freely'}),
+    ('draft {not json} then the list [1, 2]', [1, 2]),
+    ('a stray { before {"a": 1}', {'a': 1}),
+    ('mismatched {a] then {"a": 1}', {'a': 1}),
+])
+def test_extract_json_finds_the_value(reply, expected):
+    assert extract_json(reply) == expected
+
+
+def test_extract_json_gives_up_after_the_candidate_cap():
+    prose = ' '.join('{nope}' for _ in range(MAX_JSON_CANDIDATES)) + ' {"a": 1}'
+    with pytest.raises(ValueError):
+        extract_json(prose)
+
+
+def test_extract_json_is_linear_on_pathological_input():
+    started = time.perf_counter()
+    with pytest.raises(ValueError):
+        extract_json('{' * 50000)
+    assert time.perf_counter() - started < 1
@@ -2,39 +2,125 @@ import openai
 from jinja2 import Template
 import os
 import yaml
+import threading
+from collections import OrderedDict
 from typing import Dict, Any
 import json
-
-def raw_LLM_response(prompt, model="gpt-4o-mini", temperature=0.7, max_tokens=150, system_message = None):
-    response = openai.chat.completions.create(
-        model=model,
-        messages=[
-            {'role': 'system', 'content': system_message} if system_message else {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=temperature,
-        max_tokens=max_tokens,
-        n=1,
-        stop=None,
-    )
-    return response.choices[0].message.content.strip()
-
-
-def load_prompt_from_template(template_path, params):
+import re
+from model_calls import ModelRequest, complete
+
+def raw_LLM_response(prompt, model="gpt-4o-mini", temperature=0.7, max_tokens=150, system_message = None, cache="off", run_id=None, on_wait=None, deadline=None):
+    system_message = system_message or "You are a helpful assistant."
+
+    def call():
+        response = openai.chat.completions.create(
+            model=model,
+            messages=[
+                {'role': 'system', 'content': system_message},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            n=1,
+            stop=None,
+        )
+        return response.choices[0].message.content.strip()
+
+    request = ModelRequest.build('raw', model, system_message, prompt, temperature=temperature, max_tokens=max_tokens)
+    return complete(request, call, cache=cache, run_id=run_id, on_wait=on_wait, deadline=deadline)
+
+
+def _read_template(template_path):
     try:
         with open(template_path, 'r', encoding='utf-8') as file:
-            template_content = file.read()
+            return file.read()
     except UnicodeDecodeError:
         try:
             with open(template_path, 'r', encoding='gbk') as file:
-                template_content = file.read()
+                return file.read()
         except UnicodeDecodeError:
             with open(template_path, 'r', encoding='latin-1') as file:
-                template_content = file.read()
-    
-    template = Template(template_content)
-    prompt = template.render(params)
-    return prompt
+                return file.read()
+
+
+class TemplateRegistry:
+    """Compiled jinja templates, recompiled only when the file changes on disk.
+
+    ``render(..., memoize=True)`` additionally keeps the rendered text for
+    parameter sets that do not change during a run (e.g. system prompts), in a
+    bounded LRU keyed on the template version and the parameters.
+    """
+
+    def __init__(self, max_renders: int = 256):
+        self.max_renders = max_renders
+        self._templates: Dict[str, Any] = {}   # abspath -> (mtime_ns, size, Template)
+        self._renders: "OrderedDict[Any, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.compiles = 0
+        self.hits = 0
+        self.render_hits = 0
+
+    def _load(self, template_path):
+        path = os.path.abspath(template_path)
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        entry = self._templates.get(path)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return path, version, entry[1]
+        # 文件被修改(或首次使用)时重新读取并编译
+        template = Template(_read_template(path))
+        with self._lock:
+            self._templates[path] = (version, template)
+            self.compiles += 1
+        return path, version, template
+
+    def get(self, template_path) -> Template:
+        return self._load(template_path)[2]
+
+    def render(self, template_path, params, memoize: bool = False) -> str:
+        path, version, template = self._load(template_path)
+        if not memoize:
+            return template.render(params)
+        key = (path, version, json.dumps(params, sort_keys=True, ensure_ascii=False, default=str))
+        with self._lock:
+            rendered = self._renders.get(key)
+            if rendered is not None:
+                self._renders.move_to_end(key)
+                self.render_hits += 1
+                return rendered
+        rendered = template.render(params)
+        with self._lock:
+            self._renders[key] = rendered
+            while len(self._renders) > self.max_renders:
+                self._renders.popitem(last=False)
+        return rendered
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+            self._renders.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'templates': len(self._templates),
+            'compiles': self.compiles,
+            'hits': self.hits,
+            'renders': len(self._renders),
+            'renderHits': self.render_hits,
+        }
+
+
+_template_registry = TemplateRegistry()
+
+
+def get_template_registry() -> TemplateRegistry:
+    return _template_registry
+
+
+def load_prompt_from_template(template_path, params, memoize=False):
+    """Render a jinja template file; ``memoize=True`` for parameters that are fixed per run."""
+    return _template_registry.render(template_path, params, memoize=memoize)
 
 
 def raw_LLM_validator(question, response, target, model="gpt-4o"):
@@ -114,10 +200,88 @@ def load_agent_config(config_path: str) -> Dict[str, Any]:
         "resume": config.get("resume", "")
     }
 
-def parse_json_from_str(output_str):
-    output_str = output_str.strip().replace('```json', '').replace('```', '')
+_FENCED_JSON = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+_JSON_OPENER = re.compile(r"[\{\[]")
+_JSON_CLOSERS = {'{': '}', '[': ']'}
+# 夹杂在说明文字中的JSON最多尝试这么多个候选片段
+MAX_JSON_CANDIDATES = 8
+
+
+def _json_candidates(text, limit=MAX_JSON_CANDIDATES):
+    """Outermost balanced ``{...}``/``[...]`` spans of ``text``, left to right.
 
-    return yaml.safe_load(output_str)
+    One pass over the text; brackets inside JSON strings are ignored. A span
+    with a mismatched bracket is skipped, one that never closes is rescanned
+    from the character after its opening bracket. At most ``limit`` spans are
+    scanned, so the cost stays linear in the reply length.
+    """
+    pos, n = 0, len(text)
+    for _ in range(limit):
+        match = _JSON_OPENER.search(text, pos)
+        if match is None:
+            return
+        start = match.start()
+        expected = [_JSON_CLOSERS[text[start]]]
+        in_string = escaped = mismatched = False
+        i = start + 1
+        while i < n and expected:
+            ch = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == '\\':
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch in _JSON_CLOSERS:
+                expected.append(_JSON_CLOSERS[ch])
+            elif ch in '}]' and ch != expected.pop():
+                mismatched = True
+                break
+            i += 1
+        if mismatched:
+            pos = i + 1   # 括号不匹配: 跳过这一段
+        elif not expected:
+            yield text[start:i]
+            pos = i
+        else:
+            pos = start + 1   # 没有闭合: 从下一个字符重新找
+
+
+def extract_json(output_str):
+    """Find the JSON value in an LLM reply.
+
+    Tries, in order: the whole reply, fenced ```json blocks, and the outermost
+    balanced object/array candidates embedded in surrounding prose (at most
+    :data:`MAX_JSON_CANDIDATES`). Raises ValueError if none parses.
+    """
+    text = output_str.strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    for block in _FENCED_JSON.findall(text):
+        try:
+            return json.loads(block.strip())
+        except ValueError:
+            continue
+    for candidate in _json_candidates(text):
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    raise ValueError("no JSON value found in output")
+
+
+def parse_json_from_str(output_str):
+    try:
+        return extract_json(output_str)
+    except ValueError:
+        # 兼容非严格JSON(单引号、尾逗号等)的旧输出
+        output_str = output_str.strip().replace('```json', '').replace('```', '')
+        return yaml.safe_load(output_str)
 
 
 def calculate_f1_score(predicted, actual):
@@ -15,6 +15,7 @@ from database import TeamDatabase
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from backend_codes.runner import SimpleTeamRunner
 from backend_codes.telemetry import QueueEmitter
+import asyncio
 import json
 import threading
 import queue
@@ -38,6 +39,10 @@ db = TeamDatabase()
 current_runner = None
 current_config = None
 
+# 所有SSE运行共享一个常驻后台线程的事件循环，而不是每次运行单独开一个线程
+run_loop = asyncio.new_event_loop()
+threading.Thread(target=run_loop.run_forever, name="team-run-loop", daemon=True).start()
+
 DEFAULT_CONFIG_DIR = Path("./SourceFiles")
 DEFAULT_CONFIG_PATTERNS = ("*.yaml", "*.yml", "*.json")
 UPLOAD_ROOT = Path("./backend_codes/data/uploads")
@@ -115,6 +120,29 @@ def _build_public_url(file_id: str) -> str:
         pass
     return f"{base}/api/uploads/{file_id}"
 
+def _resolve_attachments(raw_attachments: List[Any]) -> List[Dict[str, Any]]:
+    """Merge client-supplied attachment refs with the stored upload metadata."""
+    attachments: List[Dict[str, Any]] = []
+    for item in raw_attachments:
+        if not isinstance(item, dict):
+            continue
+        file_id = item.get('fileId') or item.get('id')
+        if not file_id:
+            continue
+        stored = db.get_uploaded_file(str(file_id))
+        if stored:
+            merged: Dict[str, Any] = {**stored, **item}
+            merged['fileId'] = stored['fileId']
+            merged.setdefault('storagePath', stored.get('storagePath'))
+            merged.setdefault('storageUri', stored.get('storagePath'))
+            merged.setdefault('downloadUrl', f"/api/uploads/{stored['fileId']}")
+            merged.setdefault('publicUrl', _build_public_url(stored['fileId']))
+            attachments.append(merged)
+        else:
+            attachments.append(dict(item))
+    return attachments
+
+
 def sanitize_identifier(value: Optional[str], fallback: str = "team") -> str:
     raw = str(value).strip() if value else ""
     cleaned = re.sub(r"[^a-zA-Z0-9_-]+", "_", raw)
@@ -740,23 +768,7 @@ def process_input():
         raw_attachments = data.get('attachments') if isinstance(data, dict) else []
         attachments: List[Dict[str, Any]] = []
         if isinstance(raw_attachments, list):
-            for item in raw_attachments:
-                if not isinstance(item, dict):
-                    continue
-                file_id = item.get('fileId') or item.get('id')
-                if not file_id:
-                    continue
-                stored = db.get_uploaded_file(str(file_id))
-                if stored:
-                    merged: Dict[str, Any] = {**stored, **item}
-                    merged['fileId'] = stored['fileId']
-                    merged.setdefault('storagePath', stored.get('storagePath'))
-                    merged.setdefault('storageUri', stored.get('storagePath'))
-                    merged.setdefault('downloadUrl', f"/api/uploads/{stored['fileId']}")
-                    merged.setdefault('publicUrl', _build_public_url(stored['fileId']))
-                    attachments.append(merged)
-                else:
-                    attachments.append(dict(item))
+            attachments = _resolve_attachments(raw_attachments)
         else:
             print('?? DEBUG: attachments payload is not a list; ignoring.')
         print(f'?? DEBUG: attachments = {attachments}')
@@ -817,6 +829,73 @@ def process_input():
             'error': str(e)
         }), 500
 
+@app.route('/api/process-batch', methods=['POST'])
+def process_batch():
+    """Run many inputs against the loaded team and stream one JSON line per result.
+
+    Body: {"inputs": ["question", {"id": "q2", "input": "...", "attachments": [...]}, ...],
+           "concurrency": 8, "teamId": optional}
+    Each line is {"type": "result", "index", "id", "input", "success", "output", "error", "elapsedMs"};
+    the last line is {"type": "summary", "total", "succeeded", "failed", "elapsedMs"}.
+    """
+    global current_runner, current_config
+
+    try:
+        data = request.get_json() or {}
+        inputs = data.get('inputs')
+        if not isinstance(inputs, list) or not inputs:
+            return jsonify({
+                'success': False,
+                'error': 'inputs must be a non-empty list'
+            }), 400
+
+        team_id = data.get('teamId')
+        if team_id:
+            team = db.get_team(team_id)
+            if not team:
+                return jsonify({
+                    'success': False,
+                    'error': 'Team not found'
+                }), 404
+            config = team['configData']
+        elif current_config:
+            config = current_config
+        else:
+            return jsonify({
+                'success': False,
+                'error': 'No team loaded. Please load a team first.'
+            }), 400
+
+        runner = current_runner or SimpleTeamRunner()
+        concurrency = max(1, int(data.get('concurrency') or 4))
+        goals = []
+        for item in inputs:
+            if isinstance(item, dict) and isinstance(item.get('attachments'), list):
+                item = {**item, 'attachments': _resolve_attachments(item['attachments'])}
+            goals.append(item)
+
+        def generate():
+            started = time.time()
+            total = succeeded = 0
+            for result in runner.iter_batch(goals, config, concurrency=concurrency):
+                total += 1
+                succeeded += 1 if result.get('success') else 0
+                yield (json.dumps(result, ensure_ascii=False) + "\n").encode('utf-8')
+            summary = runner.batch_summary(total, succeeded, started)
+            yield (json.dumps(summary, ensure_ascii=False) + "\n").encode('utf-8')
+
+        headers = {
+            'Cache-Control': 'no-cache',
+            'Content-Type': 'application/x-ndjson; charset=utf-8',
+            'X-Accel-Buffering': 'no',
+        }
+        return Response(generate(), headers=headers)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/run-sse', methods=['GET'])
 def run_sse():
     """Start a team run and stream telemetry events via Server-Sent Events (SSE)."""
@@ -843,23 +922,7 @@ def run_sse():
             try:
                 parsed = json.loads(raw_attachments)
                 if isinstance(parsed, list):
-                    for item in parsed:
-                        if not isinstance(item, dict):
-                            continue
-                        file_id = item.get('fileId') or item.get('id')
-                        if not file_id:
-                            continue
-                        stored = db.get_uploaded_file(str(file_id))
-                        if stored:
-                            merged: Dict[str, Any] = {**stored, **item}
-                            merged['fileId'] = stored['fileId']
-                            merged.setdefault('storagePath', stored.get('storagePath'))
-                            merged.setdefault('storageUri', stored.get('storagePath'))
-                            merged.setdefault('downloadUrl', f"/api/uploads/{stored['fileId']}")
-                            merged.setdefault('publicUrl', _build_public_url(stored['fileId']))
-                            attachments.append(merged)
-                        else:
-                            attachments.append(dict(item))
+                    attachments = _resolve_attachments(parsed)
             except json.JSONDecodeError as exc:
                 print(f"⚠️ Failed to parse attachments for SSE run: {exc}")
         print(f"🔍 DEBUG: SSE attachments = {attachments}")
@@ -874,9 +937,15 @@ def run_sse():
         q: queue.Queue = queue.Queue()
         emitter = QueueEmitter(q)
 
-        def worker():
+        runner = current_runner
+        config = current_config
+        # ?stream=1: 智能体/LLM节点边生成边发送 node.output.delta 事件
+        if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+            config = {**config, 'settings': {**(config.get('settings') or {}), 'stream': True}}
+
+        async def worker():
             try:
-                current_runner.process_input_output_streaming(user_input, current_config, emit=emitter, attachments=attachments)
+                await runner.aprocess_input_output_streaming(user_input, config, emit=emitter, attachments=attachments)
             except Exception as e:
                 try:
                     emitter({
@@ -886,17 +955,16 @@ def run_sse():
                 except Exception:
                     pass
 
-        t = threading.Thread(target=worker, daemon=True)
-        t.start()
+        run_future = asyncio.run_coroutine_threadsafe(worker(), run_loop)
 
         def generate():
             finished = False
-            while not finished or t.is_alive():
+            while not finished or not run_future.done():
                 try:
                     event = q.get(timeout=0.1)
                 except Exception:
-                    # No item yet, check thread state and continue
-                    if not t.is_alive():
+                    # No item yet, check run state and continue
+                    if run_future.done():
                         break
                     continue
 
@@ -1038,6 +1106,7 @@ if __name__ == '__main__':
     print("   POST /api/teams/<id>/export - 导出团队到YAML")
     print("   POST /api/load-team - 加载团队用于运行")
     print("   POST /api/process-input - 处理用户输入")
+    print("   POST /api/process-batch - 批量处理输入 (JSONL流式返回)")
     print("   POST /api/reset - 重置会话")
     print("   --- 兼容性接�?---")
     print("   GET  /api/configs - 获取配置列表（兼容）")
@@ -15,6 +15,33 @@ const LOGIC_NODE_PRESETS = [
     description: 'Pass messages onward unchanged to the next node.',
     details: 'Use this to mirror residual connections or inspect message payloads without modifying them.',
   },
+  {
+    key: 'map',
+    name: 'Map',
+    description: 'Split each message into parts and process them on parallel agent replicas.',
+    details: 'Splits by lines, chunks, attachments or JSON array items. Pair it with a Reduce node to gather the results in order.',
+    config: {
+      split: 'lines',
+      replicas: 4,
+      model: 'gpt-4o-mini',
+      systemPrompt: 'You are a helpful assistant.',
+    },
+  },
+  {
+    key: 'reduce',
+    name: 'Reduce',
+    description: 'Join the parts produced by a Map node back into one message.',
+    details: 'Waits until every part of a mapped message has arrived and emits them in their original order.',
+  },
+  {
+    key: 'join',
+    name: 'Join',
+    description: 'Wait for one message from every upstream node, then send them on as one message.',
+    details: 'Use this at fan-in points so the next agent answers once with the full context. A timeout (in ticks) releases incomplete rounds.',
+    config: {
+      timeoutTicks: 3,
+    },
+  },
 ];
 
 interface AddNodeModalProps {
@@ -103,6 +130,7 @@ const AddNodeModal: React.FC<AddNodeModalProps> = ({ visible, onCancel, onSubmit
       type: 'logic',
       description: preset.description,
       config: {
+        ...('config' in preset ? preset.config : {}),
         logicType: preset.key,
       },
       position: {
@@ -357,9 +357,20 @@ const NodeEdgeInspector: React.FC<NodeEdgeInspectorProps> = ({
             <Form.Item label="Behaviour" name="logicType" rules={[{ required: true, message: '请选择逻辑类型' }]}>
               <Select disabled>
                 <Option value="go-through">Go Through</Option>
+                <Option value="map">Map</Option>
+                <Option value="reduce">Reduce</Option>
+                <Option value="join">Join</Option>
               </Select>
             </Form.Item>
-            <Text type="secondary">This node forwards incoming messages without modification.</Text>
+            <Text type="secondary">
+              {node?.config?.logicType === 'map'
+                ? 'This node splits incoming messages and processes the parts on parallel agent replicas.'
+                : node?.config?.logicType === 'reduce'
+                  ? 'This node joins mapped parts back into one message, in order.'
+                  : node?.config?.logicType === 'join'
+                    ? 'This node waits for one message from each upstream node and merges them into one.'
+                    : 'This node forwards incoming messages without modification.'}
+            </Text>
           </>
         )}
 </Form>
@@ -146,7 +146,9 @@ const WorkflowChat: React.FC<WorkflowChatProps> = ({ events, assetBaseUrl }) =>
                   <Tag color={'orange'}>处理中</Tag>
                 </div>
                 <div className="content">
-                  <><Spin size="small" /> 正在处理...</>
+                  {e.content
+                    ? <><Spin size="small" /> <span style={{ whiteSpace: 'pre-wrap' }}>{e.content}</span></>
+                    : <><Spin size="small" /> 正在处理...</>}
                 </div>
               </div>
             </div>
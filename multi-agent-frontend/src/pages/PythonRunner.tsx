@@ -269,6 +269,7 @@ const PythonRunner: React.FC = () => {
     }
     const params = new URLSearchParams();
     params.set('input', userInput.trim());
+    params.set('stream', '1');
     if (readyAttachments.length) {
       const payload = readyAttachments.map(({ status, errorMessage, ...rest }) => rest);
       params.set('attachments', JSON.stringify(payload));
@@ -324,6 +325,20 @@ const PythonRunner: React.FC = () => {
         } catch {}
       });
 
+      es.addEventListener('node.output.delta', (ev: MessageEvent) => {
+        try {
+          const e = JSON.parse(ev.data);
+          const nodeId = e?.node?.id;
+          const delta: string = e?.delta || '';
+          const bubbleId = lastProcessingEventIdRef.current[nodeId];
+          if (!bubbleId || !delta) return;
+          // append streamed text to the node's processing bubble
+          setChatEvents(prev => prev.map(item => (
+            item.id === bubbleId ? { ...item, content: (item.content || '') + delta } : item
+          )));
+        } catch {}
+      });
+
       es.addEventListener('node.processing.finished', (ev: MessageEvent) => {
         try {
           const e = JSON.parse(ev.data);
@@ -66,6 +66,8 @@ export const compileAndSaveGraph = async (
       metadata: {
         compiledAt: new Date().toISOString(),
         version: '1.0',
+        // 边的 delay 为相对加载tick的延迟(旧配置中是绝对送达tick)
+        edgeDelay: 'relative',
         name: teamName || `multi-agent-graph-${Date.now()}`,
         description: teamDescription || `包含 ${nodes.length} 个节点和 ${edges.length} 个连接的多智能体系统`,
       },
@@ -107,6 +109,8 @@ export const validateGraph = async (nodes: Node[], edges: Edge[]): Promise<Graph
       metadata: {
         compiledAt: new Date().toISOString(),
         version: '1.0',
+        // 边的 delay 为相对加载tick的延迟(旧配置中是绝对送达tick)
+        edgeDelay: 'relative',
         name: `temp-graph-${Date.now()}`,
       },
     };